@@ -34,11 +34,13 @@ PLANT_TABLES = {
     "plc_tags",
     "tickets",
     "ticket_activities",
-    "event_outbox",
+    "ticket_sequences",
+    "event_log",
+    "sync_cursors",
     "email_queue",
     "whatsapp_queue",
+    "notification_events",
     "ingest_dedup",
-    "timeline_events",
     "audit_log",
     "dead_letter",
     "assets",
@@ -0,0 +1,38 @@
+"""ingest_dedup unique (source_id, event_id) and created_at index
+
+Revision ID: a3c5e7f9b142
+Revises: f6b1d8e3a927
+Create Date: 2026-10-17 19:10:00.000000
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "a3c5e7f9b142"
+down_revision = "f6b1d8e3a927"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The constraint was dropped by f435f62edfb2; drop duplicates that got in since
+    op.execute(
+        sa.text(
+            "DELETE FROM ingest_dedup WHERE id NOT IN "
+            "(SELECT MIN(id) FROM ingest_dedup GROUP BY source_id, event_id)"
+        )
+    )
+    # Batch mode: SQLite cannot add a constraint in place, the table is rebuilt
+    with op.batch_alter_table("ingest_dedup") as batch:
+        batch.create_unique_constraint("uq_source_event", ["source_id", "event_id"])
+    op.create_index(
+        op.f("ix_ingest_dedup_created_at_utc"), "ingest_dedup", ["created_at_utc"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_ingest_dedup_created_at_utc"), table_name="ingest_dedup")
+    with op.batch_alter_table("ingest_dedup") as batch:
+        batch.drop_constraint("uq_source_event", type_="unique")
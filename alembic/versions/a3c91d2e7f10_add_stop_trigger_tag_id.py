@@ -0,0 +1,49 @@
+"""add stop_queue.trigger_tag_id
+
+Revision ID: a3c91d2e7f10
+Revises: ae0e6507cf84
+Create Date: 2026-10-17 09:12:00.000000
+
+"""
+
+import json
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "a3c91d2e7f10"
+down_revision = "ae0e6507cf84"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("stop_queue", sa.Column("trigger_tag_id", sa.String(length=64), nullable=True))
+    op.create_index(
+        op.f("ix_stop_queue_trigger_tag_id"), "stop_queue", ["trigger_tag_id"], unique=False
+    )
+
+    # Backfill open PLC stops from live_context_json so the poller keeps
+    # correlating stops that were opened before this column existed.
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.text("SELECT id, live_context_json FROM stop_queue WHERE is_open = :t"), {"t": True}
+    ).fetchall()
+    for stop_id, ctx in rows:
+        if isinstance(ctx, str):
+            try:
+                ctx = json.loads(ctx)
+            except ValueError:
+                continue
+        tag_id = ctx.get("trigger_tag_id") if isinstance(ctx, dict) else None
+        if tag_id:
+            bind.execute(
+                sa.text("UPDATE stop_queue SET trigger_tag_id = :tag WHERE id = :id"),
+                {"tag": str(tag_id), "id": stop_id},
+            )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_stop_queue_trigger_tag_id"), table_name="stop_queue")
+    op.drop_column("stop_queue", "trigger_tag_id")
@@ -0,0 +1,26 @@
+"""add plc_tags deadband columns
+
+Revision ID: b7e2f4a91c35
+Revises: a3c91d2e7f10
+Create Date: 2026-10-17 10:05:00.000000
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "b7e2f4a91c35"
+down_revision = "a3c91d2e7f10"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("plc_tags", sa.Column("deadband_abs", sa.Float(), nullable=True))
+    op.add_column("plc_tags", sa.Column("deadband_pct", sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("plc_tags", "deadband_pct")
+    op.drop_column("plc_tags", "deadband_abs")
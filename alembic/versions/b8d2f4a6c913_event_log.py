@@ -0,0 +1,259 @@
+"""event_log replaces timeline_events + event_outbox; sync_cursors
+
+Revision ID: b8d2f4a6c913
+Revises: a3c5e7f9b142
+Create Date: 2026-10-17 20:05:00.000000
+
+"""
+
+from datetime import datetime
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "b8d2f4a6c913"
+down_revision = "a3c5e7f9b142"
+branch_labels = None
+depends_on = None
+
+CHUNK = 1000
+
+timeline = sa.table(
+    "timeline_events",
+    sa.column("id", sa.String),
+    sa.column("site_code", sa.String),
+    sa.column("asset_id", sa.String),
+    sa.column("event_type", sa.String),
+    sa.column("payload_json", sa.JSON),
+    sa.column("occurred_at_utc", sa.DateTime),
+    sa.column("correlation_id", sa.String),
+    sa.column("created_at_utc", sa.DateTime),
+)
+outbox = sa.table(
+    "event_outbox",
+    sa.column("site_code", sa.String),
+    sa.column("entity_type", sa.String),
+    sa.column("entity_id", sa.String),
+    sa.column("payload_json", sa.JSON),
+    sa.column("correlation_id", sa.String),
+    sa.column("created_at_utc", sa.DateTime),
+    sa.column("sent_at_utc", sa.DateTime),
+    sa.column("retry_count", sa.Integer),
+    sa.column("next_attempt_at_utc", sa.DateTime),
+    sa.column("last_error", sa.String),
+)
+event_log = sa.table(
+    "event_log",
+    sa.column("seq", sa.BigInteger),
+    sa.column("site_code", sa.String),
+    sa.column("event_type", sa.String),
+    sa.column("asset_id", sa.String),
+    sa.column("entity_type", sa.String),
+    sa.column("entity_id", sa.String),
+    sa.column("payload_json", sa.JSON),
+    sa.column("correlation_id", sa.String),
+    sa.column("occurred_at_utc", sa.DateTime),
+    sa.column("created_at_utc", sa.DateTime),
+)
+sync_cursors = sa.table(
+    "sync_cursors",
+    sa.column("destination", sa.String),
+    sa.column("last_seq", sa.BigInteger),
+    sa.column("retry_count", sa.Integer),
+    sa.column("updated_at_utc", sa.DateTime),
+)
+
+
+def _insert_chunked(table, rows) -> None:
+    for i in range(0, len(rows), CHUNK):
+        op.bulk_insert(table, rows[i : i + CHUNK])
+
+
+def upgrade() -> None:
+    op.create_table(
+        "event_log",
+        sa.Column(
+            "seq",
+            sa.BigInteger().with_variant(sa.Integer(), "sqlite"),
+            autoincrement=True,
+            nullable=False,
+        ),
+        sa.Column("site_code", sa.String(length=16), nullable=False),
+        sa.Column("event_type", sa.String(length=64), nullable=False),
+        sa.Column("asset_id", sa.String(length=128), nullable=True),
+        sa.Column("entity_type", sa.String(length=32), nullable=True),
+        sa.Column("entity_id", sa.String(length=64), nullable=True),
+        sa.Column("payload_json", sa.JSON(), nullable=False),
+        sa.Column("correlation_id", sa.String(length=128), nullable=False),
+        sa.Column("occurred_at_utc", sa.DateTime(), nullable=False),
+        sa.Column("created_at_utc", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("seq"),
+        sa.UniqueConstraint("correlation_id"),
+        sqlite_autoincrement=True,
+    )
+    op.create_index(op.f("ix_event_log_event_type"), "event_log", ["event_type"], unique=False)
+    op.create_index(op.f("ix_event_log_asset_id"), "event_log", ["asset_id"], unique=False)
+    op.create_index(
+        op.f("ix_event_log_occurred_at_utc"), "event_log", ["occurred_at_utc"], unique=False
+    )
+    op.create_index(
+        op.f("ix_event_log_created_at_utc"), "event_log", ["created_at_utc"], unique=False
+    )
+    op.create_table(
+        "sync_cursors",
+        sa.Column("destination", sa.String(length=32), nullable=False),
+        sa.Column("last_seq", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), nullable=False),
+        sa.Column("retry_count", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at_utc", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.String(length=300), nullable=True),
+        sa.Column("updated_at_utc", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("destination"),
+    )
+
+    # Copy both tables into one log. A timeline row and the outbox row with its
+    # correlation_id were the same fact: they become one row (outbox payload
+    # wins, it is the superset). The "hq" cursor goes just below the oldest
+    # unsent outbox row; sent rows after it are re-sent, HQ skips them by
+    # correlation_id.
+    bind = op.get_bind()
+    pending_outbox = {
+        r.correlation_id: r
+        for r in bind.execute(sa.select(outbox).order_by(outbox.c.created_at_utc)).all()
+    }
+    rows = []
+    for t in bind.execute(sa.select(timeline).order_by(timeline.c.created_at_utc)).all():
+        o = pending_outbox.pop(t.correlation_id, None)
+        rows.append(
+            {
+                "site_code": t.site_code,
+                "event_type": t.event_type,
+                "asset_id": t.asset_id,
+                "entity_type": o.entity_type if o else None,
+                "entity_id": o.entity_id if o else None,
+                "payload_json": {**(t.payload_json or {}), **(o.payload_json or {})}
+                if o
+                else t.payload_json,
+                "correlation_id": t.correlation_id,
+                "occurred_at_utc": t.occurred_at_utc,
+                "created_at_utc": t.created_at_utc,
+                "_unsent": o is not None and o.sent_at_utc is None,
+            }
+        )
+    for o in pending_outbox.values():
+        rows.append(
+            {
+                "site_code": o.site_code,
+                "event_type": o.entity_type.upper(),
+                "asset_id": None,
+                "entity_type": o.entity_type,
+                "entity_id": o.entity_id,
+                "payload_json": o.payload_json,
+                "correlation_id": o.correlation_id,
+                "occurred_at_utc": o.created_at_utc,
+                "created_at_utc": o.created_at_utc,
+                "_unsent": o.sent_at_utc is None,
+            }
+        )
+    rows.sort(key=lambda r: r["created_at_utc"])
+
+    last_seq = len(rows)
+    for seq, r in enumerate(rows, start=1):
+        r["seq"] = seq
+        if r.pop("_unsent") and last_seq == len(rows):
+            last_seq = seq - 1
+    _insert_chunked(event_log, rows)
+    if rows and bind.dialect.name == "postgresql":
+        op.execute(
+            sa.text("SELECT setval(pg_get_serial_sequence('event_log', 'seq'), :n)").bindparams(
+                n=len(rows)
+            )
+        )
+    op.bulk_insert(
+        sync_cursors,
+        [
+            {
+                "destination": "hq",
+                "last_seq": last_seq,
+                "retry_count": 0,
+                "updated_at_utc": datetime.utcnow(),
+            }
+        ],
+    )
+
+    op.drop_table("timeline_events")
+    op.drop_table("event_outbox")
+
+
+def downgrade() -> None:
+    op.create_table(
+        "event_outbox",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("site_code", sa.String(length=16), nullable=False, index=True),
+        sa.Column("entity_type", sa.String(length=32), nullable=False, index=True),
+        sa.Column("entity_id", sa.String(length=64), nullable=False, index=True),
+        sa.Column("payload_json", sa.JSON(), nullable=False),
+        sa.Column("correlation_id", sa.String(length=128), nullable=False, unique=True),
+        sa.Column("created_at_utc", sa.DateTime(), nullable=False),
+        sa.Column("sent_at_utc", sa.DateTime(), nullable=True, index=True),
+        sa.Column("retry_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("next_attempt_at_utc", sa.DateTime(), nullable=True, index=True),
+        sa.Column("last_error", sa.String(length=300), nullable=True),
+    )
+    op.create_table(
+        "timeline_events",
+        sa.Column("id", sa.String(length=64), primary_key=True),
+        sa.Column("site_code", sa.String(length=16), nullable=False, index=True),
+        sa.Column("asset_id", sa.String(length=128), nullable=False, index=True),
+        sa.Column("event_type", sa.String(length=64), nullable=False, index=True),
+        sa.Column("payload_json", sa.JSON(), nullable=False),
+        sa.Column("occurred_at_utc", sa.DateTime(), nullable=False, index=True),
+        sa.Column("correlation_id", sa.String(length=128), nullable=False, unique=True),
+        sa.Column("created_at_utc", sa.DateTime(), nullable=False),
+    )
+
+    bind = op.get_bind()
+    hq_seq = bind.execute(
+        sa.select(sync_cursors.c.last_seq).where(sync_cursors.c.destination == "hq")
+    ).scalar()
+    now = datetime.utcnow()
+    timeline_rows, outbox_rows = [], []
+    for r in bind.execute(sa.select(event_log).order_by(event_log.c.seq)).all():
+        if r.asset_id is not None:
+            timeline_rows.append(
+                {
+                    "id": f"TL_{r.seq:018d}",
+                    "site_code": r.site_code,
+                    "asset_id": r.asset_id,
+                    "event_type": r.event_type,
+                    "payload_json": r.payload_json,
+                    "occurred_at_utc": r.occurred_at_utc,
+                    "correlation_id": r.correlation_id,
+                    "created_at_utc": r.created_at_utc,
+                }
+            )
+        if r.entity_type is not None:
+            sent = now if r.seq <= (hq_seq or 0) else None
+            outbox_rows.append(
+                {
+                    "site_code": r.site_code,
+                    "entity_type": r.entity_type,
+                    "entity_id": r.entity_id,
+                    "payload_json": r.payload_json,
+                    "correlation_id": r.correlation_id,
+                    "created_at_utc": r.created_at_utc,
+                    "sent_at_utc": sent,
+                    "retry_count": 0,
+                    "next_attempt_at_utc": None if sent else r.created_at_utc,
+                    "last_error": None,
+                }
+            )
+    _insert_chunked(timeline, timeline_rows)
+    _insert_chunked(outbox, outbox_rows)
+
+    op.drop_table("sync_cursors")
+    op.drop_index(op.f("ix_event_log_created_at_utc"), table_name="event_log")
+    op.drop_index(op.f("ix_event_log_occurred_at_utc"), table_name="event_log")
+    op.drop_index(op.f("ix_event_log_asset_id"), table_name="event_log")
+    op.drop_index(op.f("ix_event_log_event_type"), table_name="event_log")
+    op.drop_table("event_log")
@@ -0,0 +1,77 @@
+"""partial and composite indexes for the hot ticket / stop / event reads
+
+Revision ID: c1e5a9d3f724
+Revises: b8d2f4a6c913
+Create Date: 2026-10-17 22:40:00.000000
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "c1e5a9d3f724"
+down_revision = "b8d2f4a6c913"
+branch_labels = None
+depends_on = None
+
+TICKET_OPEN = "status IN ('OPEN', 'ACKNOWLEDGED', 'ACK')"
+
+
+def _partial(where: str, sqlite_where: str | None = None) -> dict:
+    return {
+        "postgresql_where": sa.text(where),
+        "sqlite_where": sa.text(sqlite_where or where),
+    }
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_tickets_open_sla_due", "tickets", ["sla_due_at_utc"], **_partial(TICKET_OPEN)
+    )
+    op.create_index(
+        "ix_tickets_not_closed_created",
+        "tickets",
+        ["created_at_utc", "id"],
+        **_partial("status <> 'CLOSED'"),
+    )
+    op.create_index("ix_tickets_status_created", "tickets", ["status", "created_at_utc", "id"])
+    op.create_index("ix_stop_queue_site_opened", "stop_queue", ["site_code", "opened_at_utc", "id"])
+    op.create_index("ix_stop_queue_opened", "stop_queue", ["opened_at_utc", "id"])
+    op.create_index(
+        "ix_stop_queue_open_opened",
+        "stop_queue",
+        ["opened_at_utc", "id"],
+        **_partial("is_open IS true", "is_open IS 1"),
+    )
+    op.create_index("ix_event_log_asset_occurred", "event_log", ["asset_id", "occurred_at_utc"])
+    op.create_index("ix_event_log_type_occurred", "event_log", ["event_type", "occurred_at_utc"])
+
+    # Leading-column prefixes of the indexes above, and boolean flags the
+    # partial index replaces
+    op.drop_index("ix_tickets_status", table_name="tickets")
+    op.drop_index("ix_tickets_sla_warning_sent", table_name="tickets")
+    op.drop_index("ix_tickets_sla_breach_sent", table_name="tickets")
+    op.drop_index("ix_stop_queue_site_code", table_name="stop_queue")
+    op.drop_index("ix_stop_queue_is_open", table_name="stop_queue")
+    op.drop_index("ix_event_log_event_type", table_name="event_log")
+    op.drop_index("ix_event_log_asset_id", table_name="event_log")
+
+
+def downgrade() -> None:
+    op.create_index("ix_event_log_asset_id", "event_log", ["asset_id"])
+    op.create_index("ix_event_log_event_type", "event_log", ["event_type"])
+    op.create_index("ix_stop_queue_is_open", "stop_queue", ["is_open"])
+    op.create_index("ix_stop_queue_site_code", "stop_queue", ["site_code"])
+    op.create_index("ix_tickets_sla_breach_sent", "tickets", ["sla_breach_sent"])
+    op.create_index("ix_tickets_sla_warning_sent", "tickets", ["sla_warning_sent"])
+    op.create_index("ix_tickets_status", "tickets", ["status"])
+
+    op.drop_index("ix_event_log_type_occurred", table_name="event_log")
+    op.drop_index("ix_event_log_asset_occurred", table_name="event_log")
+    op.drop_index("ix_stop_queue_open_opened", table_name="stop_queue")
+    op.drop_index("ix_stop_queue_opened", table_name="stop_queue")
+    op.drop_index("ix_stop_queue_site_opened", table_name="stop_queue")
+    op.drop_index("ix_tickets_status_created", table_name="tickets")
+    op.drop_index("ix_tickets_not_closed_created", table_name="tickets")
+    op.drop_index("ix_tickets_open_sla_due", table_name="tickets")
@@ -0,0 +1,28 @@
+"""add plc_tags trigger delay columns
+
+Revision ID: c4d8a1f0b6e2
+Revises: b7e2f4a91c35
+Create Date: 2026-10-17 11:20:00.000000
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "c4d8a1f0b6e2"
+down_revision = "b7e2f4a91c35"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("plc_tags", sa.Column("on_delay_sec", sa.Float(), nullable=True))
+    op.add_column("plc_tags", sa.Column("off_delay_sec", sa.Float(), nullable=True))
+    op.add_column("plc_tags", sa.Column("min_stop_sec", sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("plc_tags", "min_stop_sec")
+    op.drop_column("plc_tags", "off_delay_sec")
+    op.drop_column("plc_tags", "on_delay_sec")
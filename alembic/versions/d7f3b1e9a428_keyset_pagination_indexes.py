@@ -0,0 +1,31 @@
+"""indexes for keyset pagination of the audit log and asset timeline
+
+Revision ID: d7f3b1e9a428
+Revises: c1e5a9d3f724
+Create Date: 2026-10-17 23:30:00.000000
+
+"""
+
+from alembic import op
+
+revision = "d7f3b1e9a428"
+down_revision = "c1e5a9d3f724"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The list endpoints page on a unique key: the sort column plus the PK
+    op.create_index("ix_audit_log_created_id", "audit_log", ["created_at_utc", "id"])
+    op.drop_index("ix_audit_log_created_at_utc", table_name="audit_log")
+    op.drop_index("ix_event_log_asset_occurred", table_name="event_log")
+    op.create_index(
+        "ix_event_log_asset_occurred", "event_log", ["asset_id", "occurred_at_utc", "seq"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_event_log_asset_occurred", table_name="event_log")
+    op.create_index("ix_event_log_asset_occurred", "event_log", ["asset_id", "occurred_at_utc"])
+    op.create_index("ix_audit_log_created_at_utc", "audit_log", ["created_at_utc"])
+    op.drop_index("ix_audit_log_created_id", table_name="audit_log")
@@ -0,0 +1,24 @@
+"""add plc_tags scan_class
+
+Revision ID: d9e3b5c7a214
+Revises: c4d8a1f0b6e2
+Create Date: 2026-10-17 14:05:00.000000
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "d9e3b5c7a214"
+down_revision = "c4d8a1f0b6e2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("plc_tags", sa.Column("scan_class", sa.String(length=16), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("plc_tags", "scan_class")
@@ -0,0 +1,64 @@
+"""add ticket_sequences
+
+Revision ID: e2a7c9d4f318
+Revises: d9e3b5c7a214
+Create Date: 2026-10-17 16:40:00.000000
+
+"""
+
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "e2a7c9d4f318"
+down_revision = "d9e3b5c7a214"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ticket_sequences",
+        sa.Column("site_code", sa.String(length=16), nullable=False),
+        sa.Column("local_day", sa.String(length=8), nullable=False),
+        sa.Column("last_value", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("site_code", "local_day"),
+    )
+
+    # Continue from the codes already issued today (YYYYMMDD-HHMM-NNNN) so the
+    # first allocation after the upgrade cannot repeat one of them.
+    bind = op.get_bind()
+    since = datetime.utcnow() - timedelta(days=2)
+    rows = bind.execute(
+        sa.text(
+            "SELECT site_code, ticket_code FROM tickets "
+            "WHERE created_at_utc >= :since AND ticket_code IS NOT NULL"
+        ),
+        {"since": since},
+    ).all()
+    last: dict[tuple[str, str], int] = {}
+    for site_code, code in rows:
+        parts = code.split("-")
+        if len(parts) != 3 or not parts[2].isdigit():
+            continue
+        key = (site_code, parts[0])
+        last[key] = max(last.get(key, 0), int(parts[2]))
+    if last:
+        op.bulk_insert(
+            sa.table(
+                "ticket_sequences",
+                sa.column("site_code", sa.String),
+                sa.column("local_day", sa.String),
+                sa.column("last_value", sa.Integer),
+            ),
+            [
+                {"site_code": site, "local_day": day, "last_value": value}
+                for (site, day), value in last.items()
+            ],
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("ticket_sequences")
@@ -0,0 +1,41 @@
+"""add notification_events
+
+Revision ID: f6b1d8e3a927
+Revises: e2a7c9d4f318
+Create Date: 2026-10-17 18:20:00.000000
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "f6b1d8e3a927"
+down_revision = "e2a7c9d4f318"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "notification_events",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("kind", sa.String(length=32), nullable=False),
+        sa.Column("ticket_id", sa.String(length=64), nullable=False),
+        sa.Column("payload_json", sa.JSON(), nullable=True),
+        sa.Column("created_at_utc", sa.DateTime(), nullable=False),
+        sa.Column("processed_at_utc", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.String(length=300), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_notification_events_processed_at_utc"),
+        "notification_events",
+        ["processed_at_utc"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_notification_events_processed_at_utc"), table_name="notification_events")
+    op.drop_table("notification_events")
@@ -0,0 +1,79 @@
+"""
+Sync cursors over the event log (models.EventLog).
+
+Every destination keeps one high-water mark, SyncCursor.last_seq: all rows at
+or below it have been delivered. A successful push moves it with a single
+UPDATE instead of marking each row as sent.
+
+A seq is taken at INSERT time, so on PostgreSQL seq N+1 can commit while N is
+still in flight. pending() stops at such a hole until the row after it is
+SYNC_GAP_GRACE_SEC old; by then the hole can only be a rolled-back append.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, or_, select
+
+from apps.plant_backend.models import EventLog, SyncCursor
+from common_core.config import settings
+
+HQ = "hq"
+
+
+def cursor(db, destination: str = HQ) -> SyncCursor:
+    """The destination's cursor, created at seq 0 on first use."""
+    c = db.get(SyncCursor, destination)
+    if c is None:
+        c = SyncCursor(destination=destination, last_seq=0, retry_count=0)
+        db.add(c)
+        db.flush()
+    return c
+
+
+def pending(db, c: SyncCursor, limit: int, now: datetime | None = None) -> list[EventLog]:
+    """
+    Contiguous rows after the cursor, oldest first. Local-only rows (no
+    entity_type) are included so the cursor can move past them.
+    """
+    rows = (
+        db.execute(
+            select(EventLog).where(EventLog.seq > c.last_seq).order_by(EventLog.seq).limit(limit)
+        )
+        .scalars()
+        .all()
+    )
+    grace_cut = (now or datetime.utcnow()) - timedelta(seconds=settings.sync_gap_grace_sec)
+    out = []
+    expect = c.last_seq + 1
+    for r in rows:
+        if r.seq != expect and r.created_at_utc > grace_cut:
+            break
+        out.append(r)
+        expect = r.seq + 1
+    return out
+
+
+def advance(c: SyncCursor, seq: int, now: datetime | None = None) -> None:
+    c.last_seq = seq
+    c.retry_count = 0
+    c.next_attempt_at_utc = None
+    c.last_error = None
+    c.updated_at_utc = now or datetime.utcnow()
+
+
+def backlog(db, destination: str = HQ) -> int:
+    """Synced rows not yet delivered to the destination."""
+    last = db.scalar(select(SyncCursor.last_seq).where(SyncCursor.destination == destination))
+    return db.execute(
+        select(func.count())
+        .select_from(EventLog)
+        .where(EventLog.seq > (last or 0), EventLog.entity_type.is_not(None))
+    ).scalar_one()
+
+
+def delivered(db):
+    """Filter for rows every destination has received (local-only rows count as delivered)."""
+    low = db.scalar(select(func.min(SyncCursor.last_seq)))
+    return or_(EventLog.entity_type.is_(None), EventLog.seq <= (low or 0))
@@ -0,0 +1,118 @@
+"""
+Ingest dedup store: one row per (source_id, event_id), unique-keyed and pruned
+after INGEST_DEDUP_RETENTION_DAYS by the maintenance cleanup job.
+
+claim() inserts the keys of a request with INSERT ... ON CONFLICT DO NOTHING
+RETURNING, so the rows that come back are exactly the new events. This is one
+statement per request, and two requests racing on the same key cannot both win.
+A bounded LRU of recently committed keys sits in front of it, so a gateway
+resending a buffer is answered from memory.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select
+from sqlalchemy import insert as sa_insert
+
+from apps.plant_backend.models import IngestDedup
+from common_core.config import settings
+
+Key = tuple[str, str]
+
+
+class SeenKeys:
+    """Bounded LRU of (source_id, event_id) keys known to be committed."""
+
+    def __init__(self, max_entries: int | None = None):
+        self._max = settings.ingest_dedup_cache_size if max_entries is None else max_entries
+        self._keys: OrderedDict[Key, None] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def seen(self, key: Key) -> bool:
+        with self._lock:
+            if key in self._keys:
+                self._keys.move_to_end(key)
+                return True
+            return False
+
+    def remember(self, keys: Iterable[Key]) -> None:
+        """Call only after the transaction holding the keys has committed."""
+        if self._max <= 0:
+            return
+        with self._lock:
+            for key in keys:
+                self._keys[key] = None
+                self._keys.move_to_end(key)
+            while len(self._keys) > self._max:
+                self._keys.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys.clear()
+
+
+SEEN = SeenKeys()
+
+
+def _dialect_insert(db):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+
+        return insert
+    if dialect == "sqlite" and sqlite3.sqlite_version_info >= (3, 35):
+        from sqlalchemy.dialects.sqlite import insert
+
+        return insert
+    return None
+
+
+def claim(db, keys: Iterable[Key], now: datetime | None = None) -> set[Key]:
+    """
+    Records keys in the caller's transaction and returns those not seen before.
+    Keys in the in-process cache are not sent to the DB at all.
+    """
+    wanted = list(dict.fromkeys(k for k in keys if not SEEN.seen(k)))
+    if not wanted:
+        return set()
+    now = now or datetime.utcnow()
+    rows = [{"source_id": s, "event_id": e, "created_at_utc": now} for s, e in wanted]
+
+    insert = _dialect_insert(db)
+    if insert is not None:
+        stmt = (
+            insert(IngestDedup)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=["source_id", "event_id"])
+            .returning(IngestDedup.source_id, IngestDedup.event_id)
+        )
+        return {tuple(r) for r in db.execute(stmt).all()}
+
+    # No ON CONFLICT ... RETURNING: look up first (the unique key still guards races)
+    existing = set(
+        db.execute(
+            select(IngestDedup.source_id, IngestDedup.event_id).where(
+                IngestDedup.source_id.in_({s for s, _ in wanted}),
+                IngestDedup.event_id.in_({e for _, e in wanted}),
+            )
+        ).all()
+    )
+    new = [r for r in rows if (r["source_id"], r["event_id"]) not in existing]
+    if new:
+        db.execute(sa_insert(IngestDedup), new)
+    return {(r["source_id"], r["event_id"]) for r in new}
+
+
+def prune(db, now: datetime | None = None) -> int:
+    """Deletes keys older than the retention window; returns the row count."""
+    cut = (now or datetime.utcnow()) - timedelta(days=settings.ingest_dedup_retention_days)
+    return db.execute(delete(IngestDedup).where(IngestDedup.created_at_utc < cut)).rowcount
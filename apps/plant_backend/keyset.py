@@ -0,0 +1,98 @@
+"""
+Keyset (cursor) pagination for the UI list endpoints.
+
+A page is read newest first on a unique sort key, typically
+(created_at_utc, id), as `WHERE key < :last ORDER BY key DESC LIMIT n`. Every
+page is then an index range scan, however deep it is, where OFFSET would read
+and discard all the rows before it.
+
+Cursors are opaque tokens: base64 of the direction and the key of the row the
+page starts after ("next", older rows) or before ("prev", newer rows).
+
+Totals come from the planner's row estimate (EXPLAIN) instead of count(*),
+which reads the whole range on every page. Only PostgreSQL has one; other
+dialects report None.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import DateTime, Select, literal, tuple_
+
+NEXT = "n"
+PREV = "p"
+
+
+def page(db, q: Select, keys: tuple, limit: int, cursor: str | None = None):
+    """
+    Runs `q` (a select with its filters, no ORDER BY / LIMIT) one page at a
+    time, newest first on the columns `keys`. Returns (rows, page): rows are
+    the selected entities/columns, page carries limit, returned, next_cursor,
+    prev_cursor and approx_total.
+    """
+    direction, after = _decode(cursor, keys) if cursor else (NEXT, None)
+    n = len(keys)
+    if after is not None:
+        after = [literal(v, k.type) for k, v in zip(keys, after, strict=True)]
+    stmt = q.add_columns(*keys).limit(limit + 1)
+    if direction == NEXT:
+        stmt = stmt.order_by(*(k.desc() for k in keys))
+        if after is not None:
+            stmt = stmt.where(tuple_(*keys) < tuple_(*after))
+    else:
+        stmt = stmt.order_by(*(k.asc() for k in keys))
+        stmt = stmt.where(tuple_(*keys) > tuple_(*after))
+
+    rows = db.execute(stmt).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if direction == PREV:
+        rows.reverse()
+
+    # Paging forward there are newer rows iff we came from a cursor, and
+    # paging back there are older ones (the page we came from)
+    has_next = more if direction == NEXT else bool(rows)
+    has_prev = (cursor is not None and bool(rows)) if direction == NEXT else more
+    return [tuple(r[:-n]) for r in rows], {
+        "limit": limit,
+        "returned": len(rows),
+        "next_cursor": _encode(NEXT, rows[-1][-n:]) if has_next else None,
+        "prev_cursor": _encode(PREV, rows[0][-n:]) if has_prev else None,
+        "approx_total": approx_total(db, q),
+    }
+
+
+def approx_total(db, q: Select) -> int | None:
+    """The planner's estimate of the rows `q` returns; None where there is none."""
+    conn = db.connection()
+    if conn.dialect.name != "postgresql":
+        return None
+    compiled = q.compile(conn)
+    plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _encode(direction: str, key) -> str:
+    values = [v.isoformat() if isinstance(v, datetime) else v for v in key]
+    raw = json.dumps([direction, values], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode(cursor: str, keys: tuple) -> tuple[str, list]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        direction, values = json.loads(raw)
+        if direction not in (NEXT, PREV) or len(values) != len(keys):
+            raise ValueError(cursor)
+        return direction, [
+            datetime.fromisoformat(v) if isinstance(k.type, DateTime) else v
+            for k, v in zip(keys, values, strict=True)
+        ]
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail="invalid cursor") from e
@@ -177,10 +177,15 @@ def startup() -> None:
         # allowing the user to run migrations via docker exec.
         log.warning("bootstrap_skipped_or_failed", extra={"error": str(e)})
 
-    # Start PLC Polling Background Thread
+    # PLC polling: leader-elected thread here, or a separate plc_poller process
+    # whose live values reach this worker through the shared channel
+    mode = settings.plc_poller_mode
     try:
-        plc_service.start_polling_thread(PlantSessionLocal)
-        log.info("plc_service_started")
+        if mode == "external" or settings.plc_live_channel:
+            plc_service.start_channel_reader()
+        if mode == "embedded":
+            plc_service.start_polling_thread(PlantSessionLocal)
+        log.info("plc_service_started", extra={"mode": mode})
     except Exception:
         log.error("plc_service_startup_failed", exc_info=True)
 
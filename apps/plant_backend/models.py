@@ -1,6 +1,21 @@
 from __future__ import annotations
 
-from sqlalchemy import JSON, Boolean, Column, DateTime, Float, Integer, String, Text
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    Index,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+    bindparam,
+    select,
+    text,
+)
 
 from common_core.db import Base
 
@@ -15,15 +30,30 @@ class User(Base):
 
 class StopQueue(Base):
     __tablename__ = "stop_queue"
+    __table_args__ = (
+        # Reports by site and time range
+        Index("ix_stop_queue_site_opened", "site_code", "opened_at_utc", "id"),
+        # Stop list, newest first: all/closed walk the first, open stops the partial one
+        Index("ix_stop_queue_opened", "opened_at_utc", "id"),
+        Index(
+            "ix_stop_queue_open_opened",
+            "opened_at_utc",
+            "id",
+            postgresql_where=text("is_open IS true"),
+            sqlite_where=text("is_open IS 1"),
+        ),
+    )
+
     id = Column(String(64), primary_key=True)
-    site_code = Column(String(16), nullable=False, index=True)
+    site_code = Column(String(16), nullable=False)
     asset_id = Column(String(128), nullable=False, index=True)
     reason = Column(Text, nullable=False)
-    is_open = Column(Boolean, nullable=False, index=True, default=True)
+    is_open = Column(Boolean, nullable=False, default=True)
     opened_at_utc = Column(DateTime, nullable=False)
     closed_at_utc = Column(DateTime, nullable=True)
     resolution_text = Column(Text, nullable=True)
     live_context_json = Column(JSON, nullable=True)
+    trigger_tag_id = Column(String(64), nullable=True, index=True)  # PLCTag that opened it
 
 
 class PLCConfig(Base):
@@ -48,7 +78,9 @@ class PLCTag(Base):
     plc_id = Column(String(64), nullable=False, index=True)
     tag_name = Column(String(128), nullable=False, index=True)
     address = Column(Integer, nullable=False)
-    data_type = Column(String(32), nullable=False, default="BOOL")  # BOOL, INT16, FLOAT32
+    data_type = Column(
+        String(32), nullable=False, default="BOOL"
+    )  # BOOL, INT16, UINT16, INT32, UINT32, FLOAT32
     multiplier = Column(Float, nullable=True, default=1.0)  # Scaling factor
     is_stop_trigger = Column(Boolean, nullable=False, default=False)
     trigger_value = Column(
@@ -58,15 +90,47 @@ class PLCTag(Base):
         String(256), nullable=True
     )  # e.g. "Low Pressure: $pressure_tag psi"
     asset_id = Column(String(128), nullable=True)  # Asset to associate stop with
+    # Change needed before a new value is persisted (engineering units / % of last value)
+    deadband_abs = Column(Float, nullable=True)
+    deadband_pct = Column(Float, nullable=True)
+    # Stop trigger hysteresis (seconds)
+    on_delay_sec = Column(Float, nullable=True)
+    off_delay_sec = Column(Float, nullable=True)
+    min_stop_sec = Column(Float, nullable=True)
+    # fast / normal / slow; empty = fast for stop triggers, normal otherwise
+    scan_class = Column(String(16), nullable=True)
+
+
+TICKET_OPEN_STATUSES = ("OPEN", "ACKNOWLEDGED", "ACK")
+_TICKET_OPEN_SQL = "status IN ({})".format(", ".join(f"'{s}'" for s in TICKET_OPEN_STATUSES))
 
 
 class Ticket(Base):
     __tablename__ = "tickets"
+    __table_args__ = (
+        # Open tickets by SLA due: SLA checks, SLA scheduler load, rollup
+        Index(
+            "ix_tickets_open_sla_due",
+            "sla_due_at_utc",
+            postgresql_where=text(_TICKET_OPEN_SQL),
+            sqlite_where=text(_TICKET_OPEN_SQL),
+        ),
+        # Ticket lists, newest first: not closed (partial) or by status
+        Index(
+            "ix_tickets_not_closed_created",
+            "created_at_utc",
+            "id",
+            postgresql_where=text("status <> 'CLOSED'"),
+            sqlite_where=text("status <> 'CLOSED'"),
+        ),
+        Index("ix_tickets_status_created", "status", "created_at_utc", "id"),
+    )
+
     id = Column(String(64), primary_key=True)
     site_code = Column(String(16), nullable=False, index=True)
     asset_id = Column(String(128), nullable=False, index=True)
     title = Column(String(256), nullable=False)
-    status = Column(String(32), nullable=False, index=True, default="OPEN")
+    status = Column(String(32), nullable=False, default="OPEN")
     priority = Column(String(32), nullable=False, default="MEDIUM")
     assigned_to_user_id = Column(String(64), nullable=True, index=True)
     assigned_dept = Column(String(64), nullable=True, index=True)
@@ -78,15 +142,31 @@ class Ticket(Base):
     resolved_at_utc = Column(DateTime, nullable=True)
     resolution_reason = Column(String(64), nullable=True)  # Root cause code
     close_note = Column(Text, nullable=True)
-    sla_warning_sent = Column(
-        Boolean, nullable=False, default=False, index=True
-    )  # Track if warning alert sent
-    sla_breach_sent = Column(
-        Boolean, default=False, nullable=False, index=True
-    )  # Track if breach alert sent
+    # Track if warning / breach alert sent (open tickets are found via ix_tickets_open_sla_due)
+    sla_warning_sent = Column(Boolean, nullable=False, default=False)
+    sla_breach_sent = Column(Boolean, default=False, nullable=False)
     ticket_code = Column(String(32), nullable=True, index=True)  # YYYYMMDD-HHMM-NNNN
 
 
+def ticket_is_open():
+    """
+    Ticket.status IN TICKET_OPEN_STATUSES with the values inlined, not bound:
+    the planner can only match the ix_tickets_open_sla_due predicate on literals.
+    """
+    return Ticket.status.in_(
+        bindparam("open_statuses", TICKET_OPEN_STATUSES, expanding=True, literal_execute=True)
+    )
+
+
+class TicketSequence(Base):
+    """Last ticket serial handed out per site and plant-local day (YYYYMMDD)."""
+
+    __tablename__ = "ticket_sequences"
+    site_code = Column(String(16), primary_key=True)
+    local_day = Column(String(8), primary_key=True)
+    last_value = Column(Integer, nullable=False)
+
+
 class TicketActivity(Base):
     __tablename__ = "ticket_activities"
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -97,19 +177,45 @@ class TicketActivity(Base):
     created_at_utc = Column(DateTime, nullable=False)
 
 
-class EventOutbox(Base):
-    __tablename__ = "event_outbox"
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    site_code = Column(String(16), nullable=False, index=True)
-    entity_type = Column(String(32), nullable=False, index=True)
-    entity_id = Column(String(64), nullable=False, index=True)
+class EventLog(Base):
+    """
+    Append-only log of plant events in commit order (`seq`). Rows with an
+    asset_id make up the asset timeline (TimelineEvent); rows with an
+    entity_type are pushed to HQ by sync_agent, which keeps its position in
+    SyncCursor instead of marking rows as sent.
+    """
+
+    __tablename__ = "event_log"
+    __table_args__ = (
+        Index(
+            "ix_event_log_asset_occurred", "asset_id", "occurred_at_utc", "seq"
+        ),  # asset timeline
+        Index("ix_event_log_type_occurred", "event_type", "occurred_at_utc"),  # rollup
+        {"sqlite_autoincrement": True},  # never reuse a seq after pruning
+    )
+
+    seq = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    site_code = Column(String(16), nullable=False)
+    event_type = Column(String(64), nullable=False)
+    asset_id = Column(String(128), nullable=True)  # NULL: not on a timeline
+    entity_type = Column(String(32), nullable=True)  # NULL: not synced to HQ
+    entity_id = Column(String(64), nullable=True)
     payload_json = Column(JSON, nullable=False)
     correlation_id = Column(String(128), nullable=False, unique=True)
-    created_at_utc = Column(DateTime, nullable=False)
-    sent_at_utc = Column(DateTime, nullable=True, index=True)
+    occurred_at_utc = Column(DateTime, nullable=False, index=True)
+    created_at_utc = Column(DateTime, nullable=False, index=True)
+
+
+class SyncCursor(Base):
+    """High-water mark of EventLog.seq delivered to a sync destination."""
+
+    __tablename__ = "sync_cursors"
+    destination = Column(String(32), primary_key=True)
+    last_seq = Column(BigInteger().with_variant(Integer, "sqlite"), nullable=False, default=0)
     retry_count = Column(Integer, nullable=False, default=0)
-    next_attempt_at_utc = Column(DateTime, nullable=True, index=True)
+    next_attempt_at_utc = Column(DateTime, nullable=True)
     last_error = Column(String(300), nullable=True)
+    updated_at_utc = Column(DateTime, nullable=True)
 
 
 class EmailQueue(Base):
@@ -135,28 +241,43 @@ class WhatsAppQueue(Base):
     sent_at_utc = Column(DateTime, nullable=True)
 
 
+class NotificationEvent(Base):
+    """
+    One row per ticket notification (open/close/SLA); plant_worker renders it
+    and fans it out to WhatsAppQueue / EmailQueue.
+    """
+
+    __tablename__ = "notification_events"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    kind = Column(String(32), nullable=False)  # STOP_OPEN, TICKET_OPEN, TICKET_CLOSE, SLA_*
+    ticket_id = Column(String(64), nullable=False)
+    payload_json = Column(JSON, nullable=True)  # kind-specific fields (reason, minutes...)
+    created_at_utc = Column(DateTime, nullable=False)
+    processed_at_utc = Column(DateTime, nullable=True, index=True)
+    last_error = Column(String(300), nullable=True)
+
+
 class IngestDedup(Base):
     __tablename__ = "ingest_dedup"
+    __table_args__ = (UniqueConstraint("source_id", "event_id", name="uq_source_event"),)
+
     id = Column(Integer, primary_key=True, autoincrement=True)
     source_id = Column(String(64), nullable=False)
     event_id = Column(String(128), nullable=False)
-    created_at_utc = Column(DateTime, nullable=False)
+    created_at_utc = Column(DateTime, nullable=False, index=True)  # retention pruning
 
 
 class TimelineEvent(Base):
-    __tablename__ = "timeline_events"
-    id = Column(String(64), primary_key=True)
-    site_code = Column(String(16), nullable=False, index=True)
-    asset_id = Column(String(128), nullable=False, index=True)
-    event_type = Column(String(64), nullable=False, index=True)
-    payload_json = Column(JSON, nullable=False)
-    occurred_at_utc = Column(DateTime, nullable=False, index=True)
-    correlation_id = Column(String(128), nullable=False, unique=True)
-    created_at_utc = Column(DateTime, nullable=False)
+    """Read-only view of the asset timeline: EventLog rows that carry an asset_id."""
+
+    __table__ = (
+        select(EventLog.__table__).where(EventLog.__table__.c.asset_id.is_not(None))
+    ).subquery("timeline_events")
 
 
 class AuditLog(Base):
     __tablename__ = "audit_log"
+    __table_args__ = (Index("ix_audit_log_created_id", "created_at_utc", "id"),)  # audit list
     id = Column(Integer, primary_key=True, autoincrement=True)
     site_code = Column(String(16), nullable=False, index=True)
     actor_user_id = Column(String(64), nullable=True, index=True)
@@ -166,7 +287,7 @@ class AuditLog(Base):
     entity_id = Column(String(64), nullable=False, index=True)
     request_id = Column(String(64), nullable=True, index=True)
     details_json = Column(JSON, nullable=False)
-    created_at_utc = Column(DateTime, nullable=False, index=True)
+    created_at_utc = Column(DateTime, nullable=False)
 
 
 class DeadLetter(Base):
@@ -0,0 +1,256 @@
+"""
+Ticket notifications (WhatsApp / email).
+
+Stop and ticket transactions only record a NotificationEvent (kind, ticket id
+and a few kind-specific fields). plant_worker calls dispatch_pending(), which
+renders each event against the ticket with the configured template and queues
+the messages for the channels that are enabled.
+
+Templates use {placeholder} fields. A template is parsed once and cached by the
+hash of its text; unknown placeholders are left as written.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from apps.plant_backend.models import EmailQueue, NotificationEvent, Ticket, WhatsAppQueue
+from apps.plant_backend.system_config import SYSTEM_CONFIG, ConfigSnapshot
+from apps.plant_backend.write_buffer import stage
+from common_core.config import settings
+
+log = logging.getLogger("assetiq.notifications")
+
+STOP_OPEN = "STOP_OPEN"
+TICKET_OPEN = "TICKET_OPEN"
+TICKET_CLOSE = "TICKET_CLOSE"
+SLA_WARNING = "SLA_WARNING"
+SLA_BREACH = "SLA_BREACH"
+
+DEFAULT_TEMPLATES = {
+    STOP_OPEN: "🚀 AssetIQ Ticket Created\nID: {ticket_code}\nAsset: {asset_id}\nTitle: {title}\nPriority: {priority}",
+    TICKET_OPEN: "🚀 AssetIQ Ticket Created\nID: {ticket_code}\nAsset: {asset_id}\nTitle: {title}\nPriority: {priority}",
+    TICKET_CLOSE: "✅ Ticket Closed\nID: {ticket_code}\nTitle: {title}\nNote: {close_note}",
+    SLA_WARNING: (
+        "⚠️ SLA Warning\n"
+        "Ticket: {ticket_code}\n"
+        "Asset: {asset_id}\n"
+        "Title: {title}\n"
+        "Priority: {priority}\n"
+        "Time Remaining: {remaining_mins} minutes\n"
+        "SLA Due: {sla_due_time}"
+    ),
+    SLA_BREACH: (
+        "🔥 SLA BREACHED\n"
+        "Ticket: {ticket_code}\n"
+        "Asset: {asset_id}\n"
+        "Title: {title}\n"
+        "Priority: {priority}\n"
+        "Overdue By: {overdue_mins} minutes\n"
+        "SLA Due: {sla_due_time}"
+    ),
+}
+
+STOP_EMAIL_SUBJECT = "[{site_code}] STOP {asset_id} - Ticket {id}"
+STOP_EMAIL_BODY = (
+    "Stop opened for asset={asset_id}\nReason={reason}\nTicket={id}\nSLA Due={sla_due_iso}Z"
+)
+
+_SLA_STATE = {
+    STOP_OPEN: "OK",
+    TICKET_OPEN: "OK",
+    TICKET_CLOSE: "CLOSED",
+    SLA_WARNING: "WARNING",
+    SLA_BREACH: "BREACHED",
+}
+
+_FIELD = re.compile(r"\{(\w+)\}")
+_CACHE_MAX = 256
+
+
+def to_friendly_local_time(dt_utc) -> str:
+    """
+    Converts UTC datetime to Friendly Plant Local Time (IST).
+    Format: 22 Jan 2026, 04:44 PM
+    """
+    if not dt_utc:
+        return "N/A"
+    # Fixed offset for IST (UTC+5:30)
+    tz_offset = timedelta(hours=5, minutes=30)
+    local_dt = dt_utc + tz_offset
+    return local_dt.strftime("%d %b %Y, %I:%M %p")
+
+
+class CompiledTemplate:
+    """Template text split once into (literal, field) pairs."""
+
+    __slots__ = ("_parts", "_tail")
+
+    def __init__(self, text: str):
+        parts = []
+        pos = 0
+        for m in _FIELD.finditer(text):
+            parts.append((text[pos : m.start()], m.group(1)))
+            pos = m.end()
+        self._parts = tuple(parts)
+        self._tail = text[pos:]
+
+    def render(self, values: dict[str, str]) -> str:
+        out = []
+        for literal, name in self._parts:
+            out.append(literal)
+            value = values.get(name)
+            out.append("{" + name + "}" if value is None else value)
+        out.append(self._tail)
+        return "".join(out)
+
+
+_compiled: dict[str, CompiledTemplate] = {}
+
+
+def compile_template(text: str) -> CompiledTemplate:
+    key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    tpl = _compiled.get(key)
+    if tpl is None:
+        if len(_compiled) >= _CACHE_MAX:
+            _compiled.clear()
+        tpl = _compiled[key] = CompiledTemplate(text)
+    return tpl
+
+
+def emit_notification(db, kind: str, ticket_id: str, payload: dict | None = None) -> None:
+    """Records a notification in the caller's transaction; rendering happens in plant_worker."""
+    stage(
+        db,
+        NotificationEvent,
+        {
+            "kind": kind,
+            "ticket_id": ticket_id,
+            "payload_json": payload or None,
+            "created_at_utc": datetime.utcnow(),
+            "processed_at_utc": None,
+            "last_error": None,
+        },
+    )
+
+
+def _context(kind: str, t: Ticket, payload: dict) -> dict[str, str]:
+    code = str(t.ticket_code or t.id)
+    values = {
+        "id": str(t.id),
+        "ticket_code": code,
+        "ticket_id": code,  # Alias for friendly ID
+        "asset_id": str(t.asset_id),
+        "title": str(t.title),
+        "priority": str(t.priority),
+        "created_at": to_friendly_local_time(t.created_at_utc),
+        "source": str(t.source or "Unknown"),
+        "assigned_to": str(t.assigned_to_user_id or "Unassigned"),
+        "dept": str(t.assigned_dept or "General"),
+        "sla_due": to_friendly_local_time(t.sla_due_at_utc),
+        "site_code": str(t.site_code),
+        "sla_state": _SLA_STATE[kind],
+    }
+    if kind == STOP_OPEN:
+        values["reason"] = str(payload.get("reason", ""))
+        values["sla_due_iso"] = t.sla_due_at_utc.isoformat() if t.sla_due_at_utc else "N/A"
+    elif kind == TICKET_CLOSE:
+        values["close_note"] = str(t.close_note)
+        values["resolution_reason"] = str(t.resolution_reason or "N/A")
+        values["closed_at"] = to_friendly_local_time(t.resolved_at_utc)
+    elif kind in (SLA_WARNING, SLA_BREACH):
+        values["sla_due_time"] = t.sla_due_at_utc.strftime("%H:%M") if t.sla_due_at_utc else ""
+        for key in ("remaining_mins", "overdue_mins"):
+            if key in payload:
+                values[key] = str(payload[key])
+    return values
+
+
+def _template(kind: str, cfg: ConfigSnapshot) -> str:
+    custom = {
+        STOP_OPEN: cfg.whatsapp_message_template,
+        TICKET_OPEN: cfg.whatsapp_message_template,
+        TICKET_CLOSE: cfg.whatsapp_close_message_template,
+        SLA_WARNING: cfg.whatsapp_warning_message_template,
+        SLA_BREACH: cfg.whatsapp_breach_message_template,
+    }[kind]
+    return custom or DEFAULT_TEMPLATES[kind]
+
+
+def _whatsapp_states(kind: str, t: Ticket) -> str:
+    if kind != TICKET_CLOSE:
+        return "OK" if kind in (STOP_OPEN, TICKET_OPEN) else _SLA_STATE[kind]
+    # Ticket close goes to every group that was notified about this ticket
+    states = ["OK"]
+    if t.sla_warning_sent:
+        states.append("WARNING")
+    if t.sla_breach_sent:
+        states.append("BREACHED")
+    return ",".join(states)
+
+
+def _fan_out(db, ev: NotificationEvent, t: Ticket, cfg: ConfigSnapshot) -> None:
+    values = _context(ev.kind, t, ev.payload_json or {})
+
+    if ev.kind == STOP_OPEN:
+        db.add(
+            EmailQueue(
+                to_email=settings.email_maintenance,
+                subject=compile_template(STOP_EMAIL_SUBJECT).render(values),
+                body=compile_template(STOP_EMAIL_BODY).render(values),
+                status="PENDING",
+                created_at_utc=ev.created_at_utc,
+                sent_at_utc=None,
+            )
+        )
+
+    if cfg.whatsapp_active:
+        db.add(
+            WhatsAppQueue(
+                ticket_id=t.id,
+                phone_number=cfg.whatsapp_target_phone,
+                message=compile_template(_template(ev.kind, cfg)).render(values),
+                status="PENDING",
+                sla_state=_whatsapp_states(ev.kind, t),
+                created_at_utc=ev.created_at_utc,
+            )
+        )
+
+
+def dispatch_pending(db, limit: int = 100) -> int:
+    """Renders and queues pending notification events. Returns the number processed."""
+    events = (
+        db.execute(
+            select(NotificationEvent)
+            .where(NotificationEvent.processed_at_utc.is_(None))
+            .order_by(NotificationEvent.id)
+            .limit(limit)
+        )
+        .scalars()
+        .all()
+    )
+    if not events:
+        return 0
+
+    cfg = SYSTEM_CONFIG.snapshot(db)
+    ids = {ev.ticket_id for ev in events}
+    tickets = {t.id: t for t in db.execute(select(Ticket).where(Ticket.id.in_(ids))).scalars()}
+    now = datetime.utcnow()
+    for ev in events:
+        ev.processed_at_utc = now
+        t = tickets.get(ev.ticket_id)
+        if t is None:
+            ev.last_error = "TICKET_NOT_FOUND"
+            continue
+        try:
+            _fan_out(db, ev, t, cfg)
+        except Exception as e:
+            ev.last_error = str(e)[:300]
+            log.error(f"Failed to queue {ev.kind} notification for ticket {ev.ticket_id}: {e}")
+    db.commit()
+    return len(events)
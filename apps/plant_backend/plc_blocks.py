@@ -0,0 +1,94 @@
+"""
+Block read planner for Modbus holding registers.
+
+Instead of one round trip per PLCTag, tags are grouped into contiguous address
+blocks (up to the protocol limit of 125 registers per request). Small holes
+between tags are read through when they are within the gap tolerance, which is
+cheaper than a second request on serial links.
+"""
+
+from __future__ import annotations
+
+import logging
+import struct
+from dataclasses import dataclass, field
+
+logger = logging.getLogger("plc_service")
+
+# Modbus FC03 limit (registers per request)
+MAX_REGISTERS = 125
+
+# Registers occupied by each data type
+REGISTER_WIDTH = {
+    "BOOL": 1,
+    "INT16": 1,
+    "UINT16": 1,
+    "INT32": 2,
+    "UINT32": 2,
+    "FLOAT32": 2,
+}
+
+
+def register_width(data_type: str | None) -> int:
+    return REGISTER_WIDTH.get((data_type or "BOOL").upper(), 1)
+
+
+@dataclass
+class ReadBlock:
+    start: int
+    count: int
+    tags: list = field(default_factory=list)
+
+    @property
+    def end(self) -> int:
+        return self.start + self.count
+
+
+def plan_blocks(tags, max_registers: int = MAX_REGISTERS, max_gap: int = 8) -> list[ReadBlock]:
+    """
+    Groups tags into read blocks.
+    A tag joins the current block if the unused registers in between are at most
+    max_gap and the block stays within max_registers.
+    """
+    max_registers = max(1, min(max_registers, MAX_REGISTERS))
+    blocks: list[ReadBlock] = []
+    current: ReadBlock | None = None
+
+    for tag in sorted(tags, key=lambda t: t.address):
+        width = register_width(tag.data_type)
+        tag_end = tag.address + width
+        if current is not None:
+            gap = tag.address - current.end
+            new_count = max(current.end, tag_end) - current.start
+            if gap <= max_gap and new_count <= max_registers:
+                current.count = new_count
+                current.tags.append(tag)
+                continue
+        current = ReadBlock(start=tag.address, count=width, tags=[tag])
+        blocks.append(current)
+
+    return blocks
+
+
+def decode_registers(data_type: str | None, words: list[int]):
+    """
+    Decodes raw register words (big-endian word order, high word first).
+    BOOL keeps the raw register value so trigger_value comparisons behave as before.
+    """
+    dt = (data_type or "BOOL").upper()
+    if dt == "INT16":
+        return struct.unpack(">h", struct.pack(">H", words[0]))[0]
+    if dt in ("INT32", "UINT32", "FLOAT32"):
+        raw = struct.pack(">HH", words[0], words[1])
+        fmt = {"INT32": ">i", "UINT32": ">I", "FLOAT32": ">f"}[dt]
+        return struct.unpack(fmt, raw)[0]
+    return words[0]
+
+
+def decode_tag(tag, registers: list[int], block_start: int):
+    """Extracts and scales one tag's value from a block's register array."""
+    offset = tag.address - block_start
+    words = registers[offset : offset + register_width(tag.data_type)]
+    if len(words) < register_width(tag.data_type):
+        return None
+    return decode_registers(tag.data_type, words) * (tag.multiplier or 1.0)
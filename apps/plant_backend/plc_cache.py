@@ -0,0 +1,224 @@
+"""
+Versioned in-memory cache of PLC configuration (PLCConfig + PLCTag).
+
+The poller reads PLC configs and tags from this cache instead of querying the
+DB on every scan. Every /plc/configs and /plc/tags write bumps a version number
+stored in SystemConfig; the cache compares that version (one primary-key
+lookup, throttled) and reloads only when it changed. Writes made in the same
+process also invalidate the cache directly.
+
+Stop reason templates are compiled once per tag when the cache loads.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from sqlalchemy import select
+
+from apps.plant_backend.models import PLCConfig, PLCTag, SystemConfig
+from apps.plant_backend.system_config import bump_version
+
+logger = logging.getLogger("plc_service")
+
+CONFIG_VERSION_KEY = "plcConfigVersion"
+
+
+def bump_config_version(db) -> int:
+    """
+    Marks PLC configuration as changed. Call inside the writing transaction,
+    then CACHE.invalidate() once it is committed.
+    """
+    return bump_version(db, CONFIG_VERSION_KEY)
+
+
+def format_value(val) -> str:
+    # Remove decimals if whole number
+    if isinstance(val, float) and val.is_integer():
+        return str(int(val))
+    return str(val)
+
+
+class ReasonTemplate:
+    """
+    Stop reason template with $TAG$ / $TAG placeholders resolved at compile time
+    against the tag names of the PLC. The longest matching tag name wins, so
+    $temp2 is never rendered as <temp>2. Unknown placeholders stay as typed.
+    """
+
+    def __init__(self, template: str, tag_names):
+        self.template = template
+        # Literal strings alternate with tag references: [lit, (name, raw), lit, ...]
+        self.parts: list = []
+        names = sorted({n for n in tag_names if n}, key=len, reverse=True)
+        if not names or "$" not in template:
+            self.parts = [template]
+            return
+
+        pattern = re.compile(r"\$(" + "|".join(re.escape(n) for n in names) + r")\$?")
+        pos = 0
+        for m in pattern.finditer(template):
+            self.parts.append(template[pos : m.start()])
+            self.parts.append((m.group(1), m.group(0)))
+            pos = m.end()
+        self.parts.append(template[pos:])
+
+    def render(self, values: dict) -> str:
+        out = []
+        for part in self.parts:
+            if isinstance(part, tuple):
+                name, raw = part
+                out.append(format_value(values[name]) if name in values else raw)
+            else:
+                out.append(part)
+        return "".join(out)
+
+
+@dataclass(frozen=True)
+class PlcConfigSnapshot:
+    id: str
+    site_code: str
+    name: str
+    protocol: str
+    ip_address: str | None
+    port: int | None
+    serial_port: str | None
+    baud_rate: int | None
+    slave_id: int
+    scan_interval_sec: int
+    is_active: bool
+
+
+@dataclass(frozen=True)
+class PlcTagSnapshot:
+    id: str
+    plc_id: str
+    tag_name: str
+    address: int
+    data_type: str
+    multiplier: float | None
+    is_stop_trigger: bool
+    trigger_value: float | None
+    stop_reason_template: str | None
+    asset_id: str | None
+    deadband_abs: float | None = None
+    deadband_pct: float | None = None
+    on_delay_sec: float | None = None
+    off_delay_sec: float | None = None
+    min_stop_sec: float | None = None
+    scan_class: str | None = None
+    reason: ReasonTemplate = field(compare=False, repr=False, default=None)
+
+
+_CONFIG_FIELDS = [f for f in PlcConfigSnapshot.__dataclass_fields__]
+_TAG_FIELDS = [f for f in PlcTagSnapshot.__dataclass_fields__ if f != "reason"]
+
+
+@dataclass
+class _Snapshot:
+    version: int | None = None
+    configs: dict[str, PlcConfigSnapshot] = field(default_factory=dict)
+    tags_by_plc: dict[str, list[PlcTagSnapshot]] = field(default_factory=dict)
+
+
+class PlcConfigCache:
+    def __init__(
+        self,
+        session_factory: Callable | None = None,
+        check_interval_sec: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._session_factory = session_factory
+        self._check_interval = check_interval_sec
+        self._clock = clock
+        self._snap: _Snapshot | None = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def _sessions(self):
+        if self._session_factory is None:
+            from common_core.db import PlantSessionLocal
+
+            self._session_factory = PlantSessionLocal
+        return self._session_factory()
+
+    def invalidate(self) -> None:
+        self._next_check = 0.0
+        self._snap = None
+
+    @staticmethod
+    def _read_version(db) -> int | None:
+        row = db.get(SystemConfig, CONFIG_VERSION_KEY)
+        if row is None:
+            return None
+        try:
+            return int(row.config_value)
+        except (TypeError, ValueError):
+            return None
+
+    def _load(self, db, version: int | None) -> _Snapshot:
+        snap = _Snapshot(version=version)
+        for c in db.execute(select(PLCConfig)).scalars().all():
+            snap.configs[c.id] = PlcConfigSnapshot(**{k: getattr(c, k) for k in _CONFIG_FIELDS})
+
+        rows = db.execute(select(PLCTag)).scalars().all()
+        names_by_plc: dict[str, list[str]] = {}
+        for t in rows:
+            names_by_plc.setdefault(t.plc_id, []).append(t.tag_name)
+        for t in rows:
+            template = t.stop_reason_template or f"PLC Trigger: {t.tag_name}"
+            snap.tags_by_plc.setdefault(t.plc_id, []).append(
+                PlcTagSnapshot(
+                    **{k: getattr(t, k) for k in _TAG_FIELDS},
+                    reason=ReasonTemplate(template, names_by_plc[t.plc_id]),
+                )
+            )
+        logger.info(
+            f"PLC config cache loaded (version={version}, plcs={len(snap.configs)}, tags={len(rows)})"
+        )
+        return snap
+
+    def _current(self) -> _Snapshot:
+        snap = self._snap
+        now = self._clock()
+        if snap is not None and now < self._next_check:
+            return snap
+
+        with self._lock:
+            snap = self._snap
+            if snap is not None and self._clock() < self._next_check:
+                return snap
+            db = self._sessions()
+            try:
+                version = self._read_version(db)
+                if snap is None or version != snap.version:
+                    snap = self._load(db, version)
+                    self._snap = snap
+            finally:
+                db.close()
+            self._next_check = self._clock() + self._check_interval
+            return snap
+
+    # ------------------------------------------------------------------
+    # Public accessors
+    # ------------------------------------------------------------------
+    def active_configs(self) -> list[PlcConfigSnapshot]:
+        return [c for c in self._current().configs.values() if c.is_active]
+
+    def get_config(self, plc_id: str) -> PlcConfigSnapshot | None:
+        return self._current().configs.get(plc_id)
+
+    def tags_for(self, plc_id: str) -> list[PlcTagSnapshot]:
+        return self._current().tags_by_plc.get(plc_id, [])
+
+    @property
+    def version(self) -> int | None:
+        return self._current().version
+
+
+CACHE = PlcConfigCache()
@@ -0,0 +1,157 @@
+"""
+Shared channel carrying live PLC values from the poller process to API workers.
+
+The leader poller writes one small JSON file per PLC (atomically, and only when
+a value changed) plus periodic scheduler and connection stats under PLC_CHANNEL_ROOT, which
+defaults to <REPORT_VAULT_ROOT>/plc_live - the volume both the API and worker
+containers already share. Each API worker runs a ChannelReader that watches
+file mtimes, updates its LATEST_VALUES and publishes per-scan deltas to its own
+SSE bus, so nothing extra goes through the database.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+from common_core.config import settings
+
+logger = logging.getLogger("plc_service")
+
+STATS_FILE = "_scan_stats.json"
+_SAFE_NAME = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def channel_root() -> Path:
+    if settings.plc_channel_root:
+        return Path(settings.plc_channel_root)
+    return Path(settings.report_vault_root) / "plc_live"
+
+
+def _write_atomic(path: Path, payload: dict) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, default=str)
+    os.replace(tmp, path)
+
+
+class LiveValueChannel:
+    def __init__(self, root: Path | None = None):
+        self._root = root
+
+    @property
+    def root(self) -> Path:
+        return self._root or channel_root()
+
+    def _path(self, plc_id: str) -> Path:
+        return self.root / f"{_SAFE_NAME.sub('_', plc_id)}.json"
+
+    def publish(self, plc_id: str, values: dict, ts: float | None = None) -> None:
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            _write_atomic(
+                self._path(plc_id),
+                {"plc_id": plc_id, "ts": ts or time.time(), "values": values},
+            )
+        except OSError as e:
+            logger.error(f"Live value channel write failed for {plc_id}: {e}")
+
+    def publish_stats(self, stats: list, connections: list | None = None) -> None:
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            _write_atomic(
+                self.root / STATS_FILE,
+                {"ts": time.time(), "stats": stats, "connections": connections or []},
+            )
+        except OSError as e:
+            logger.error(f"Live value channel stats write failed: {e}")
+
+    def _read_stats_file(self) -> dict:
+        try:
+            with open(self.root / STATS_FILE, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def read_stats(self) -> list:
+        return self._read_stats_file().get("stats", [])
+
+    def read_connections(self) -> list:
+        return self._read_stats_file().get("connections", [])
+
+    @staticmethod
+    def load(path: Path) -> dict | None:
+        try:
+            with open(path, encoding="utf-8") as f:
+                msg = json.load(f)
+            return msg if "plc_id" in msg else None
+        except (OSError, ValueError):
+            return None
+
+
+class ChannelReader:
+    """
+    Applies channel updates to an API worker's LATEST_VALUES and SSE bus.
+    poll_once() is cheap when nothing changed (one stat per PLC file).
+    """
+
+    def __init__(self, channel: LiveValueChannel, latest: dict, bus, poll_sec: float = 0.5):
+        self.channel = channel
+        self.latest = latest
+        self.bus = bus
+        self.poll_sec = poll_sec
+        self.enabled = True
+        self._mtimes: dict[Path, int] = {}
+        self._stop = threading.Event()
+
+    def poll_once(self) -> int:
+        root = self.channel.root
+        if not root.exists():
+            return 0
+        updated = 0
+        for path in root.glob("*.json"):
+            if path.name == STATS_FILE:
+                continue
+            try:
+                mtime = path.stat().st_mtime_ns
+            except OSError:
+                continue
+            if self._mtimes.get(path) == mtime:
+                continue
+            self._mtimes[path] = mtime
+            msg = self.channel.load(path)
+            if not msg:
+                continue
+            plc_id, values = msg["plc_id"], msg.get("values") or {}
+            previous = self.latest.get(plc_id) or {}
+            self.latest[plc_id] = values
+            changed = {k: v for k, v in values.items() if previous.get(k) != v}
+            if changed:
+                self.bus.publish(
+                    {
+                        "type": "PLC_VALUES",
+                        "plc_id": plc_id,
+                        "ts": msg.get("ts"),
+                        "values": changed,
+                    },
+                    topic=plc_id,
+                )
+                updated += 1
+        return updated
+
+    def run_forever(self) -> None:
+        while not self._stop.is_set():
+            if self.enabled:
+                try:
+                    self.poll_once()
+                except Exception as e:
+                    logger.error(f"Live value channel read failed: {e}")
+            self._stop.wait(self.poll_sec)
+
+    def stop(self) -> None:
+        self._stop.set()
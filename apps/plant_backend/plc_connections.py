@@ -0,0 +1,164 @@
+"""
+Long-lived Modbus connections keyed by PLCConfig.id.
+
+Connections are opened once and reused across scans. A PLC that keeps failing
+trips a circuit breaker: it is skipped (no connect attempt, no timeout) until
+an exponential backoff expires, then a single probe decides whether the
+breaker closes again.
+
+If the endpoint of a PLC changes (e.g. via PUT /plc/configs/{id}) the cached
+client no longer matches and is rebuilt on the next acquire.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger("plc_service")
+
+CLOSED = "CLOSED"  # healthy, requests flow
+OPEN = "OPEN"  # known down, skipped until backoff expires
+HALF_OPEN = "HALF_OPEN"  # backoff expired, next acquire is a probe
+
+
+def endpoint_of(config) -> tuple:
+    return (
+        config.protocol,
+        config.ip_address,
+        config.port,
+        config.serial_port,
+        config.baud_rate,
+    )
+
+
+@dataclass
+class PlcConnection:
+    plc_id: str
+    endpoint: tuple
+    client: Any = None
+    state: str = CLOSED
+    failures: int = 0
+    next_attempt_at: float = 0.0
+    last_error: str | None = None
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "plc_id": self.plc_id,
+            "state": self.state,
+            "connected": bool(self.client is not None and getattr(self.client, "connected", False)),
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+class PlcConnectionPool:
+    def __init__(
+        self,
+        client_factory: Callable[[Any], Any],
+        failure_threshold: int = 3,
+        backoff_base_sec: float = 1.0,
+        backoff_max_sec: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._factory = client_factory
+        self._threshold = max(1, failure_threshold)
+        self._base = backoff_base_sec
+        self._max = backoff_max_sec
+        self._clock = clock
+        self._conns: dict[str, PlcConnection] = {}
+        self._lock = threading.Lock()
+
+    def _backoff(self, failures: int) -> float:
+        exp = max(0, failures - self._threshold)
+        return min(self._max, self._base * (2**exp))
+
+    @staticmethod
+    def _close_client(conn: PlcConnection) -> None:
+        if conn.client is not None:
+            with contextlib.suppress(Exception):
+                conn.client.close()
+            conn.client = None
+
+    def acquire(self, config):
+        """
+        Returns a connected client for this PLC, or None if the breaker is open
+        or the connect attempt failed.
+        """
+        with self._lock:
+            conn = self._conns.get(config.id)
+            endpoint = endpoint_of(config)
+            if conn is not None and conn.endpoint != endpoint:
+                logger.info(f"PLC {config.name} endpoint changed, rebuilding connection")
+                self._close_client(conn)
+                conn = None
+            if conn is None:
+                conn = PlcConnection(plc_id=config.id, endpoint=endpoint)
+                self._conns[config.id] = conn
+
+        if conn.state == OPEN:
+            if self._clock() < conn.next_attempt_at:
+                return None
+            conn.state = HALF_OPEN
+            logger.info(f"PLC {config.name} breaker half-open, probing")
+
+        if conn.client is not None and getattr(conn.client, "connected", False):
+            return conn.client
+
+        self._close_client(conn)
+        try:
+            conn.client = self._factory(config)
+            if conn.client is None:
+                return None
+            if conn.client.connect():
+                return conn.client
+            err = "connect failed"
+        except Exception as e:
+            err = str(e)
+
+        self.report_failure(config.id, err)
+        logger.error(f"Failed to connect to PLC {config.name}: {err}")
+        return None
+
+    def report_success(self, plc_id: str) -> None:
+        conn = self._conns.get(plc_id)
+        if conn is None:
+            return
+        if conn.state != CLOSED:
+            logger.info(f"PLC {plc_id} breaker closed")
+        conn.state = CLOSED
+        conn.failures = 0
+        conn.last_error = None
+
+    def report_failure(self, plc_id: str, error: str | None = None) -> None:
+        conn = self._conns.get(plc_id)
+        if conn is None:
+            return
+        self._close_client(conn)
+        conn.failures += 1
+        conn.last_error = (error or "")[:300] or None
+        if conn.state == HALF_OPEN or conn.failures >= self._threshold:
+            conn.state = OPEN
+            conn.next_attempt_at = self._clock() + self._backoff(conn.failures)
+
+    def invalidate(self, plc_id: str) -> None:
+        """Drops the cached connection (config updated or deleted)."""
+        with self._lock:
+            conn = self._conns.pop(plc_id, None)
+        if conn is not None:
+            self._close_client(conn)
+
+    def close_all(self) -> None:
+        with self._lock:
+            conns = list(self._conns.values())
+            self._conns.clear()
+        for conn in conns:
+            self._close_client(conn)
+
+    def stats(self) -> list[dict[str, Any]]:
+        return [c.snapshot() for c in list(self._conns.values())]
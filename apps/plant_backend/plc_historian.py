@@ -0,0 +1,353 @@
+"""
+Embedded short-term historian for PLC tag values.
+
+Every scan appends (epoch_seconds, value) to a fixed-size in-memory ring per
+tag and to 1 s / 1 min / 1 h min-max-avg tiers (each tier is fed by the closed
+buckets of the one below). Raw samples are also spilled in small chunks to
+append-only segment files under <root>/<plc_id>/<tag>/<first_ts_ms>.seg
+(packed native float64 pairs), which are memory-mapped for reads. Queries never
+touch the relational DB.
+
+A process that does not poll (an API worker next to an external poller) reads
+the same segment files instead: raw samples lag by up to FLUSH_INTERVAL_SEC and
+the tiers are aggregated from them at query time.
+"""
+
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+
+from common_core.config import settings
+
+logger = logging.getLogger("plc_service")
+
+RESOLUTIONS = {"1s": 1, "1m": 60, "1h": 3600}
+# Ring capacity per tier (buckets): 1 h of seconds, 1 day of minutes, 30 days of hours
+TIER_CAPACITY = {"1s": 3600, "1m": 1440, "1h": 720}
+# Raw samples buffered before a segment append; also flushed every FLUSH_INTERVAL_SEC
+FLUSH_SAMPLES = 256
+FLUSH_INTERVAL_SEC = 5.0
+
+_SAFE_NAME = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def history_root() -> Path:
+    if settings.plc_history_root:
+        return Path(settings.plc_history_root)
+    return Path(settings.report_vault_root) / "plc_history"
+
+
+def _buckets(rows: list[tuple[float, float]], bucket_sec: int) -> list[tuple[float, ...]]:
+    """Aggregates ascending raw rows into tier rows (bucket_start, min, max, sum, count)."""
+    out: list[list[float]] = []
+    for ts, v in rows:
+        start = ts - ts % bucket_sec
+        if out and out[-1][0] == start:
+            b = out[-1]
+            b[1] = min(b[1], v)
+            b[2] = max(b[2], v)
+            b[3] += v
+            b[4] += 1
+        else:
+            out.append([start, v, v, v, 1.0])
+    return [tuple(b) for b in out]
+
+
+class Ring:
+    """Fixed-capacity ring of float64 rows; column 0 is the (ascending) timestamp."""
+
+    def __init__(self, capacity: int, width: int):
+        self.capacity = capacity
+        self.cols = [array("d", bytes(8 * capacity)) for _ in range(width)]
+        self.head = 0
+        self.size = 0
+
+    def append(self, *row: float) -> None:
+        for col, v in zip(self.cols, row, strict=True):
+            col[self.head] = v
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def _slot(self, i: int) -> int:
+        return (self.head - self.size + i) % self.capacity
+
+    def oldest_ts(self) -> float | None:
+        return self.cols[0][self._slot(0)] if self.size else None
+
+    def window(self, start: float, end: float) -> list[tuple[float, ...]]:
+        ts = self.cols[0]
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if ts[self._slot(mid)] < start:
+                lo = mid + 1
+            else:
+                hi = mid
+        rows = []
+        for i in range(lo, self.size):
+            s = self._slot(i)
+            if ts[s] > end:
+                break
+            rows.append(tuple(col[s] for col in self.cols))
+        return rows
+
+
+class Tier:
+    """Min/max/avg buckets of bucket_sec; rows are (bucket_start, min, max, sum, count)."""
+
+    def __init__(self, bucket_sec: int, capacity: int):
+        self.bucket_sec = bucket_sec
+        self.ring = Ring(capacity, 5)
+        self.current: list[float] | None = None
+
+    def add(self, ts: float, mn: float, mx: float, total: float, n: float):
+        """Accumulates into the open bucket; returns the bucket it closed, if any."""
+        start = ts - ts % self.bucket_sec
+        closed = None
+        if self.current is not None and self.current[0] != start:
+            closed = tuple(self.current)
+            self.ring.append(*closed)
+            self.current = None
+        if self.current is None:
+            self.current = [start, mn, mx, total, n]
+        else:
+            cur = self.current
+            cur[1] = min(cur[1], mn)
+            cur[2] = max(cur[2], mx)
+            cur[3] += total
+            cur[4] += n
+        return closed
+
+    def window(self, start: float, end: float) -> list[tuple[float, ...]]:
+        rows = self.ring.window(start - self.bucket_sec, end)
+        if self.current is not None and self.current[0] <= end:
+            rows.append(tuple(self.current))
+        return [r for r in rows if r[0] + self.bucket_sec > start]
+
+
+class SegmentStore:
+    """Append-only raw segment files of one tag."""
+
+    def __init__(self, directory: Path, segment_bytes: int, max_segments: int):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self._current: Path | None = None
+
+    def _segments(self) -> list[Path]:
+        if not self.directory.exists():
+            return []
+        return sorted(self.directory.glob("*.seg"), key=lambda p: int(p.stem))
+
+    def append(self, data: array) -> None:
+        if not data:
+            return
+        if self._current is None or self._current.stat().st_size >= self.segment_bytes:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._current = self.directory / f"{int(data[0] * 1000)}.seg"
+            segments = self._segments()
+            for old in segments[: max(0, len(segments) + 1 - self.max_segments)]:
+                old.unlink(missing_ok=True)
+        with open(self._current, "ab") as f:
+            f.write(data.tobytes())
+
+    def window(self, start: float, end: float) -> list[tuple[float, float]]:
+        segments = self._segments()
+        firsts = [int(p.stem) / 1000.0 for p in segments]
+        rows: list[tuple[float, float]] = []
+        for i, path in enumerate(segments):
+            if firsts[i] > end or (i + 1 < len(firsts) and firsts[i + 1] < start):
+                continue
+            rows.extend(self._read(path, start, end))
+        return rows
+
+    @staticmethod
+    def _read(path: Path, start: float, end: float) -> list[tuple[float, float]]:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            size -= size % 16  # ignore a torn trailing record
+            if size == 0:
+                return []
+            with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm).cast("d")
+                try:
+                    ts = view[0::2]
+                    i = bisect_left(ts, start)
+                    rows = []
+                    while i < len(ts) and ts[i] <= end:
+                        rows.append((ts[i], view[2 * i + 1]))
+                        i += 1
+                    return rows
+                finally:
+                    ts.release()
+                    view.release()
+
+
+class TagSeries:
+    def __init__(self, segments: SegmentStore | None, raw_capacity: int):
+        self.lock = threading.Lock()
+        self.raw = Ring(raw_capacity, 2)
+        self.tiers = {name: Tier(sec, TIER_CAPACITY[name]) for name, sec in RESOLUTIONS.items()}
+        self.segments = segments
+        self.pending = array("d")
+        self.last_flush = time.monotonic()
+
+    def record(self, ts: float, value: float) -> None:
+        with self.lock:
+            self.raw.append(ts, value)
+            agg = (ts, value, value, value, 1.0)
+            for tier in self.tiers.values():
+                agg = tier.add(*agg)
+                if agg is None:
+                    break
+            if self.segments is not None:
+                self.pending.extend((ts, value))
+                if (
+                    len(self.pending) >= 2 * FLUSH_SAMPLES
+                    or time.monotonic() - self.last_flush >= FLUSH_INTERVAL_SEC
+                ):
+                    self._flush()
+
+    def _flush(self) -> None:
+        data, self.pending = self.pending, array("d")
+        self.last_flush = time.monotonic()
+        try:
+            self.segments.append(data)
+        except OSError as e:
+            logger.error(f"Historian spill to {self.segments.directory} failed: {e}")
+
+    def flush(self) -> None:
+        with self.lock:
+            if self.segments is not None:
+                self._flush()
+
+    def raw_window(self, start: float, end: float) -> list[tuple[float, float]]:
+        with self.lock:
+            oldest = self.raw.oldest_ts()
+            in_memory = self.raw.window(start, end)
+        if self.segments is None or (oldest is not None and start >= oldest):
+            return in_memory
+        # Older than the ring: read the spilled segments up to the ring's first sample
+        cutoff = end if oldest is None else min(end, oldest)
+        older = [r for r in self.segments.window(start, cutoff) if oldest is None or r[0] < oldest]
+        return older + in_memory
+
+    def tier_window(self, resolution: str, start: float, end: float) -> list[tuple[float, ...]]:
+        with self.lock:
+            return self.tiers[resolution].window(start, end)
+
+
+class Historian:
+    def __init__(
+        self,
+        root: Path | None = None,
+        raw_capacity: int | None = None,
+        segment_bytes: int | None = None,
+        max_segments: int | None = None,
+        spill: bool = True,
+    ):
+        self._root = root
+        self._raw_capacity = raw_capacity or settings.plc_history_raw_samples
+        self._segment_bytes = segment_bytes or settings.plc_history_segment_bytes
+        self._max_segments = max_segments or settings.plc_history_max_segments
+        self.spill = spill
+        self._series: dict[tuple[str, str], TagSeries] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, plc_id: str, tag_name: str, create: bool) -> TagSeries | None:
+        key = (plc_id, tag_name)
+        series = self._series.get(key)
+        if series is None and create:
+            with self._lock:
+                series = self._series.get(key)
+                if series is None:
+                    segments = self._segment_store(plc_id, tag_name) if self.spill else None
+                    series = TagSeries(segments, self._raw_capacity)
+                    self._series[key] = series
+        return series
+
+    def _segment_store(self, plc_id: str, tag_name: str) -> SegmentStore:
+        root = self._root or history_root()
+        directory = root / _SAFE_NAME.sub("_", plc_id) / _SAFE_NAME.sub("_", tag_name)
+        return SegmentStore(directory, self._segment_bytes, self._max_segments)
+
+    def record(self, plc_id: str, values: dict, ts: float | None = None) -> None:
+        ts = time.time() if ts is None else ts
+        for tag_name, value in values.items():
+            try:
+                v = float(value)
+            except (TypeError, ValueError):
+                continue
+            self._get(plc_id, tag_name, create=True).record(ts, v)
+
+    def tags(self, plc_id: str) -> list[str]:
+        return sorted(name for pid, name in list(self._series) if pid == plc_id)
+
+    def spilled_tags(self, plc_id: str) -> list[str]:
+        """Tags with segment files on disk (names as sanitized for the directory)."""
+        directory = (self._root or history_root()) / _SAFE_NAME.sub("_", plc_id)
+        if not self.spill or not directory.is_dir():
+            return []
+        return sorted(p.name for p in directory.iterdir() if p.is_dir())
+
+    def query(
+        self,
+        plc_id: str,
+        tag_names: list[str] | None,
+        start: float,
+        end: float,
+        resolution: str = "raw",
+        spilled: bool = False,
+    ) -> dict:
+        """
+        Series of the given tags (default: all) in [start, end]. spilled reads
+        only the segment files, for history recorded by another process.
+        """
+        if not tag_names:
+            tag_names = self.spilled_tags(plc_id) if spilled else self.tags(plc_id)
+        series_out = {}
+        for name in tag_names:
+            series = None if spilled else self._get(plc_id, name, create=False)
+            if series is not None:
+                if resolution == "raw":
+                    rows = series.raw_window(start, end)
+                else:
+                    rows = series.tier_window(resolution, start, end)
+            else:
+                # Not recorded by this process (external poller, or before a restart):
+                # read the segments. Only record() registers a series, so reading never
+                # grows memory.
+                segments = self._segment_store(plc_id, name) if self.spill else None
+                if segments is None or not segments.directory.is_dir():
+                    continue
+                if resolution == "raw":
+                    rows = segments.window(start, end)
+                else:
+                    bucket = RESOLUTIONS[resolution]
+                    raw = segments.window(start - start % bucket, end)
+                    rows = [r for r in _buckets(raw, bucket) if r[0] + bucket > start]
+            if resolution == "raw":
+                series_out[name] = {"t": [r[0] for r in rows], "v": [r[1] for r in rows]}
+            else:
+                series_out[name] = {
+                    "t": [r[0] for r in rows],
+                    "min": [r[1] for r in rows],
+                    "max": [r[2] for r in rows],
+                    "avg": [r[3] / r[4] if r[4] else None for r in rows],
+                }
+        return series_out
+
+    def flush_all(self) -> None:
+        for series in list(self._series.values()):
+            series.flush()
+
+
+HISTORIAN = Historian(spill=settings.plc_history_spill)
@@ -0,0 +1,201 @@
+"""
+Store-and-forward journal for PLC stop transitions.
+
+When the plant DB cannot take a stop open/close, the poller appends the
+transition (timestamp, tag, value, live snapshot) to a local JSON-lines file
+and fsyncs it, then carries on scanning as if the write had succeeded. Once a
+backlog exists every later transition is journaled too, so the DB always sees
+them in order. A replay loop applies the backlog through services.open_stop /
+resolve_stop at the original timestamps, one transaction per entry.
+
+Every entry carries an idempotency key; the stop id is derived from it, so an
+entry replayed twice (e.g. a crash between commit and acknowledgement) or a
+commit whose outcome was unknown never creates a second stop.
+
+Progress is kept as a byte offset in <journal>.ack; the files are truncated
+once everything has been replayed.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from collections.abc import Callable
+from pathlib import Path
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from common_core.config import settings
+
+logger = logging.getLogger("plc_service")
+
+
+def journal_path() -> Path:
+    if settings.plc_journal_path:
+        return Path(settings.plc_journal_path)
+    return Path(settings.report_vault_root) / "plc_journal" / "transitions.jsonl"
+
+
+def _fsync_dir(directory: Path) -> None:
+    if os.name == "nt":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class TransitionJournal:
+    def __init__(self, path: Path | None = None):
+        self._path = path
+        # [(end offset, entry)] not yet replayed, in append order
+        self._pending: list[tuple[int, dict]] | None = None
+        self._size = 0
+        self._lock = threading.RLock()
+        self._replay_lock = threading.Lock()
+
+    @property
+    def path(self) -> Path:
+        return self._path or journal_path()
+
+    @property
+    def ack_path(self) -> Path:
+        return self.path.with_name(self.path.name + ".ack")
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    def _read_ack(self) -> int:
+        try:
+            return int(self.ack_path.read_text(encoding="utf-8").strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _load(self) -> list[tuple[int, dict]]:
+        if self._pending is not None:
+            return self._pending
+        pending: list[tuple[int, dict]] = []
+        try:
+            data = self.path.read_bytes()
+        except FileNotFoundError:
+            data = b""
+        # A torn last line (crash mid-append) was never acknowledged to the poller
+        good = data.rfind(b"\n") + 1
+        if good != len(data):
+            logger.warning(f"PLC journal {self.path}: dropping {len(data) - good} torn byte(s)")
+            with open(self.path, "r+b") as f:
+                f.truncate(good)
+                os.fsync(f.fileno())
+        offset = self._read_ack()
+        if offset > good:
+            offset = good
+        pos = offset
+        for line in data[offset:good].splitlines(keepends=True):
+            pos += len(line)
+            try:
+                pending.append((pos, json.loads(line)))
+            except ValueError:
+                logger.error(f"PLC journal {self.path}: skipping unreadable entry at {pos}")
+        self._size = good
+        self._pending = pending
+        return pending
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._load())
+
+    def entries(self) -> list[dict]:
+        with self._lock:
+            return [entry for _, entry in self._load()]
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+    def append(self, entries: list[dict]) -> None:
+        """Appends entries durably (fsync) before returning."""
+        if not entries:
+            return
+        with self._lock:
+            pending = self._load()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            created = not self.path.exists()
+            lines = [
+                (json.dumps(e, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+                for e in entries
+            ]
+            with open(self.path, "ab") as f:
+                f.write(b"".join(lines))
+                f.flush()
+                os.fsync(f.fileno())
+            if created:
+                _fsync_dir(self.path.parent)
+            for entry, line in zip(entries, lines, strict=True):
+                self._size += len(line)
+                pending.append((self._size, entry))
+
+    def _ack(self, offset: int) -> None:
+        tmp = self.ack_path.with_name(self.ack_path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(str(offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.ack_path)
+
+    def _compact(self) -> None:
+        # Everything replayed: start over with empty files
+        with open(self.path, "r+b") as f:
+            f.truncate(0)
+            os.fsync(f.fileno())
+        self._ack(0)
+        self._size = 0
+
+    # ------------------------------------------------------------------
+    # Replay
+    # ------------------------------------------------------------------
+    def replay(self, session_factory: Callable, apply: Callable[[object, dict], None]) -> int:
+        """
+        Applies pending entries in order, committing each one before it is
+        acknowledged. Stops at the first DB error (the rest stays queued).
+        The journal lock is not held during DB work, so scans can keep
+        appending while a slow replay runs. Returns the number replayed.
+        """
+        done = 0
+        with self._replay_lock:
+            if not self.pending:
+                return 0
+            db = session_factory()
+            try:
+                while True:
+                    with self._lock:
+                        if not self._pending:
+                            break
+                        offset, entry = self._pending[0]
+                    try:
+                        apply(db, entry)
+                        db.commit()
+                    except SQLAlchemyError as e:
+                        db.rollback()
+                        logger.warning(f"PLC journal replay paused ({self.pending} pending): {e}")
+                        break
+                    except ValueError as e:
+                        # Not retryable (e.g. the stop was deleted); do not block the rest
+                        db.rollback()
+                        logger.error(f"PLC journal entry {entry.get('key')} skipped: {e}")
+                    with self._lock:
+                        self._ack(offset)
+                        self._pending.pop(0)
+                        done += 1
+                        if not self._pending:
+                            self._compact()
+            finally:
+                db.close()
+        if done:
+            logger.info(f"PLC journal replayed {done} transition(s)")
+        return done
+
+
+JOURNAL = TransitionJournal()
@@ -0,0 +1,184 @@
+"""
+Compact binary recording of raw PLC poll results.
+
+With PLC_RECORD_PATH set, the leader poller appends every scan result to this
+file; tools/plc_replay.py plays it back into the trigger pipeline. Layout:
+
+    MAGIC, then frames of  <kind:u8><length:u32><payload>
+
+    STRING  <index:u16><utf-8 text>           plc ids / tag names, defined once
+    CONFIG  <json>                            PLCConfig + PLCTag rows, on change
+    SCAN    <ts:f64><plc:u16><n_set:u16><n_unread:u16>
+            n_set x <tag:u16><value:f64>, n_unread x <tag:u16>
+
+A SCAN frame carries only the tags whose value changed since the previous scan
+of that PLC plus tags that failed to read, so a steady line costs a few bytes
+per scan. A torn frame at the end (crash while writing) is ignored on read.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import struct
+import threading
+import time
+from collections.abc import Iterator
+from dataclasses import asdict
+from pathlib import Path
+
+logger = logging.getLogger("plc_service")
+
+MAGIC = b"AIQPLCR\x01"
+
+STRING = 1
+CONFIG = 2
+SCAN = 3
+
+_FRAME = struct.Struct("<BI")
+_STRING = struct.Struct("<H")
+_SCAN = struct.Struct("<dHHH")
+_VALUE = struct.Struct("<Hd")
+_INDEX = struct.Struct("<H")
+
+FLUSH_INTERVAL_SEC = 1.0
+
+
+class RecordingWriter:
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        if self.path.exists() and self.path.stat().st_size:
+            # Never overwrite an earlier session (e.g. before a leader change)
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            self.path = self.path.with_name(f"{self.path.stem}-{stamp}{self.path.suffix}")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = open(self.path, "wb")  # noqa: SIM115 - kept open while recording
+        self._f.write(MAGIC)
+        self._strings: dict[str, int] = {}
+        self._names: list[str] = []
+        self._last: dict[str, dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self.scans = 0
+
+    def _frame(self, kind: int, payload: bytes) -> None:
+        self._f.write(_FRAME.pack(kind, len(payload)))
+        self._f.write(payload)
+
+    def _index(self, text: str) -> int:
+        idx = self._strings.get(text)
+        if idx is None:
+            idx = len(self._strings)
+            if idx > 0xFFFF:
+                raise ValueError("recording string table full")
+            self._strings[text] = idx
+            self._names.append(text)
+            self._frame(STRING, _STRING.pack(idx) + text.encode("utf-8"))
+        return idx
+
+    def write_config(self, configs: list[dict], tags: list[dict]) -> None:
+        payload = json.dumps({"configs": configs, "tags": tags}, default=str).encode("utf-8")
+        with self._lock:
+            self._frame(CONFIG, payload)
+
+    def write_scan(self, plc_id: str, values: dict, ts: float, scanned=None) -> None:
+        """
+        values: {tag_name: value} as read; scanned: tag names that were polled
+        (default all previously seen ones), so unread tags can be told apart.
+        """
+        with self._lock:
+            last = self._last.setdefault(plc_id, {})
+            changed = []
+            for name, value in values.items():
+                value = float(value)
+                if last.get(name) != value:
+                    last[name] = value
+                    changed.append((self._index(name), value))
+            polled = last.keys() if scanned is None else scanned
+            unread = [self._index(n) for n in polled if n not in values and n in last]
+            for idx in unread:
+                last.pop(self._names[idx], None)
+            payload = b"".join(
+                [_SCAN.pack(ts, self._index(plc_id), len(changed), len(unread))]
+                + [_VALUE.pack(idx, v) for idx, v in changed]
+                + [_INDEX.pack(idx) for idx in unread]
+            )
+            self._frame(SCAN, payload)
+            self.scans += 1
+            if time.monotonic() - self._last_flush >= FLUSH_INTERVAL_SEC:
+                self._f.flush()
+                self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._f.closed:
+                self._f.close()
+
+
+class PlcRecorder:
+    """Poller hook: writes the PLC config whenever its version changes, then scans."""
+
+    def __init__(self, path: str | Path, cache):
+        self.writer = RecordingWriter(path)
+        self._cache = cache
+        self._version = object()
+        logger.info(f"Recording PLC scans to {self.writer.path}")
+
+    def record(self, plc_id: str, values: dict, ts: float, scanned=None) -> None:
+        try:
+            version = self._cache.version
+            if version != self._version:
+                self._version = version
+                configs = [asdict(c) for c in self._cache.active_configs()]
+                tags = [
+                    {k: v for k, v in asdict(t).items() if k != "reason"}
+                    for c in configs
+                    for t in self._cache.tags_for(c["id"])
+                ]
+                self.writer.write_config(configs, tags)
+            self.writer.write_scan(plc_id, values, ts, scanned)
+        except Exception as e:
+            logger.error(f"PLC recording write failed: {e}")
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+def read_recording(path: str | Path) -> Iterator[tuple]:
+    """
+    Yields ("config", {"configs": [...], "tags": [...]}) and
+    ("scan", ts, plc_id, {tag_name: value}) with the full read result of each scan.
+    """
+    strings: dict[int, str] = {}
+    state: dict[str, dict[str, float]] = {}
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a PLC recording")
+        while True:
+            header = f.read(_FRAME.size)
+            if len(header) < _FRAME.size:
+                return
+            kind, length = _FRAME.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                logger.warning(f"PLC recording {path}: torn frame at end ignored")
+                return
+            if kind == STRING:
+                (idx,) = _STRING.unpack_from(payload)
+                strings[idx] = payload[_STRING.size :].decode("utf-8")
+            elif kind == CONFIG:
+                yield ("config", json.loads(payload))
+            elif kind == SCAN:
+                ts, plc_idx, n_set, n_unread = _SCAN.unpack_from(payload)
+                plc_id = strings[plc_idx]
+                values = state.setdefault(plc_id, {})
+                pos = _SCAN.size
+                for _ in range(n_set):
+                    idx, value = _VALUE.unpack_from(payload, pos)
+                    values[strings[idx]] = value
+                    pos += _VALUE.size
+                for _ in range(n_unread):
+                    (idx,) = _INDEX.unpack_from(payload, pos)
+                    values.pop(strings[idx], None)
+                    pos += _INDEX.size
+                yield ("scan", ts, plc_id, dict(values))
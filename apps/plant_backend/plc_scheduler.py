@@ -0,0 +1,296 @@
+"""
+Per-PLC polling scheduler.
+
+Each active PLCConfig gets its own cadence (scan_interval_sec) and is scanned on
+a bounded thread pool, so one slow or unreachable controller only ties up its
+own worker instead of delaying every other line.
+
+Tags belong to a scan class (fast / normal / slow), each with its own
+deadline per PLC. Classes that fall due together - or within half of the
+PLC's shortest class interval of each other - are dispatched as one scan, so
+their tags are planned into the same block reads instead of separate requests.
+
+A scan that is still running when its next deadline arrives is not queued a
+second time; the slot is counted as a missed scan and reported. The classes
+that came due stay due, so they all join the scan dispatched once it finishes.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+logger = logging.getLogger("plc_service")
+
+# How often the list of active PLCs is re-read (seconds)
+CONFIG_REFRESH_SEC = 30.0
+# Floor for scan_interval_sec so a misconfigured PLC cannot hog the bus
+MIN_INTERVAL_SEC = 0.1
+# A class due within this fraction of the PLC's shortest interval joins the current scan
+COALESCE_FRACTION = 0.5
+
+SCAN_FAST = "fast"
+SCAN_NORMAL = "normal"
+SCAN_SLOW = "slow"
+SCAN_CLASSES = (SCAN_FAST, SCAN_NORMAL, SCAN_SLOW)
+
+
+def scan_class_of(tag) -> str:
+    """Explicit scan_class, else fast for stop triggers and normal for everything else."""
+    cls = getattr(tag, "scan_class", None)
+    if cls in SCAN_CLASSES:
+        return cls
+    return SCAN_FAST if tag.is_stop_trigger else SCAN_NORMAL
+
+
+@dataclass
+class PlcSchedule:
+    plc_id: str
+    name: str
+    interval_s: float
+    port_key: str | None = None
+    # scan class -> interval / next deadline / scans that included it
+    class_intervals: dict[str, float] = field(default_factory=dict)
+    class_due: dict[str, float] = field(default_factory=dict)
+    class_scans: dict[str, int] = field(default_factory=dict)
+    in_flight: Future | None = None
+    scans: int = 0
+    missed: int = 0
+    # Slots already counted as missed while the current scan is still running
+    skipped: int = 0
+    overruns: int = 0
+    errors: int = 0
+    last_started_at: float | None = None
+    last_duration_ms: float | None = None
+    last_error: str | None = None
+
+    @property
+    def next_due(self) -> float:
+        return min(self.class_due.values())
+
+    @property
+    def fastest_s(self) -> float:
+        return min(self.class_intervals.values())
+
+    def set_classes(self, intervals: dict[str, float], now: float) -> None:
+        for cls in list(self.class_due):
+            if cls not in intervals:
+                self.class_due.pop(cls)
+                self.class_intervals.pop(cls, None)
+        for cls, interval in intervals.items():
+            if cls not in self.class_due:
+                self.class_due[cls] = now
+            elif self.class_intervals.get(cls) != interval:
+                self.class_due[cls] = min(self.class_due[cls], now + interval)
+            self.class_intervals[cls] = interval
+        self.interval_s = self.class_intervals.get(SCAN_NORMAL, self.fastest_s)
+
+    def due_classes(self, now: float) -> list[str]:
+        """Classes to read now: the overdue ones plus any due shortly after."""
+        if not any(due <= now for due in self.class_due.values()):
+            return []
+        horizon = now + self.fastest_s * COALESCE_FRACTION
+        return [cls for cls in SCAN_CLASSES if self.class_due.get(cls, horizon + 1) <= horizon]
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "plc_id": self.plc_id,
+            "name": self.name,
+            "interval_sec": self.interval_s,
+            "classes": {
+                cls: {"interval_sec": interval, "scans": self.class_scans.get(cls, 0)}
+                for cls, interval in self.class_intervals.items()
+            },
+            "scans": self.scans,
+            "missed_scans": self.missed,
+            "overruns": self.overruns,
+            "errors": self.errors,
+            "last_duration_ms": self.last_duration_ms,
+            "last_error": self.last_error,
+            "busy": bool(self.in_flight and not self.in_flight.done()),
+        }
+
+
+def port_key_for(config) -> str | None:
+    """
+    RTU slaves that share a serial line cannot be polled in parallel.
+    Returns a key identifying the shared medium (None for TCP).
+    """
+    if config.protocol == "MODBUS_RTU" and config.serial_port:
+        return f"serial:{config.serial_port}"
+    return None
+
+
+@dataclass
+class PlcScheduler:
+    """
+    load_configs() -> list of PLCConfig-like objects (id, name, protocol,
+    serial_port, scan_interval_sec).
+    scan(plc_id, classes) polls the tags of the given scan classes of a PLC; it
+    must manage its own DB session.
+    class_intervals(config) -> {scan class: interval seconds} for the classes a
+    PLC has tags in; without it every PLC is a single normal class.
+    """
+
+    load_configs: Callable[[], list]
+    scan: Callable[[str, frozenset], None]
+    class_intervals: Callable[[Any], dict[str, float]] | None = None
+    max_workers: int = 8
+    clock: Callable[[], float] = time.monotonic
+    schedules: dict[str, PlcSchedule] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, self.max_workers), thread_name_prefix="plc-scan"
+        )
+        self._port_locks: dict[str, threading.Lock] = {}
+        self._stop = threading.Event()
+        # Set when a scan finishes or on stop(), so run_forever re-ticks at once
+        self._wake = threading.Event()
+        self._next_refresh = 0.0
+
+    # ------------------------------------------------------------------
+    # Config sync
+    # ------------------------------------------------------------------
+    def refresh(self) -> None:
+        configs = self.load_configs()
+        now = self.clock()
+        seen = set()
+        for cfg in configs:
+            seen.add(cfg.id)
+            if self.class_intervals is not None:
+                intervals = self.class_intervals(cfg)
+            else:
+                intervals = {SCAN_NORMAL: cfg.scan_interval_sec or 5}
+            intervals = {
+                cls: max(MIN_INTERVAL_SEC, float(interval))
+                for cls, interval in (intervals or {SCAN_NORMAL: 5}).items()
+            }
+            sched = self.schedules.get(cfg.id)
+            if sched is None:
+                sched = self.schedules[cfg.id] = PlcSchedule(
+                    plc_id=cfg.id, name=cfg.name, interval_s=0.0
+                )
+            sched.name = cfg.name
+            sched.port_key = port_key_for(cfg)
+            sched.set_classes(intervals, now)
+
+        for plc_id in list(self.schedules):
+            if plc_id not in seen:
+                self.schedules.pop(plc_id)
+
+    # ------------------------------------------------------------------
+    # Dispatch
+    # ------------------------------------------------------------------
+    def _run_scan(self, sched: PlcSchedule, classes: frozenset) -> None:
+        lock = None
+        if sched.port_key:
+            lock = self._port_locks.setdefault(sched.port_key, threading.Lock())
+        started = self.clock()
+        deadline = min(sched.class_intervals.get(cls, sched.interval_s) for cls in classes)
+        try:
+            if lock:
+                with lock:
+                    self.scan(sched.plc_id, classes)
+            else:
+                self.scan(sched.plc_id, classes)
+            sched.last_error = None
+        except Exception as e:
+            sched.errors += 1
+            sched.last_error = str(e)[:300]
+            logger.error(f"Scan failed for PLC {sched.name}: {e}")
+        finally:
+            duration = self.clock() - started
+            sched.scans += 1
+            for cls in classes:
+                sched.class_scans[cls] = sched.class_scans.get(cls, 0) + 1
+            sched.last_duration_ms = round(duration * 1000, 1)
+            if duration > deadline:
+                sched.overruns += 1
+                logger.warning(
+                    f"PLC {sched.name} scan took {duration:.2f}s (deadline {deadline:.2f}s)"
+                )
+
+    def tick(self) -> float:
+        """
+        Dispatches every PLC whose deadline has passed.
+        Returns seconds until the next deadline (for sleeping).
+        """
+        now = self.clock()
+        if now >= self._next_refresh:
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"PLC config refresh failed: {e}")
+            self._next_refresh = now + CONFIG_REFRESH_SEC
+
+        for sched in self.schedules.values():
+            classes = sched.due_classes(now)
+            if not classes:
+                continue
+
+            # Whole intervals that elapsed since a deadline are lost slots
+            lags = {
+                cls: max(0, int((now - sched.class_due[cls]) // sched.class_intervals[cls]))
+                for cls in classes
+            }
+
+            if sched.in_flight is not None and not sched.in_flight.done():
+                # Deadlines stay put so these classes ride on the next scan
+                overdue = max(lags[cls] + 1 for cls in classes if sched.class_due[cls] <= now)
+                if overdue > sched.skipped:
+                    sched.missed += overdue - sched.skipped
+                    sched.skipped = overdue
+                    logger.warning(
+                        f"PLC {sched.name} missed scan: previous scan still running "
+                        f"(missed total={sched.missed})"
+                    )
+                continue
+
+            # Deadlines advance from themselves, so a class pulled in early keeps its rate
+            for cls in classes:
+                interval = sched.class_intervals[cls]
+                sched.class_due[cls] += (lags[cls] + 1) * interval
+            behind = max(lags.values()) - sched.skipped
+            sched.skipped = 0
+            if behind > 0:
+                sched.missed += behind
+                logger.warning(f"PLC {sched.name} fell behind by {behind} scan(s)")
+
+            sched.last_started_at = now
+            sched.in_flight = self._executor.submit(self._run_scan, sched, frozenset(classes))
+            sched.in_flight.add_done_callback(lambda _f: self._wake.set())
+
+        # A busy PLC that is already due is woken by its scan finishing
+        next_due = min(
+            (
+                s.next_due
+                for s in self.schedules.values()
+                if s.next_due > now or s.in_flight is None or s.in_flight.done()
+            ),
+            default=now + 1.0,
+        )
+        return max(0.0, min(next_due, self._next_refresh) - self.clock())
+
+    def run_forever(self) -> None:
+        while not self._stop.is_set():
+            wait = self.tick()
+            self._wake.wait(min(max(wait, 0.01), 1.0))
+            self._wake.clear()
+
+    def wait_stopped(self, timeout: float) -> bool:
+        """Sleeps up to timeout; True once stop() has been called."""
+        return self._stop.wait(timeout)
+
+    def stop(self, wait: bool = False) -> None:
+        self._stop.set()
+        self._wake.set()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def stats(self) -> list[dict[str, Any]]:
+        return [s.snapshot() for s in list(self.schedules.values())]
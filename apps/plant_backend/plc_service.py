@@ -1,14 +1,34 @@
 import logging
+import threading
 import time
 import traceback
 from datetime import datetime
 
 from pymodbus.client import ModbusSerialClient, ModbusTcpClient
-from sqlalchemy import String, cast, select
-
-from apps.plant_backend import services
-from apps.plant_backend.models import PLCConfig, PLCTag, StopQueue
-from common_core.db import PlantSessionLocal
+from sqlalchemy import update
+from sqlalchemy.exc import SQLAlchemyError
+
+from apps.plant_backend import plc_triggers, services
+from apps.plant_backend.models import StopQueue
+from apps.plant_backend.plc_blocks import decode_tag, plan_blocks, register_width
+from apps.plant_backend.plc_cache import CACHE
+from apps.plant_backend.plc_channel import ChannelReader, LiveValueChannel
+from apps.plant_backend.plc_connections import PlcConnectionPool
+from apps.plant_backend.plc_historian import HISTORIAN
+from apps.plant_backend.plc_journal import JOURNAL
+from apps.plant_backend.plc_recording import PlcRecorder
+from apps.plant_backend.plc_scheduler import (
+    SCAN_FAST,
+    SCAN_NORMAL,
+    SCAN_SLOW,
+    PlcScheduler,
+    scan_class_of,
+)
+from apps.plant_backend.plc_triggers import LIVE_CONTEXT, OPEN_STOPS, TRIGGERS
+from apps.plant_backend.runtime import plc_bus
+from common_core.config import settings
+from common_core.db import PlantSessionLocal, plant_engine
+from common_core.leader_lock import LeaderLock
 
 # Basic logging setup
 logging.basicConfig(level=logging.INFO)
@@ -17,208 +37,434 @@ logger = logging.getLogger("plc_service")
 # Global cache for latest values: {plc_id: {tag_name: value}}
 LATEST_VALUES = {}
 
+# Shared channel to API workers; set on the leader when values must leave this process
+CHANNEL: LiveValueChannel | None = None
+# Applies channel updates while this process is not the polling leader
+READER: ChannelReader | None = None
+# Raw scan recorder for tools/plc_replay.py (PLC_RECORD_PATH)
+RECORDER: PlcRecorder | None = None
+
+LEADER_LOCK_NAME = "assetiq_plc_poller"
+LEADER_CHECK_SEC = 5.0
+LEADER_RETRY_SEC = 10.0
+
 
 def get_client(config):
+    # Short timeout / single retry: a dead controller must not hold its worker
+    # for longer than roughly one scan interval.
+    timeout = settings.plc_timeout_sec
     if config.protocol == "MODBUS_TCP":
-        return ModbusTcpClient(config.ip_address, port=config.port or 502)
+        return ModbusTcpClient(
+            config.ip_address, port=config.port or 502, timeout=timeout, retries=1
+        )
     elif config.protocol == "MODBUS_RTU":
         return ModbusSerialClient(
-            port=config.serial_port, baudrate=config.baud_rate or 9600, framer="rtu"
+            port=config.serial_port,
+            baudrate=config.baud_rate or 9600,
+            framer="rtu",
+            timeout=timeout,
+            retries=1,
         )
     return None
 
 
-def read_tag_value(client, tag, slave_id):
-    try:
-        # Simplification: Assume Holding Registers for now.
-        # Ideally, we should support Coil/Input/Holding based on address range or config
-        # Here: Address 0-9999 = Output Coils (1), 10000-19999 = Input (2), 30000 = Input Reg (4), 40000 = Holding (3)
-        # For simplicity in this v1: We assume Holding Registers (40000 offset or just raw address)
-
-        # Read 1 register for FLOAT might need 2 registers, but let's assume BOOL/INT16 is 1 reg
-        count = 1
-        if tag.data_type == "FLOAT32":
-            count = 2
-
-        # Modbus address usually 0-indexed in pymodbus, but users might enter 1-indexed (e.g. 40001)
-        # We will assume user enters raw address 0-65535
+# Long-lived connections (one per PLCConfig.id)
+POOL = PlcConnectionPool(get_client)
 
-        # We will assume user enters raw address 0-65535
 
+def read_tag_value(client, tag, slave_id):
+    """Single-tag read (fallback when a block read is rejected by the PLC)."""
+    try:
+        # Assume Holding Registers, raw 0-based address 0-65535.
         # Pymodbus 3.11+ uses 'device_id' instead of 'slave' or 'unit'.
-        # We also need to retrieve 'count' as keyword argument
-        rr = client.read_holding_registers(tag.address, count=count, device_id=slave_id)
+        rr = client.read_holding_registers(
+            tag.address, count=register_width(tag.data_type), device_id=slave_id
+        )
 
         if rr.isError():
             logger.error(f"Error reading tag {tag.tag_name}: {rr}")
             return None
 
-        val = rr.registers[0]
-
-        # TODO: Handle Float/32-bit conversion if needed
-        # For now, just multiplier scaling
-        scaled_val = val * (tag.multiplier or 1.0)
-        return scaled_val
+        return decode_tag(tag, rr.registers, tag.address)
     except Exception as e:
         logger.error(f"Exception reading tag {tag.tag_name}: {e}")
         return None
 
 
-def process_plc(db, config):
-    client = get_client(config)
-    if not client:
-        return
-
-    if not client.connect():
-        logger.error(f"Failed to connect to PLC {config.name}")
-        return
-
-    try:
-        # Get all tags for this PLC
-        tags = db.execute(select(PLCTag).where(PLCTag.plc_id == config.id)).scalars().all()
-        tag_values = {}
+def read_tag_values(client, tags, slave_id) -> dict:
+    """
+    Reads all tags of a PLC using coalesced block reads.
+    Returns {tag_name: scaled_value}; tags that could not be read are omitted.
+    """
+    tag_values = {}
+    for block in plan_blocks(tags, max_gap=settings.plc_block_max_gap):
+        try:
+            rr = client.read_holding_registers(block.start, count=block.count, device_id=slave_id)
+        except Exception as e:
+            # Transport failure: per-tag retries would only multiply the timeout
+            logger.error(f"Exception reading block {block.start}+{block.count}: {e}")
+            continue
 
-        # 1. Read all tags
-        # logger.info(f"Found {len(tags)} tags for PLC {config.name}")
-        for tag in tags:
-            val = read_tag_value(client, tag, config.slave_id)
-            if val is not None:
-                tag_values[tag.tag_name] = val
+        if rr.isError():
+            logger.error(f"Error reading block {block.start}+{block.count}: {rr}")
+            if len(block.tags) > 1:
+                # The gap may cover an address the PLC rejects; fall back to per-tag reads
+                for tag in block.tags:
+                    val = read_tag_value(client, tag, slave_id)
+                    if val is not None:
+                        tag_values[tag.tag_name] = val
+            continue
+
+        for tag in block.tags:
+            val = decode_tag(tag, rr.registers, block.start)
             if val is not None:
                 tag_values[tag.tag_name] = val
-                # logger.debug(f"Tag {tag.tag_name}: {val}")
+    return tag_values
+
+
+def _transition(kind, config, tag, ts, value, values, stop_id=None) -> dict:
+    """
+    A stop open/close as written to the DB or, while it is unavailable, to the
+    journal. The key makes the write idempotent; an open's stop id follows from it.
+    """
+    key = f"plc:{tag.id}:{kind}:{int(ts * 1000)}"
+    return {
+        "key": key,
+        "kind": kind,
+        "ts": ts,
+        "plc_id": config.id,
+        "tag_id": tag.id,
+        "tag_name": tag.tag_name,
+        "asset_id": tag.asset_id,
+        "value": value,
+        "reason": tag.reason.render(values),
+        "live_values": values,
+        "stop_id": stop_id or services.stable_id("STOP", key),
+    }
+
+
+def apply_transition(db, entry: dict) -> None:
+    """Writes one trigger transition (live or replayed) at its original timestamp."""
+    occurred_at = datetime.utcfromtimestamp(entry["ts"])
+    if entry["kind"] == plc_triggers.OPEN:
+        services.open_stop(
+            db,
+            asset_id=entry["asset_id"],
+            reason=entry["reason"],
+            actor_user_id="plc_service",
+            actor_station_code=None,
+            request_id="plc_trigger",
+            extra_context={"trigger_tag_id": entry["tag_id"], "live_values": entry["live_values"]},
+            trigger_tag_id=entry["tag_id"],
+            idempotency_key=entry["key"],
+            occurred_at=occurred_at,
+        )
+    else:
+        services.resolve_stop(
+            db,
+            stop_id=entry["stop_id"],
+            resolution_text="Auto-cleared by PLC trigger reset",
+            actor_user_id="plc_service",
+            request_id="auto-close",
+            occurred_at=occurred_at,
+        )
 
-        # Update global cache
-        LATEST_VALUES[config.id] = tag_values
 
-        # 2. Check Triggers
+def process_plc(db, config, classes=None):
+    """Polls the tags of the given scan classes (all tags when classes is None)."""
+    client = POOL.acquire(config)
+    if not client:
+        return
+
+    try:
+        # Tags come from the versioned config cache (no per-scan query)
+        all_tags = CACHE.tags_for(config.id)
+        tags = [t for t in all_tags if classes is None or scan_class_of(t) in classes]
+
+        # 1. Read the due tags (every due class coalesced into the same block reads)
+        tag_values = read_tag_values(client, tags, config.slave_id)
+
+        # Update global cache, the short-term historian and SSE subscribers (changes only).
+        # Tags of classes not scanned now keep their last value; tags that failed to
+        # read this scan are dropped, as are tags no longer configured.
+        previous = LATEST_VALUES.get(config.id) or {}
+        scanned = {t.tag_name for t in tags}
+        now = time.time()
+        if RECORDER is not None:
+            RECORDER.record(config.id, tag_values, now, scanned)
+        merged = {
+            t.tag_name: previous[t.tag_name]
+            for t in all_tags
+            if t.tag_name in previous and t.tag_name not in scanned
+        }
+        merged.update(tag_values)
+        LATEST_VALUES[config.id] = merged
+        HISTORIAN.record(config.id, tag_values, ts=now)
+        changed = {k: v for k, v in tag_values.items() if previous.get(k) != v}
+        if changed:
+            plc_bus.publish(
+                {"type": "PLC_VALUES", "plc_id": config.id, "ts": now, "values": changed},
+                topic=config.id,
+            )
+            if CHANNEL is not None:
+                CHANNEL.publish(config.id, merged, ts=now)
+
+        # 2. Check Triggers (edge-triggered)
+        # The open stop per trigger tag (OPEN_STOPS) plus the debouncer timers are
+        # the trigger state; DB work happens only on a debounced transition, a flap,
+        # or when live values move beyond their deadband. Index changes are applied
+        # only after the transaction commits (or the transition was journaled).
+        opened: dict[str, str] = {}
+        closed: list[tuple[str, str]] = []
+        transitions: list[dict] = []
+        refreshes: list[tuple[str, dict, str]] = []
         for tag in tags:
-            if tag.is_stop_trigger and tag.trigger_value is not None:
-                curr_val = tag_values.get(tag.tag_name)
-
-                # Check for active match (Simple equality/truthiness for now)
-                # If trigger val is 1, and curr val is 1 => STOP
-                is_active = curr_val == tag.trigger_value
-
-                # Find if stop is already open for this specific trigger
-                # We identify it by existing open stop for this asset with this specific reason template??
-                # Ideally we need a better correlation, maybe add 'trigger_tag_id' to StopQueue?
-                # For now, we query open stops for asset and see if reason matches partially or we store context
-
-                # We need to construct the reason string with variable sub
-                reason_text = tag.stop_reason_template or f"PLC Trigger: {tag.tag_name}"
-
-                # Substitute values
-                # Substitute values
-                for t_name, t_val in tag_values.items():
-                    # Format value: remove decimals if whole number
-                    display_val = str(t_val)
-                    if isinstance(t_val, float) and t_val.is_integer():
-                        display_val = str(int(t_val))
-
-                    # Try $NAME$ first (explicit delimiter)
-                    placeholder_explicit = f"${t_name}$"
-                    if placeholder_explicit in reason_text:
-                        reason_text = reason_text.replace(placeholder_explicit, display_val)
-
-                    # Try $NAME (simple prefix)
-                    placeholder_simple = f"${t_name}"
-                    if placeholder_simple in reason_text:
-                        reason_text = reason_text.replace(placeholder_simple, display_val)
-
-                existing_stop = db.execute(
-                    select(StopQueue).where(
-                        StopQueue.asset_id == tag.asset_id,
-                        StopQueue.is_open.is_(True),
-                        # We use live_context to confirm this is THE stop from this trigger
-                        # JSON lookup needs casting to compare with string tag.id
-                        # Using cast(..., String) or just checking logic in python?
-                        # Note: trigger_tag_id in json is string.
-                        cast(StopQueue.live_context_json["trigger_tag_id"], String)
-                        == f'"{tag.id}"',
-                    )
-                ).scalar_one_or_none()
-
-                if is_active:
-                    if not existing_stop:
-                        logger.info(f"Opening Stop for {tag.tag_name} on {tag.asset_id}")
-                        services.open_stop(
-                            db,
-                            asset_id=tag.asset_id,
-                            reason=reason_text,
-                            actor_user_id="plc_service",
-                            actor_station_code=None,
-                            request_id="plc_trigger",
-                            extra_context={"trigger_tag_id": tag.id, "live_values": tag_values},
-                        )
-                    else:
-                        # Update live values
-                        existing_stop.live_context_json = {
-                            "trigger_tag_id": tag.id,
-                            "live_values": tag_values,
-                            "last_updated": datetime.utcnow().isoformat(),
-                        }
-                        # Update reason text dynamically
-                        existing_stop.reason = reason_text
-
-                else:
-                    if existing_stop:
-                        logger.info(f"Closing Stop for {tag.tag_name} on {tag.asset_id}")
-                        services.resolve_stop(
-                            db,
-                            stop_id=existing_stop.id,
-                            resolution_text="Auto-cleared by PLC trigger reset",
-                            actor_user_id="plc_service",
-                            request_id="auto-close",
-                        )
-
-        db.commit()
+            if not tag.is_stop_trigger or tag.trigger_value is None:
+                continue
+            curr_val = tag_values.get(tag.tag_name)
+            if curr_val is None:
+                # Unread this scan: not a reset, keep the current state
+                continue
+
+            # Simple equality: if trigger val is 1 and curr val is 1 => STOP
+            is_active = curr_val == tag.trigger_value
+            existing_stop_id = OPEN_STOPS.get(tag.id)
+            action = TRIGGERS.evaluate(tag, is_active, existing_stop_id is not None)
+
+            if action == plc_triggers.OPEN:
+                logger.info(f"Opening Stop for {tag.tag_name} on {tag.asset_id}")
+                # Reason text from the template compiled when the cache loaded
+                entry = _transition(plc_triggers.OPEN, config, tag, now, curr_val, merged)
+                transitions.append(entry)
+                opened[tag.id] = entry["stop_id"]
+            elif action == plc_triggers.CLOSE:
+                logger.info(f"Closing Stop for {tag.tag_name} on {tag.asset_id}")
+                entry = _transition(
+                    plc_triggers.CLOSE, config, tag, now, curr_val, merged, existing_stop_id
+                )
+                transitions.append(entry)
+                closed.append((tag.id, existing_stop_id))
+            elif existing_stop_id and is_active:
+                # A flap is merged into the open stop; record it right away
+                flap_count = TRIGGERS.state(tag.id).flap_count
+                if action == plc_triggers.FLAP or LIVE_CONTEXT.should_write(
+                    existing_stop_id, all_tags, merged
+                ):
+                    context = {
+                        "trigger_tag_id": tag.id,
+                        "live_values": merged,
+                        "flap_count": flap_count,
+                        "last_updated": datetime.utcnow().isoformat(),
+                    }
+                    refreshes.append((existing_stop_id, context, tag.reason.render(merged)))
+
+        journaled = False
+        if transitions and JOURNAL.pending:
+            # Earlier transitions are still waiting for the DB: keep them in order
+            JOURNAL.append(transitions)
+            journaled = True
+        try:
+            if not journaled:
+                for entry in transitions:
+                    apply_transition(db, entry)
+            for stop_id, context, reason in refreshes:
+                db.execute(
+                    update(StopQueue)
+                    .where(StopQueue.id == stop_id, StopQueue.is_open.is_(True))
+                    .values(live_context_json=context, reason=reason)
+                )
+            if refreshes or (transitions and not journaled):
+                db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            if not transitions:
+                raise
+            if not journaled:
+                logger.error(
+                    f"Plant DB unavailable, journaling {len(transitions)} PLC transition(s): {e}"
+                )
+                JOURNAL.append(transitions)
+            # Live-context refreshes are best effort; the throttle retries them
+            refreshes = []
+
+        for tag_id, stop_id in opened.items():
+            OPEN_STOPS.set(tag_id, stop_id)
+            TRIGGERS.opened(tag_id)
+            LIVE_CONTEXT.mark_written(stop_id, merged)
+        for stop_id, _context, _reason in refreshes:
+            LIVE_CONTEXT.mark_written(stop_id, merged)
+        for tag_id, stop_id in closed:
+            OPEN_STOPS.discard(tag_id)
+            TRIGGERS.closed(tag_id)
+            LIVE_CONTEXT.forget(stop_id)
 
     except Exception as e:
+        db.rollback()
         logger.error(f"Error processing PLC {config.name}: {e}")
         traceback.print_exc()
     finally:
-        client.close()
+        # Keep the connection for the next scan unless the transport dropped
+        if getattr(client, "connected", False):
+            POOL.report_success(config.id)
+        else:
+            POOL.report_failure(config.id, "connection lost during scan")
+
+
+def scan_class_intervals(config) -> dict[str, float]:
+    """Scan classes in use on a PLC and their intervals (normal = scan_interval_sec)."""
+    intervals = {
+        SCAN_FAST: settings.plc_scan_fast_ms / 1000,
+        SCAN_NORMAL: config.scan_interval_sec or 5,
+        SCAN_SLOW: settings.plc_scan_slow_sec,
+    }
+    used = {scan_class_of(t) for t in CACHE.tags_for(config.id)} or {SCAN_NORMAL}
+    return {cls: intervals[cls] for cls in used}
+
+
+def scan_plc(plc_id: str, classes=None) -> None:
+    """One poll of one PLC. Runs on a scheduler worker with its own session."""
+    config = CACHE.get_config(plc_id)
+    if config is None or not config.is_active:
+        return
+    if not JOURNAL.pending:
+        # The DB does not know about journaled transitions yet
+        OPEN_STOPS.maybe_reconcile()
+    db = PlantSessionLocal()
+    try:
+        process_plc(db, config, classes)
+    finally:
+        db.close()
 
 
-import threading
+# Active scheduler (exposed for /plc/scan-stats)
+SCHEDULER: PlcScheduler | None = None
+
+
+def _watch_leadership(scheduler: PlcScheduler, lock: LeaderLock | None) -> None:
+    """Stops the scheduler once leadership is lost; publishes scan stats meanwhile."""
+    while not scheduler.wait_stopped(LEADER_CHECK_SEC):
+        if lock is not None and not lock.still_held():
+            logger.error("PLC poller lost leadership, stopping scans")
+            scheduler.stop()
+            return
+        if CHANNEL is not None:
+            CHANNEL.publish_stats(scheduler.stats(), POOL.stats())
+
+
+def replay_journal() -> int:
+    """Applies journaled transitions to the DB; the rest stays queued on failure."""
+    try:
+        return JOURNAL.replay(PlantSessionLocal, apply_transition)
+    except Exception as e:
+        logger.error(f"PLC journal replay failed: {e}")
+        return 0
 
 
-def run_loop():
+def _replay_journal_loop(scheduler: PlcScheduler) -> None:
+    while not scheduler.wait_stopped(settings.plc_journal_retry_sec):
+        if JOURNAL.pending:
+            replay_journal()
+
+
+def _overlay_journal() -> None:
+    # Transitions journaled before a restart are part of the trigger state
+    for entry in JOURNAL.entries():
+        if entry["kind"] == plc_triggers.OPEN:
+            OPEN_STOPS.set(entry["tag_id"], entry["stop_id"])
+        else:
+            OPEN_STOPS.discard(entry["tag_id"])
+
+
+def run_loop(lock: LeaderLock | None = None):
+    global SCHEDULER, RECORDER
     logger.info("PLC Service Started")
-    while True:
-        # DB Session per loop or long lived?
-        # Better per loop or pass a session factory?
-        # The original code used PlantSessionLocal() inside run_loop, so it's fine.
-        # But wait, run_loop() in my view_file output used 'PlantSessionLocal' variable which was imported.
-        # It didn't take an argument.
+    if settings.plc_record_path and RECORDER is None:
+        RECORDER = PlcRecorder(settings.plc_record_path, CACHE)
+    replay_journal()
+    try:
+        logger.info(f"Open PLC stops indexed: {OPEN_STOPS.rebuild()}")
+    except Exception as e:
+        logger.error(f"Open stop index rebuild failed: {e}")
+    _overlay_journal()
+    SCHEDULER = PlcScheduler(
+        load_configs=CACHE.active_configs,
+        scan=scan_plc,
+        class_intervals=scan_class_intervals,
+        max_workers=settings.plc_poll_workers,
+    )
+    if lock is not None or CHANNEL is not None:
+        threading.Thread(
+            target=_watch_leadership, args=(SCHEDULER, lock), name="plc-leader-watch", daemon=True
+        ).start()
+    threading.Thread(
+        target=_replay_journal_loop, args=(SCHEDULER,), name="plc-journal-replay", daemon=True
+    ).start()
+    try:
+        SCHEDULER.run_forever()
+    finally:
+        # Let in-flight scans finish before another process may take over
+        SCHEDULER.stop(wait=True)
+        POOL.close_all()
+        HISTORIAN.flush_all()
+        if RECORDER is not None:
+            RECORDER.close()
+            RECORDER = None
+
 
-        # However, in main.py I passed 'PlantSessionLocal' as arg: plc_service.start_polling_thread(PlantSessionLocal)
-        # So I should accept it or ignore it if I import it directly.
-        # The file already imports 'PlantSessionLocal'.
+def leader_lock() -> LeaderLock:
+    lock_path = settings.plc_leader_lock_path or f"{settings.report_vault_root}/plc_poller.lock"
+    return LeaderLock(LEADER_LOCK_NAME, engine=plant_engine, lock_path=lock_path)
 
-        db = PlantSessionLocal()
+
+def run_as_leader(lock: LeaderLock | None = None, channel: LiveValueChannel | None = None):
+    """
+    Polls only while holding the leader lock, so several API workers or poller
+    processes never open duplicate stops. Blocks forever: a follower retries
+    every LEADER_RETRY_SEC and a leader that loses its lock goes back to waiting.
+    """
+    global CHANNEL
+    if channel is not None:
+        CHANNEL = channel
+    lock = lock or leader_lock()
+    while True:
         try:
-            configs = (
-                db.execute(select(PLCConfig).where(PLCConfig.is_active.is_(True))).scalars().all()
-            )
-            for config in configs:
-                process_plc(db, config)
+            acquired = lock.try_acquire()
         except Exception as e:
-            logger.error(f"Main Loop Error: {e}")
-        finally:
-            db.close()
-
-        time.sleep(5)
+            logger.error(f"PLC leader election failed: {e}")
+            acquired = False
+        if acquired:
+            logger.info("PLC poller is the leader")
+            if READER is not None:
+                READER.enabled = False
+            try:
+                run_loop(lock)
+            except Exception as e:
+                logger.error(f"PLC poller stopped: {e}")
+            finally:
+                lock.release()
+                if READER is not None:
+                    READER.enabled = True
+        time.sleep(LEADER_RETRY_SEC)
+
+
+def start_channel_reader() -> ChannelReader:
+    """Keeps this API worker's LATEST_VALUES / SSE stream fed from the shared channel."""
+    global READER
+    READER = ChannelReader(
+        LiveValueChannel(), LATEST_VALUES, plc_bus, poll_sec=settings.plc_channel_poll_sec
+    )
+    threading.Thread(target=READER.run_forever, name="plc-channel-reader", daemon=True).start()
+    return READER
 
 
 def start_polling_thread(session_factory_ignored=None):
     """
-    Starts the PLC polling in a background thread.
+    Starts the PLC polling (behind leader election) in a background thread.
     session_factory_ignored is kept for compatibility if passed,
     but we use the imported PlantSessionLocal.
     """
-    t = threading.Thread(target=run_loop, daemon=True)
+    channel = LiveValueChannel() if settings.plc_live_channel else None
+    t = threading.Thread(target=run_as_leader, kwargs={"channel": channel}, daemon=True)
     t.start()
     return t
 
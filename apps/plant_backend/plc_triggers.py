@@ -0,0 +1,260 @@
+"""
+Trigger-side state for the PLC poller.
+
+OpenStopIndex maps a stop-trigger PLCTag.id to the id of its open StopQueue row.
+It is rebuilt from the indexed stop_queue.trigger_tag_id column at startup and
+reconciled periodically (stops can also be resolved from the UI), so a scan in
+which no trigger changes state needs no DB lookup at all.
+
+LiveContextThrottle suppresses live-context rewrites of open stops unless a
+value moved beyond its tag's deadband, at a capped rate.
+
+TriggerDebouncer applies on/off delays, a minimum stop duration and flap
+merging before the poller opens or resolves a stop.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from sqlalchemy import select
+
+from apps.plant_backend.models import StopQueue
+from common_core.config import settings
+
+logger = logging.getLogger("plc_service")
+
+
+class OpenStopIndex:
+    def __init__(
+        self,
+        session_factory: Callable | None = None,
+        reconcile_interval_sec: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._session_factory = session_factory
+        self._interval = reconcile_interval_sec
+        self._clock = clock
+        self._by_tag: dict[str, str] = {}
+        # Tags changed by scans while a rebuild query is in flight
+        self._dirty: set[str] | None = None
+        self._lock = threading.Lock()
+        self._next_reconcile = 0.0
+
+    def _sessions(self):
+        if self._session_factory is None:
+            from common_core.db import PlantSessionLocal
+
+            self._session_factory = PlantSessionLocal
+        return self._session_factory()
+
+    def rebuild(self, db=None) -> int:
+        own = db is None
+        if own:
+            db = self._sessions()
+        with self._lock:
+            self._dirty = set()
+        try:
+            rows = db.execute(
+                select(StopQueue.trigger_tag_id, StopQueue.id).where(
+                    StopQueue.is_open.is_(True), StopQueue.trigger_tag_id.isnot(None)
+                )
+            ).all()
+        finally:
+            if own:
+                db.close()
+        with self._lock:
+            fresh = {tag_id: stop_id for tag_id, stop_id in rows}
+            # Changes committed by scans after the query started win over the query
+            for tag_id in self._dirty or ():
+                if tag_id in self._by_tag:
+                    fresh[tag_id] = self._by_tag[tag_id]
+                else:
+                    fresh.pop(tag_id, None)
+            self._by_tag = fresh
+            self._dirty = None
+            self._next_reconcile = self._clock() + self._interval
+        return len(fresh)
+
+    def maybe_reconcile(self) -> None:
+        if self._clock() < self._next_reconcile:
+            return
+        with self._lock:
+            if self._clock() < self._next_reconcile:
+                return
+            # Claim the slot so concurrent scans do not all rebuild
+            self._next_reconcile = self._clock() + self._interval
+        try:
+            self.rebuild()
+        except Exception as e:
+            logger.error(f"Open stop index reconcile failed: {e}")
+
+    def get(self, tag_id: str) -> str | None:
+        return self._by_tag.get(tag_id)
+
+    def set(self, tag_id: str, stop_id: str) -> None:
+        with self._lock:
+            self._by_tag[tag_id] = stop_id
+            if self._dirty is not None:
+                self._dirty.add(tag_id)
+
+    def discard(self, tag_id: str) -> None:
+        with self._lock:
+            self._by_tag.pop(tag_id, None)
+            if self._dirty is not None:
+                self._dirty.add(tag_id)
+
+    def __len__(self) -> int:
+        return len(self._by_tag)
+
+
+OPEN_STOPS = OpenStopIndex()
+
+
+def exceeds_deadband(tag, old, new) -> bool:
+    """
+    True if a tag value moved far enough to be worth persisting.
+    deadband_abs is in engineering units, deadband_pct is relative to the old value.
+    Tags without a deadband report any change.
+    """
+    if old is None or new is None:
+        return old != new
+    try:
+        delta = abs(float(new) - float(old))
+    except (TypeError, ValueError):
+        return old != new
+    db_abs = getattr(tag, "deadband_abs", None)
+    db_pct = getattr(tag, "deadband_pct", None)
+    if db_abs is None and db_pct is None:
+        return delta > 0
+    limit = 0.0
+    if db_abs is not None:
+        limit = max(limit, float(db_abs))
+    if db_pct is not None:
+        limit = max(limit, abs(float(old)) * float(db_pct) / 100.0)
+    return delta > limit
+
+
+class LiveContextThrottle:
+    """
+    Decides when an open stop's live_context_json / reason is rewritten.
+    A write happens only when some tag moved beyond its deadband since the last
+    write, and never more often than min_interval_sec per stop.
+    """
+
+    def __init__(self, min_interval_sec: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self._min_interval = min_interval_sec
+        self._clock = clock
+        self._written: dict[str, tuple[dict, float]] = {}
+
+    def should_write(self, stop_id: str, tags, values: dict) -> bool:
+        prev = self._written.get(stop_id)
+        if prev is None:
+            # Unknown (e.g. stop opened before a restart): write once, then track
+            return True
+        prev_values, written_at = prev
+        if self._clock() - written_at < self._min_interval:
+            return False
+        return any(
+            exceeds_deadband(t, prev_values.get(t.tag_name), values.get(t.tag_name)) for t in tags
+        )
+
+    def mark_written(self, stop_id: str, values: dict) -> None:
+        self._written[stop_id] = (dict(values), self._clock())
+
+    def forget(self, stop_id: str) -> None:
+        self._written.pop(stop_id, None)
+
+
+LIVE_CONTEXT = LiveContextThrottle(settings.plc_live_context_min_interval_sec)
+
+
+# Trigger state machine actions
+OPEN = "open"
+CLOSE = "close"
+FLAP = "flap"
+
+
+@dataclass
+class TriggerState:
+    active_since: float | None = None
+    inactive_since: float | None = None
+    opened_at: float | None = None
+    flap_count: int = 0
+
+
+class TriggerDebouncer:
+    """
+    Per-tag hysteresis for stop triggers.
+
+    A stop opens once the trigger has been active for on_delay_sec and resolves
+    once it has been inactive for off_delay_sec (falling back to the
+    PLC_TRIGGER_OFF_DELAY_SEC default) and the stop is at least min_stop_sec
+    old. A trigger that re-activates while its stop is waiting to close is a
+    flap: it is counted on the open stop and the off delay grows to
+    flap_window_sec, so a chattering sensor produces one stop instead of many.
+    """
+
+    def __init__(
+        self,
+        default_off_delay_sec: float = 2.0,
+        flap_window_sec: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._default_off_delay = default_off_delay_sec
+        self._flap_window = flap_window_sec
+        self._clock = clock
+        self._states: dict[str, TriggerState] = {}
+
+    def state(self, tag_id: str) -> TriggerState:
+        st = self._states.get(tag_id)
+        if st is None:
+            st = self._states[tag_id] = TriggerState()
+        return st
+
+    def evaluate(self, tag, active: bool, stop_open: bool) -> str | None:
+        now = self._clock()
+        st = self.state(tag.id)
+        if active:
+            was_closing = st.inactive_since is not None
+            st.inactive_since = None
+            if st.active_since is None:
+                st.active_since = now
+            if stop_open:
+                if was_closing:
+                    st.flap_count += 1
+                    return FLAP
+                return None
+            if now - st.active_since >= (getattr(tag, "on_delay_sec", None) or 0):
+                return OPEN
+            return None
+
+        st.active_since = None
+        if not stop_open:
+            st.inactive_since = None
+            return None
+        if st.inactive_since is None:
+            st.inactive_since = now
+        off_delay = getattr(tag, "off_delay_sec", None)
+        hold = self._default_off_delay if off_delay is None else off_delay
+        if st.flap_count:
+            hold = max(hold, self._flap_window)
+        if now - st.inactive_since < hold:
+            return None
+        min_stop = getattr(tag, "min_stop_sec", None) or 0
+        if st.opened_at is not None and now - st.opened_at < min_stop:
+            return None
+        return CLOSE
+
+    def opened(self, tag_id: str) -> None:
+        self._states[tag_id] = TriggerState(active_since=self._clock(), opened_at=self._clock())
+
+    def closed(self, tag_id: str) -> None:
+        self._states.pop(tag_id, None)
+
+
+TRIGGERS = TriggerDebouncer(settings.plc_trigger_off_delay_sec, settings.plc_flap_window_sec)
@@ -1,19 +1,26 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
-from datetime import datetime
+from datetime import UTC, datetime
 
 from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
 
-from apps.plant_backend.models import IngestDedup
+from apps.plant_backend import ingest_dedup
 from apps.plant_backend.services import open_stop
+from common_core.config import settings
 from common_core.db import PlantSessionLocal
 
 router = APIRouter(prefix="/ingest", tags=["ingest"])
 log = logging.getLogger("assetiq.ingest")
 
+STOP_EVENT_TYPES = ("PLC_FAULT", "TECH_STOP")
+
 
 class IngestEvent(BaseModel):
     event_type: str = Field(min_length=1, max_length=64)
@@ -26,23 +33,15 @@ class IngestEvent(BaseModel):
 
 @router.post("/event")
 def ingest_event(body: IngestEvent, request: Request):
+    key = (body.source_id, body.event_id)
     db = PlantSessionLocal()
     try:
-        exists = db.execute(
-            select(IngestDedup).where(
-                IngestDedup.source_id == body.source_id, IngestDedup.event_id == body.event_id
-            )
-        ).scalar_one_or_none()
-        if exists:
+        if not ingest_dedup.claim(db, [key]):
+            ingest_dedup.SEEN.remember([key])
             return {"ok": True, "dedup": True}
 
-        db.add(
-            IngestDedup(
-                source_id=body.source_id, event_id=body.event_id, created_at_utc=datetime.utcnow()
-            )
-        )
-
-        if body.event_type in ("PLC_FAULT", "TECH_STOP"):
+        published = None
+        if body.event_type in STOP_EVENT_TYPES:
             res = open_stop(
                 db,
                 body.asset_id,
@@ -51,22 +50,241 @@ def ingest_event(body: IngestEvent, request: Request):
                 body.source_id,
                 getattr(request.state, "request_id", None),
             )
-            from apps.plant_backend.runtime import sse_bus
-
-            sse_bus.publish(
-                {
-                    "type": "STOP_OPEN",
-                    "stop_id": res["stop_id"],
-                    "asset_id": body.asset_id,
-                    "reason": body.reason,
-                }
-            )
+            published = {
+                "type": "STOP_OPEN",
+                "stop_id": res["stop_id"],
+                "asset_id": body.asset_id,
+                "reason": body.reason,
+            }
 
         db.commit()
-        return {"ok": True, "dedup": False}
     except Exception as e:
         db.rollback()
         log.exception("ingest_failed")
         raise HTTPException(status_code=400, detail="INGEST_FAILED") from e
     finally:
         db.close()
+
+    ingest_dedup.SEEN.remember([key])
+    if published:
+        from apps.plant_backend.runtime import sse_bus
+
+        sse_bus.publish(published)
+    return {"ok": True, "dedup": False}
+
+
+def _occurred_at(value: str) -> datetime | None:
+    """Naive UTC time of a buffered event (None = now, also for times in the future)."""
+    try:
+        ts = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(UTC).replace(tzinfo=None)
+    return ts if ts < datetime.utcnow() else None
+
+
+def ingest_batch(db, events: list[IngestEvent], request_id: str | None = None):
+    """
+    Applies a batch in the caller's transaction: one dedup statement claims all
+    keys, stops are added to the session and flushed once at commit.
+    Returns (per-event results, SSE messages to publish after the commit).
+    """
+    new_keys = ingest_dedup.claim(db, [(e.source_id, e.event_id) for e in events])
+
+    results = []
+    published = []
+    for i, e in enumerate(events):
+        key = (e.source_id, e.event_id)
+        if key not in new_keys:
+            results.append({"index": i, "event_id": e.event_id, "status": "duplicate"})
+            continue
+        new_keys.discard(key)  # a repeat later in the batch is a duplicate
+
+        if e.event_type not in STOP_EVENT_TYPES:
+            results.append({"index": i, "event_id": e.event_id, "status": "accepted"})
+            continue
+        res = open_stop(
+            db,
+            e.asset_id,
+            e.reason or e.event_type,
+            None,
+            e.source_id,
+            request_id,
+            occurred_at=_occurred_at(e.occurred_at_utc),
+        )
+        results.append(
+            {"index": i, "event_id": e.event_id, "status": "stop_opened", "stop_id": res["stop_id"]}
+        )
+        published.append(
+            {
+                "type": "STOP_OPEN",
+                "stop_id": res["stop_id"],
+                "asset_id": e.asset_id,
+                "reason": e.reason,
+            }
+        )
+    return results, published
+
+
+def commit_batch(events: list[IngestEvent], request_id: str | None = None) -> list[dict]:
+    """Applies and commits one batch in its own session, then publishes its stops."""
+    db = PlantSessionLocal()
+    try:
+        results, published = ingest_batch(db, events, request_id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    ingest_dedup.SEEN.remember((e.source_id, e.event_id) for e in events)
+    from apps.plant_backend.runtime import sse_bus
+
+    for msg in published:
+        sse_bus.publish(msg)
+    return results
+
+
+@router.post("/events")
+def ingest_events(body: list[IngestEvent], request: Request):
+    """
+    Batch form of /ingest/event for gateways draining a buffer: up to
+    INGEST_BATCH_MAX_EVENTS events, committed together. Replaying a batch after
+    an unknown outcome is safe; already-seen events come back as "duplicate".
+    """
+    if not body:
+        return {"ok": True, "results": []}
+    if len(body) > settings.ingest_batch_max_events:
+        raise HTTPException(status_code=413, detail="BATCH_TOO_LARGE")
+
+    try:
+        results = commit_batch(body, getattr(request.state, "request_id", None))
+    except Exception as e:
+        log.exception("ingest_batch_failed")
+        raise HTTPException(status_code=400, detail="INGEST_FAILED") from e
+    return {"ok": True, "results": results}
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that leaves `receive` to the body generator, so the
+    request body can still be read while the response streams. (The stock
+    class listens for disconnects on `receive` under ASGI < 2.4, which would
+    swallow request chunks.)
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError as e:
+            raise ClientDisconnect() from e
+
+
+async def _pump(request: Request, queue: asyncio.Queue) -> None:
+    # Reads the body on its own task: a timed-out queue.get() in the consumer
+    # must not cancel the request stream itself. The small queue bounds memory.
+    try:
+        async for chunk in request.stream():
+            if chunk:
+                await queue.put(chunk)
+    except ClientDisconnect:
+        pass
+    finally:
+        await queue.put(None)
+
+
+def _ack(line: dict) -> bytes:
+    return (json.dumps(line, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+@router.post("/stream")
+async def ingest_stream(request: Request):
+    """
+    Long-lived ingest for high-rate sources: the body is NDJSON (one IngestEvent
+    per line, sent with chunked encoding), the response is NDJSON with one ack
+    per committed batch:
+
+        {"batch": 1, "ok": true, "results": [{"line": 1, "event_id": ..., "status": ...}]}
+        {"batch": 2, "ok": false, "error": "INGEST_FAILED", "lines": [..]}   (resend them)
+        {"line": 7, "ok": false, "error": "INVALID_EVENT"}
+        {"done": true, "events": 1234, "batches": 9}
+
+    Events are committed every INGEST_STREAM_BATCH_EVENTS events or
+    INGEST_STREAM_BATCH_MS after the first uncommitted one, whichever is first.
+    """
+    request_id = getattr(request.state, "request_id", None)
+    max_events = max(1, settings.ingest_stream_batch_events)
+    max_wait = settings.ingest_stream_batch_ms / 1000.0
+    max_line = settings.ingest_stream_max_line_bytes
+
+    async def acks():
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=8)
+        pump = asyncio.create_task(_pump(request, queue))
+        batch: list[tuple[int, IngestEvent]] = []
+        deadline = None
+        buf = b""
+        line_no = 0
+        events = 0
+        batches = 0
+
+        async def flush():
+            nonlocal batch, deadline, batches
+            lines = [n for n, _ in batch]
+            evs = [e for _, e in batch]
+            batch, deadline = [], None
+            batches += 1
+            try:
+                results = await run_in_threadpool(commit_batch, evs, request_id)
+            except Exception:
+                log.exception("ingest_stream_batch_failed")
+                return _ack(
+                    {"batch": batches, "ok": False, "error": "INGEST_FAILED", "lines": lines}
+                )
+            for n, r in zip(lines, results, strict=True):
+                r.pop("index", None)
+                r["line"] = n
+            return _ack({"batch": batches, "ok": True, "results": results})
+
+        try:
+            done = False
+            while not done:
+                timeout = None if deadline is None else max(0.0, deadline - loop.time())
+                try:
+                    chunk = await asyncio.wait_for(queue.get(), timeout)
+                except TimeoutError:
+                    chunk = b""
+                if chunk is None:
+                    done = True
+                    chunk = b"\n"
+                buf += chunk
+                *lines, buf = buf.split(b"\n")
+                if len(buf) > max_line:
+                    yield _ack({"line": line_no + 1, "ok": False, "error": "LINE_TOO_LONG"})
+                    break
+                for raw in lines:
+                    line_no += 1
+                    if not raw.strip():
+                        continue
+                    try:
+                        ev = IngestEvent.model_validate_json(raw)
+                    except ValueError:
+                        yield _ack({"line": line_no, "ok": False, "error": "INVALID_EVENT"})
+                        continue
+                    events += 1
+                    batch.append((line_no, ev))
+                    if deadline is None:
+                        deadline = loop.time() + max_wait
+                    if len(batch) >= max_events:
+                        yield await flush()
+                if batch and (done or loop.time() >= deadline):
+                    yield await flush()
+            if batch:
+                yield await flush()
+            yield _ack({"done": True, "events": events, "batches": batches})
+        finally:
+            pump.cancel()
+
+    return DuplexStreamingResponse(acks(), media_type="application/x-ndjson")
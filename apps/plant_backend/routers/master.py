@@ -9,16 +9,24 @@ from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, Field
 from sqlalchemy import desc, select
 
+from apps.plant_backend import keyset
 from apps.plant_backend.models import (
     Asset,
     AuditLog,
-    EventOutbox,
     ReasonSuggestion,
     SystemConfig,
     Ticket,
     User,
+    ticket_is_open,
 )
 from apps.plant_backend.security_deps import require_roles
+from apps.plant_backend.services import event_append
+from apps.plant_backend.system_config import (
+    INTERNAL_KEYS,
+    LIVE_KEYS,
+    SYSTEM_CONFIG,
+    bump_config_version,
+)
 from common_core.config import settings
 from common_core.db import PlantSessionLocal
 from common_core.passwords import hash_pin
@@ -41,9 +49,13 @@ def get_config(claims: Annotated[Any, Depends(require_roles("admin"))] = None):
         }
 
         # Override with DB values
-        rows = db.execute(select(SystemConfig)).scalars().all()
-        for row in rows:
-            config[row.config_key] = row.config_value
+        config.update(SYSTEM_CONFIG.snapshot(db).values)
+        rows = db.execute(
+            select(SystemConfig.config_key, SystemConfig.config_value).where(
+                SystemConfig.config_key.in_(LIVE_KEYS)
+            )
+        ).all()
+        config.update(dict(rows))
 
         return config
     finally:
@@ -64,6 +76,8 @@ def set_config(
         logging.getLogger("assetiq").info(f"SET_CONFIG payload: {payload}")
 
         for k, v in payload.items():
+            if k in INTERNAL_KEYS:
+                continue
             # ... (validation logic)
             if k == "autoLogoutMinutes":
                 with suppress(ValueError):
@@ -83,18 +97,18 @@ def set_config(
 
         # If plantName was updated, trigger sync to HQ
         if "plantName" in updated_state:
-            db.add(
-                EventOutbox(
-                    site_code=settings.plant_site_code,
-                    entity_type="plant_metadata",
-                    entity_id=settings.plant_site_code,
-                    payload_json={"display_name": updated_state["plantName"]},
-                    correlation_id=f"meta_{uuid.uuid4().hex[:12]}",
-                    created_at_utc=now,
-                )
+            event_append(
+                db,
+                "PLANT_METADATA",
+                {"display_name": updated_state["plantName"]},
+                f"meta_{uuid.uuid4().hex[:12]}",
+                entity_type="plant_metadata",
+                entity_id=settings.plant_site_code,
             )
 
+        bump_config_version(db)
         db.commit()
+        SYSTEM_CONFIG.invalidate()
         return {"status": "ok", "updated": updated_state}
     except Exception as e:
         db.rollback()
@@ -112,20 +126,13 @@ def simulate_sla_warning(
     db = PlantSessionLocal()
     try:
         # Get threshold
-        threshold = 60
-        row = db.get(SystemConfig, "whatsappSlaWarningThresholdMinutes")
-        if row:
-            with suppress(Exception):
-                threshold = int(row.config_value)
+        threshold = SYSTEM_CONFIG.snapshot(db).sla_warning_threshold_minutes
 
         # ... (rest of function - logic seems truncated in previous view, assuming standard simulation logic)
         # Re-implementing the core logic based on previous file content context
         # Find latest open ticket
         t = db.execute(
-            select(Ticket)
-            .where(Ticket.status.in_(["OPEN", "ACKNOWLEDGED", "ACK"]))
-            .order_by(desc(Ticket.created_at_utc))
-            .limit(1)
+            select(Ticket).where(ticket_is_open()).order_by(desc(Ticket.created_at_utc)).limit(1)
         ).scalar()
 
         if not t:
@@ -134,6 +141,13 @@ def simulate_sla_warning(
         new_sla = datetime.utcnow() + timedelta(minutes=threshold - 5)
         t.sla_due_at_utc = new_sla
         t.sla_warning_sent = False
+        # Local-only event: the worker's SLA scheduler picks up the new deadline
+        event_append(
+            db,
+            "TICKET_SLA",
+            {"ticket_id": t.id, "sla_due_at_utc": new_sla.isoformat() + "Z"},
+            f"ticket_sla:{t.id}:{uuid.uuid4().hex[:12]}",
+        )
         db.commit()
 
         return {
@@ -341,21 +355,14 @@ def create_user(body: CreateUserIn, claims: Annotated[Any, Depends(require_roles
 @router.get("/audit/list")
 def list_audit(
     limit: int = 50,
-    offset: int = 0,
+    cursor: str | None = None,
     claims: Annotated[Any, Depends(require_roles("admin"))] = None,
 ):
     db = PlantSessionLocal()
     try:
-        # Total count for pagination
-        from sqlalchemy import func
-
-        total = db.execute(select(func.count()).select_from(AuditLog)).scalar()
-
-        # Fetch latest logs with offset and limit
-        logs = (
-            db.execute(select(AuditLog).order_by(desc(AuditLog.id)).offset(offset).limit(limit))
-            .scalars()
-            .all()
+        # Latest first; the total is the planner's estimate, not a count(*)
+        rows, page = keyset.page(
+            db, select(AuditLog), (AuditLog.created_at_utc, AuditLog.id), limit, cursor
         )
 
         items = [
@@ -368,9 +375,9 @@ def list_audit(
                 "created_at_utc": log_item.created_at_utc.isoformat(),
                 "details": log_item.details_json,
             }
-            for log_item in logs
+            for (log_item,) in rows
         ]
-        return {"items": items, "total": total}
+        return {"items": items, "total": page["approx_total"], "page": page}
     finally:
         db.close()
 
@@ -1,7 +1,8 @@
 from fastapi import APIRouter
 from sqlalchemy import func, select
 
-from apps.plant_backend.models import EmailQueue, EventOutbox, StopQueue, Ticket
+from apps.plant_backend import event_log
+from apps.plant_backend.models import EmailQueue, StopQueue, Ticket
 from common_core.db import PlantSessionLocal
 
 router = APIRouter(tags=["metrics"])
@@ -11,9 +12,7 @@ router = APIRouter(tags=["metrics"])
 def metrics():
     db = PlantSessionLocal()
     try:
-        outbox_pending = db.execute(
-            select(func.count()).select_from(EventOutbox).where(EventOutbox.sent_at_utc.is_(None))
-        ).scalar_one()
+        outbox_pending = event_log.backlog(db, event_log.HQ)
         email_pending = db.execute(
             select(func.count()).select_from(EmailQueue).where(EmailQueue.status == "PENDING")
         ).scalar_one()
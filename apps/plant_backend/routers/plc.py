@@ -1,3 +1,4 @@
+import time
 import uuid
 from datetime import datetime
 
@@ -6,7 +7,11 @@ from pydantic import BaseModel
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from apps.plant_backend import plc_service
 from apps.plant_backend.models import PLCConfig, PLCTag
+from apps.plant_backend.plc_cache import CACHE, bump_config_version
+from apps.plant_backend.plc_historian import HISTORIAN, RESOLUTIONS
+from apps.plant_backend.plc_scheduler import SCAN_CLASSES
 from common_core.db import PlantSessionLocal
 
 router = APIRouter(prefix="/plc", tags=["plc"])
@@ -36,6 +41,20 @@ class PLCTagCreate(BaseModel):
     trigger_value: float | None = None
     stop_reason_template: str | None = None
     asset_id: str | None = None
+    deadband_abs: float | None = None
+    deadband_pct: float | None = None
+    on_delay_sec: float | None = None
+    off_delay_sec: float | None = None
+    min_stop_sec: float | None = None
+    scan_class: str | None = None
+
+
+def _check_scan_class(tag: PLCTagCreate) -> None:
+    tag.scan_class = tag.scan_class or None
+    if tag.scan_class is not None and tag.scan_class not in SCAN_CLASSES:
+        raise HTTPException(
+            status_code=400, detail=f"scan_class must be one of {list(SCAN_CLASSES)}"
+        )
 
 
 def get_db():
@@ -55,7 +74,9 @@ def list_configs(db: Session = Depends(get_db)):
 def create_config(config: PLCConfigCreate, db: Session = Depends(get_db)):
     db_obj = PLCConfig(id=uuid.uuid4().hex, **config.model_dump(), created_at_utc=datetime.utcnow())
     db.add(db_obj)
+    bump_config_version(db)
     db.commit()
+    CACHE.invalidate()
     return db_obj
 
 
@@ -68,7 +89,10 @@ def update_config(config_id: str, config: PLCConfigCreate, db: Session = Depends
     for k, v in config.model_dump().items():
         setattr(db_obj, k, v)
 
+    bump_config_version(db)
     db.commit()
+    CACHE.invalidate()
+    plc_service.POOL.invalidate(config_id)
     return db_obj
 
 
@@ -78,7 +102,10 @@ def delete_config(config_id: str, db: Session = Depends(get_db)):
     if not db_obj:
         raise HTTPException(status_code=404, detail="Config not found")
     db.delete(db_obj)
+    bump_config_version(db)
     db.commit()
+    CACHE.invalidate()
+    plc_service.POOL.invalidate(config_id)
     return {"ok": True}
 
 
@@ -89,9 +116,12 @@ def list_tags(plc_id: str, db: Session = Depends(get_db)):
 
 @router.post("/tags")
 def create_tag(tag: PLCTagCreate, db: Session = Depends(get_db)):
+    _check_scan_class(tag)
     db_obj = PLCTag(id=uuid.uuid4().hex, **tag.model_dump())
     db.add(db_obj)
+    bump_config_version(db)
     db.commit()
+    CACHE.invalidate()
     return db_obj
 
 
@@ -101,7 +131,9 @@ def delete_tag(tag_id: str, db: Session = Depends(get_db)):
     if not db_obj:
         raise HTTPException(status_code=404, detail="Tag not found")
     db.delete(db_obj)
+    bump_config_version(db)
     db.commit()
+    CACHE.invalidate()
     return {"ok": True}
 
 
@@ -110,12 +142,15 @@ def update_tag(tag_id: str, tag: PLCTagCreate, db: Session = Depends(get_db)):
     db_obj = db.get(PLCTag, tag_id)
     if not db_obj:
         raise HTTPException(status_code=404, detail="Tag not found")
+    _check_scan_class(tag)
 
     data = tag.model_dump()
     for k, v in data.items():
         setattr(db_obj, k, v)
 
+    bump_config_version(db)
     db.commit()
+    CACHE.invalidate()
     return db_obj
 
 
@@ -148,3 +183,65 @@ def get_values(plc_id: str):
     from apps.plant_backend.plc_service import LATEST_VALUES
 
     return LATEST_VALUES.get(plc_id, {})
+
+
+@router.get("/history/{plc_id}")
+def get_history(
+    plc_id: str,
+    tags: str | None = None,
+    start: float | None = None,
+    end: float | None = None,
+    minutes: float = 30,
+    resolution: str = "raw",
+):
+    """
+    Windowed tag history from the historian (no DB access).
+    start/end are epoch seconds; without start the window is the `minutes`
+    before end (default now). tags is a comma-separated list of tag names.
+    When another process polls, its spilled segment files are read instead.
+    """
+    spilled = _polled_elsewhere()
+    if spilled and not HISTORIAN.spill:
+        raise HTTPException(
+            status_code=503,
+            detail="PLC history is kept by the poller process; set PLC_HISTORY_SPILL=true",
+        )
+    if resolution != "raw" and resolution not in RESOLUTIONS:
+        raise HTTPException(
+            status_code=400, detail=f"resolution must be raw or one of {list(RESOLUTIONS)}"
+        )
+    end = time.time() if end is None else end
+    start = end - minutes * 60 if start is None else start
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    tag_names = [t.strip() for t in tags.split(",") if t.strip()] if tags else None
+    return {
+        "plc_id": plc_id,
+        "resolution": resolution,
+        "start": start,
+        "end": end,
+        "series": HISTORIAN.query(plc_id, tag_names, start, end, resolution, spilled=spilled),
+    }
+
+
+def _polled_elsewhere() -> bool:
+    """True when another process polls and this one only follows the channel."""
+    reader = plc_service.READER
+    return reader is not None and reader.enabled
+
+
+@router.get("/scan-stats")
+def get_scan_stats():
+    if _polled_elsewhere():
+        # Polling happens in another process; use the stats it publishes
+        return plc_service.READER.channel.read_stats()
+    if plc_service.SCHEDULER is None:
+        return []
+    return plc_service.SCHEDULER.stats()
+
+
+@router.get("/connections")
+def get_connections():
+    if _polled_elsewhere():
+        return plc_service.READER.channel.read_connections()
+    return plc_service.POOL.stats()
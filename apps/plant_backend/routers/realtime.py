@@ -1,7 +1,10 @@
+import json
+
 from fastapi import APIRouter, Request
 from fastapi.responses import StreamingResponse
 
-from apps.plant_backend.runtime import sse_bus
+from apps.plant_backend.runtime import plc_bus, sse_bus
+from common_core.realtime.sse_bus import SseEvent
 from common_core.realtime.sse_heartbeat import with_heartbeat
 
 router = APIRouter(prefix="/realtime", tags=["realtime"])
@@ -17,3 +20,37 @@ async def stop_events(request: Request):
             yield chunk
 
     return StreamingResponse(gen(), media_type="text/event-stream")
+
+
+@router.get("/plc-values")
+async def plc_values(plc_ids: str | None = None):
+    """
+    Live PLC values: one PLC_SNAPSHOT event on connect (also on every reconnect),
+    then PLC_VALUES events holding only the tags that changed in a scan.
+    plc_ids is an optional comma-separated filter.
+    """
+    from apps.plant_backend.plc_service import LATEST_VALUES
+
+    wanted = {p.strip() for p in plc_ids.split(",") if p.strip()} if plc_ids else None
+    # Deltas published after this id are replayed on top of the snapshot
+    last_id = plc_bus.last_id()
+    snapshot = {
+        pid: dict(vals)
+        for pid, vals in list(LATEST_VALUES.items())
+        if wanted is None or pid in wanted
+    }
+
+    async def events():
+        yield SseEvent(
+            id=last_id or "0",
+            data_json=json.dumps({"type": "PLC_SNAPSHOT", "values": snapshot}, ensure_ascii=False),
+        )
+        async for ev in plc_bus.subscribe(last_event_id=last_id, from_start=last_id is None):
+            if wanted is None or ev.topic in wanted:
+                yield ev
+
+    async def gen():
+        async for chunk in with_heartbeat(events(), interval_s=15.0):
+            yield chunk
+
+    return StreamingResponse(gen(), media_type="text/event-stream")
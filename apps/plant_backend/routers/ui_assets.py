@@ -3,6 +3,7 @@ from typing import Annotated, Any, Union
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
 from sqlalchemy import select
 
+from apps.plant_backend import keyset
 from apps.plant_backend.deps import require_perm
 from apps.plant_backend.models import Asset, TimelineEvent
 from common_core.db import PlantSessionLocal
@@ -10,37 +11,51 @@ from common_core.db import PlantSessionLocal
 router = APIRouter(prefix="/ui/assets", tags=["ui-assets"])
 
 
-@router.get("/{asset_id}/history")
-def get_asset_history(
-    asset_id: str,
-    limit: int = 10,
-    user: Annotated[Any, Depends(require_perm("ticket.view"))] = None,
-):
+def _history(asset_id: str, limit: int, cursor: str | None):
     db = PlantSessionLocal()
     try:
         # Fetch events for this asset (STOP, TICKET, etc.)
-        q = (
-            select(TimelineEvent)
-            .where(TimelineEvent.asset_id == asset_id)
-            .order_by(TimelineEvent.occurred_at_utc.desc())
-            .limit(limit)
+        q = select(TimelineEvent).where(TimelineEvent.asset_id == asset_id)
+        events, page = keyset.page(
+            db, q, (TimelineEvent.occurred_at_utc, TimelineEvent.seq), limit, cursor
         )
 
-        events = db.execute(q).scalars().all()
-
-        return [
+        items = [
             {
-                "id": e.id,
+                "id": f"TL_{e.seq:018d}",  # same form as the timeline_events ids
                 "type": e.event_type,
                 "occurred_at": e.occurred_at_utc.isoformat(),
                 "payload": e.payload_json,
             }
-            for e in events
+            for (e,) in events
         ]
+        return items, page
     finally:
         db.close()
 
 
+@router.get("/{asset_id}/history")
+def get_asset_history(
+    asset_id: str,
+    limit: int = 10,
+    user: Annotated[Any, Depends(require_perm("ticket.view"))] = None,
+):
+    """Latest events as a bare list; /history/page pages through the rest."""
+    items, _ = _history(asset_id, limit, None)
+    return items
+
+
+@router.get("/{asset_id}/history/page")
+def get_asset_history_page(
+    asset_id: str,
+    limit: int = 10,
+    cursor: str | None = None,
+    user: Annotated[Any, Depends(require_perm("ticket.view"))] = None,
+):
+    items, page = _history(asset_id, limit, cursor)
+    return {"items": items, "page": page}
+
+
 @router.post("/import")
 def import_assets(
     file: Annotated[UploadFile, File(...)],
@@ -3,6 +3,7 @@ from typing import Annotated, Any
 from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy import select
 
+from apps.plant_backend import keyset
 from apps.plant_backend.deps import require_perm
 from apps.plant_backend.models import StopQueue
 from apps.plant_backend.services import resolve_stop
@@ -15,17 +16,17 @@ router = APIRouter(prefix="/ui/stop-queue", tags=["ui-stop-queue"])
 def list_stops(
     status: str = "OPEN",
     limit: int = 50,
-    offset: int = 0,
+    cursor: str | None = None,
     user: Annotated[Any, Depends(require_perm("stop.view"))] = None,
 ):
     db = PlantSessionLocal()
     try:
-        q = select(StopQueue).order_by(StopQueue.opened_at_utc.desc()).limit(limit).offset(offset)
+        q = select(StopQueue)
         if status.upper() == "OPEN":
             q = q.where(StopQueue.is_open.is_(True))
         elif status.upper() == "CLOSED":
             q = q.where(StopQueue.is_open.is_(False))
-        rows = db.execute(q).scalars().all()
+        rows, page = keyset.page(db, q, (StopQueue.opened_at_utc, StopQueue.id), limit, cursor)
         items = [
             {
                 "id": r.id,
@@ -36,9 +37,9 @@ def list_stops(
                 "opened_at_utc": r.opened_at_utc.isoformat(),
                 "closed_at_utc": r.closed_at_utc.isoformat() if r.closed_at_utc else None,
             }
-            for r in rows
+            for (r,) in rows
         ]
-        return {"items": items, "page": {"limit": limit, "offset": offset, "returned": len(items)}}
+        return {"items": items, "page": page}
     finally:
         db.close()
 
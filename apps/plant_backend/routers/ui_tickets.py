@@ -4,6 +4,7 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import select
 
+from apps.plant_backend import keyset
 from apps.plant_backend.deps import require_perm
 from apps.plant_backend.models import MasterItem, Ticket, TicketActivity, User
 from apps.plant_backend.services import (
@@ -36,24 +37,18 @@ def _sla_state(t: Ticket) -> str:
 def list_tickets(
     status: str = "OPEN",
     limit: int = 50,
-    offset: int = 0,
+    cursor: str | None = None,
     user: Annotated[dict, Depends(require_perm("ticket.view"))] = None,
 ):
     db = PlantSessionLocal()
     try:
-        q = (
-            select(Ticket, User.full_name)
-            .outerjoin(User, Ticket.assigned_to_user_id == User.id)
-            .order_by(Ticket.created_at_utc.desc())
-            .limit(limit)
-            .offset(offset)
-        )
+        q = select(Ticket, User.full_name).outerjoin(User, Ticket.assigned_to_user_id == User.id)
         if status.upper() == "OPEN":
             q = q.where(Ticket.status != "CLOSED")
         elif status.upper() == "CLOSED":
             q = q.where(Ticket.status == "CLOSED")
 
-        rows = db.execute(q).all()
+        rows, page = keyset.page(db, q, (Ticket.created_at_utc, Ticket.id), limit, cursor)
         items = [
             {
                 "id": t.id,
@@ -72,7 +67,7 @@ def list_tickets(
             }
             for t, full_name in rows
         ]
-        return {"items": items, "page": {"limit": limit, "offset": offset, "returned": len(items)}}
+        return {"items": items, "page": page}
     finally:
         db.close()
 
@@ -1,3 +1,5 @@
 from common_core.realtime.sse_bus import SseBus
 
 sse_bus = SseBus(maxlen=5000)
+# Per-scan PLC value deltas (topic = PLC id); kept apart so they never evict stop events
+plc_bus = SseBus(maxlen=2000)
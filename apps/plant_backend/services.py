@@ -1,27 +1,32 @@
 from __future__ import annotations
 
+import sqlite3
 import uuid
 from datetime import datetime, timedelta
 from typing import Any
 
-from sqlalchemy import select
+from sqlalchemy import insert as sa_insert
+from sqlalchemy import select, update
 
+from apps.plant_backend import notifications
 from apps.plant_backend.models import (
     Asset,
     AuditLog,
     EmailQueue,
-    EventOutbox,
+    EventLog,
     MasterItem,
     MasterType,
     ReasonSuggestion,
     ReportRequest,
     StopQueue,
-    SystemConfig,
     Ticket,
     TicketActivity,
-    TimelineEvent,
-    WhatsAppQueue,
+    TicketSequence,
+    ticket_is_open,
 )
+from apps.plant_backend.notifications import emit_notification
+from apps.plant_backend.system_config import SYSTEM_CONFIG
+from apps.plant_backend.write_buffer import stage
 from common_core.config import settings
 
 
@@ -33,42 +38,75 @@ def _new_id(prefix: str) -> str:
     return f"{prefix}_{uuid.uuid4().hex[:18]}"
 
 
+def stable_id(prefix: str, key: str) -> str:
+    """Deterministic id for an idempotency key (same shape as _new_id)."""
+    return f"{prefix}_{uuid.uuid5(uuid.NAMESPACE_URL, key).hex[:18]}"
+
+
+def _next_ticket_serial(db, site_code: str, local_day: str) -> int:
+    """
+    Atomically allocates the next serial for (site, local day) with a single
+    UPSERT ... RETURNING. On PostgreSQL it runs on its own short transaction,
+    like a DB sequence: concurrent creates never wait on each other's commits
+    and a rolled-back create only leaves a gap. SQLite serialises writers, so
+    the increment simply holds the write lock of the caller's transaction.
+    """
+    bind = db.get_bind()
+    dialect = bind.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite" and sqlite3.sqlite_version_info >= (3, 35):
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        insert = None
+
+    if insert is not None:
+        stmt = (
+            insert(TicketSequence)
+            .values(site_code=site_code, local_day=local_day, last_value=1)
+            .on_conflict_do_update(
+                index_elements=[TicketSequence.site_code, TicketSequence.local_day],
+                set_={"last_value": TicketSequence.last_value + 1},
+            )
+            .returning(TicketSequence.last_value)
+        )
+        if dialect == "postgresql":
+            with bind.connect() as conn:
+                serial = conn.execute(stmt).scalar_one()
+                conn.commit()
+            return serial
+        return db.execute(stmt).scalar_one()
+
+    # No UPSERT ... RETURNING: increment under the row/write lock, insert on first use
+    key = (TicketSequence.site_code == site_code) & (TicketSequence.local_day == local_day)
+    updated = db.execute(
+        update(TicketSequence).where(key).values(last_value=TicketSequence.last_value + 1)
+    )
+    if updated.rowcount == 0:
+        db.execute(
+            sa_insert(TicketSequence).values(site_code=site_code, local_day=local_day, last_value=1)
+        )
+        return 1
+    return db.execute(select(TicketSequence.last_value).where(key)).scalar_one()
+
+
 def _generate_ticket_code(db) -> str:
     """
     Generates a ticket code in the format YYYYMMDD-HHMM-NNNN
     Example: 20260122-1605-0001
 
     NOTE: Adjusted to Plant Local Time (IST +5:30) for user friendliness.
-    Counter resets at local midnight.
+    Counter resets at local midnight (one ticket_sequences row per site and day).
     """
-    from sqlalchemy import func
-
-    from apps.plant_backend.models import Ticket
-
     # Fixed offset for IST (UTC+5:30)
     # Ideally this would be in config, but hardcoding for immediate fix as requested
     tz_offset = timedelta(hours=5, minutes=30)
-    now_utc = datetime.utcnow()
-    now_local = now_utc + tz_offset
-
-    # Start of LOCAL day for counter reset
-    start_of_local_day = now_local.replace(hour=0, minute=0, second=0, microsecond=0)
-    # We need to convert this back to UTC to query the DB correctly?
-    # Actually, created_at_utc is UTC. So we need to query tickets where
-    # (created_at_utc + offset) >= start_of_local_day
-    # equivalent to: created_at_utc >= (start_of_local_day - offset)
-    start_of_day_utc = start_of_local_day - tz_offset
-
-    # Count tickets created since the start of the LOCAL day
-    count = (
-        db.query(func.count(Ticket.id)).filter(Ticket.created_at_utc >= start_of_day_utc).scalar()
-        or 0
-    )
-    serial = count + 1
+    now_local = datetime.utcnow() + tz_offset
 
     # Format using LOCAL time
     date_str = now_local.strftime("%Y%m%d")
     time_str = now_local.strftime("%H%M")
+    serial = _next_ticket_serial(db, settings.plant_site_code, date_str)
 
     return f"{date_str}-{time_str}-{serial:04d}"
 
@@ -83,99 +121,87 @@ def audit_write(
     actor_station_code: str | None,
     request_id: str | None,
 ) -> None:
-    db.add(
-        AuditLog(
-            site_code=settings.plant_site_code,
-            actor_user_id=actor_user_id,
-            actor_station_code=actor_station_code,
-            action=action,
-            entity_type=entity_type,
-            entity_id=entity_id,
-            request_id=request_id,
-            details_json=details,
-            created_at_utc=_now(),
-        )
+    stage(
+        db,
+        AuditLog,
+        {
+            "site_code": settings.plant_site_code,
+            "actor_user_id": actor_user_id,
+            "actor_station_code": actor_station_code,
+            "action": action,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "request_id": request_id,
+            "details_json": details,
+            "created_at_utc": _now(),
+        },
     )
 
 
-def timeline_append(
-    db, asset_id: str, event_type: str, payload: dict[str, Any], correlation_id: str
-) -> str:
-    tid = _new_id("TL")
-    db.add(
-        TimelineEvent(
-            id=tid,
-            site_code=settings.plant_site_code,
-            asset_id=asset_id,
-            event_type=event_type,
-            payload_json=payload,
-            occurred_at_utc=_now(),
-            correlation_id=correlation_id,
-            created_at_utc=_now(),
-        )
+def event_append(
+    db,
+    event_type: str,
+    payload: dict[str, Any],
+    correlation_id: str,
+    asset_id: str | None = None,
+    entity_type: str | None = None,
+    entity_id: str | None = None,
+    occurred_at: datetime | None = None,
+    site_code: str | None = None,
+) -> None:
+    """
+    Appends one fact to the event log. With asset_id it shows on the asset
+    timeline; with entity_type it is synced to HQ as that entity.
+    """
+    now = _now()
+    stage(
+        db,
+        EventLog,
+        {
+            "site_code": site_code or settings.plant_site_code,
+            "event_type": event_type,
+            "asset_id": asset_id,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "payload_json": payload,
+            "correlation_id": correlation_id,
+            "occurred_at_utc": occurred_at or now,
+            "created_at_utc": now,
+        },
     )
-    return tid
 
 
 def enqueue_email(db, to_email: str, subject: str, body: str) -> None:
-    db.add(
-        EmailQueue(
-            to_email=to_email,
-            subject=subject,
-            body=body,
-            status="PENDING",
-            created_at_utc=_now(),
-            sent_at_utc=None,
-        )
-    )
-
-
-def outbox_add(
-    db, entity_type: str, entity_id: str, payload: dict[str, Any], correlation_id: str
-) -> None:
-    db.add(
-        EventOutbox(
-            site_code=settings.plant_site_code,
-            entity_type=entity_type,
-            entity_id=entity_id,
-            payload_json=payload,
-            correlation_id=correlation_id,
-            created_at_utc=_now(),
-            sent_at_utc=None,
-            retry_count=0,
-            next_attempt_at_utc=_now(),
-            last_error=None,
-        )
+    stage(
+        db,
+        EmailQueue,
+        {
+            "to_email": to_email,
+            "subject": subject,
+            "body": body,
+            "status": "PENDING",
+            "created_at_utc": _now(),
+            "sent_at_utc": None,
+        },
     )
 
 
 def log_ticket_activity(
     db, ticket_id: str, activity_type: str, details: str, actor_id: str | None = None
 ) -> None:
-    db.add(
-        TicketActivity(
-            ticket_id=ticket_id,
-            activity_type=activity_type,
-            details=details[:512] if details else None,
-            actor_id=actor_id,
-            created_at_utc=_now(),
-        )
+    stage(
+        db,
+        TicketActivity,
+        {
+            "ticket_id": ticket_id,
+            "activity_type": activity_type,
+            "details": details[:512] if details else None,
+            "actor_id": actor_id,
+            "created_at_utc": _now(),
+        },
     )
 
 
-def _to_friendly_local_time(dt_utc) -> str:
-    """
-    Converts UTC datetime to Friendly Plant Local Time (IST).
-    Format: 22 Jan 2026, 04:44 PM
-    """
-    if not dt_utc:
-        return "N/A"
-    # Fixed offset for IST (UTC+5:30)
-    tz_offset = timedelta(hours=5, minutes=30)
-    local_dt = dt_utc + tz_offset
-    return local_dt.strftime("%d %b %Y, %I:%M %p")
-
-
 def open_stop(
     db,
     asset_id: str,
@@ -184,9 +210,34 @@ def open_stop(
     actor_station_code: str | None,
     request_id: str | None,
     extra_context: dict = None,
+    trigger_tag_id: str | None = None,
+    idempotency_key: str | None = None,
+    occurred_at: datetime | None = None,
 ):
-    stop_id = _new_id("STOP")
-    now = _now()
+    """
+    With an idempotency_key the stop and ticket ids are derived from the key and
+    a repeated call returns the stop created first. occurred_at backdates the
+    stop (e.g. transitions replayed from the PLC journal).
+    """
+    if idempotency_key:
+        stop_id = stable_id("STOP", idempotency_key)
+        ticket_id = stable_id("TCK", idempotency_key)
+        existing = db.get(StopQueue, stop_id)
+        if existing is not None:
+            ticket = db.get(Ticket, ticket_id)
+            return {
+                "stop_id": stop_id,
+                "ticket_id": ticket_id if ticket else None,
+                "sla_due_at_utc": ticket.sla_due_at_utc.isoformat() + "Z"
+                if ticket and ticket.sla_due_at_utc
+                else None,
+            }
+    else:
+        stop_id = _new_id("STOP")
+        ticket_id = _new_id("TCK")
+    now = occurred_at or _now()
+    if trigger_tag_id is None and extra_context:
+        trigger_tag_id = extra_context.get("trigger_tag_id")
     db.add(
         StopQueue(
             id=stop_id,
@@ -198,13 +249,28 @@ def open_stop(
             closed_at_utc=None,
             resolution_text=None,
             live_context_json=extra_context,
+            trigger_tag_id=trigger_tag_id,
         )
     )
 
     corr_stop = f"stop_open:{stop_id}"
-    timeline_append(db, asset_id, "STOP_OPEN", {"stop_id": stop_id, "reason": reason}, corr_stop)
+    event_append(
+        db,
+        "STOP_OPEN",
+        {
+            "event_type": "STOP_OPEN",
+            "asset_id": asset_id,
+            "stop_id": stop_id,
+            "reason": reason,
+            "occurred_at_utc": now.isoformat() + "Z",
+        },
+        corr_stop,
+        asset_id=asset_id,
+        entity_type="timeline_event",
+        entity_id=corr_stop,
+        occurred_at=now,
+    )
 
-    ticket_id = _new_id("TCK")
     tcode = _generate_ticket_code(db)
     # Increase default SLA to 2 hours to avoid immediate warning if threshold is 60m
     sla_due = now + timedelta(minutes=120)
@@ -232,15 +298,21 @@ def open_stop(
     log_ticket_activity(db, ticket_id, "CREATED", f"Auto-generated from Stop {stop_id}", "SYSTEM")
 
     corr_ticket = f"ticket_open:{ticket_id}"
-    timeline_append(
-        db, asset_id, "TICKET_OPEN", {"ticket_id": ticket_id, "stop_id": stop_id}, corr_ticket
-    )
-
-    enqueue_email(
+    event_append(
         db,
-        settings.email_maintenance,
-        f"[{settings.plant_site_code}] STOP {asset_id} - Ticket {ticket_id}",
-        f"Stop opened for asset={asset_id}\nReason={reason}\nTicket={ticket_id}\nSLA Due={sla_due.isoformat()}Z",
+        "TICKET_OPEN",
+        {
+            "ticket_id": ticket_id,
+            "asset_id": asset_id,
+            "stop_id": stop_id,
+            "sla_due_at_utc": sla_due.isoformat() + "Z",
+            "status": "OPEN",
+        },
+        corr_ticket,
+        asset_id=asset_id,
+        entity_type="ticket",
+        entity_id=ticket_id,
+        occurred_at=now,
     )
 
     audit_write(
@@ -254,78 +326,8 @@ def open_stop(
         request_id,
     )
 
-    outbox_add(
-        db,
-        "timeline_event",
-        corr_stop,
-        {
-            "event_type": "STOP_OPEN",
-            "asset_id": asset_id,
-            "stop_id": stop_id,
-            "reason": reason,
-            "occurred_at_utc": now.isoformat() + "Z",
-        },
-        corr_stop,
-    )
-    outbox_add(
-        db,
-        "ticket",
-        ticket_id,
-        {
-            "ticket_id": ticket_id,
-            "asset_id": asset_id,
-            "stop_id": stop_id,
-            "sla_due_at_utc": sla_due.isoformat() + "Z",
-            "status": "OPEN",
-        },
-        corr_ticket,
-    )
-
-    # WhatsApp Alert Logic for Stop/Ticket Creation
-    try:
-        ws_enabled = db.get(SystemConfig, "whatsappEnabled")
-        ws_phone = db.get(SystemConfig, "whatsappTargetPhone")
-        ws_template = db.get(SystemConfig, "whatsappMessageTemplate")
-
-        if ws_enabled and ws_enabled.config_value is True and ws_phone and ws_phone.config_value:
-            # Default template if not set
-            raw_msg = "🚀 AssetIQ Ticket Created\nID: {ticket_code}\nAsset: {asset_id}\nTitle: {title}\nPriority: {priority}"
-            if ws_template and ws_template.config_value:
-                raw_msg = str(ws_template.config_value)
-
-            # Format the message
-            msg = (
-                raw_msg.replace("{id}", str(ticket_id))
-                .replace("{ticket_code}", str(tcode))
-                .replace("{ticket_id}", str(tcode))  # Alias for friendly ID
-                .replace("{asset_id}", str(asset_id))
-                .replace("{title}", f"Stop: {asset_id} - {reason[:120]}")
-                .replace("{priority}", "HIGH")
-                .replace("{created_at}", _to_friendly_local_time(now))
-                .replace("{source}", "AUTO")
-                .replace("{assigned_to}", "Unassigned")
-                .replace("{dept}", "General")
-                .replace("{sla_due}", _to_friendly_local_time(sla_due))
-                .replace("{site_code}", str(settings.plant_site_code))
-                .replace("{sla_state}", "OK")
-            )
-
-            db.add(
-                WhatsAppQueue(
-                    ticket_id=ticket_id,
-                    phone_number=str(ws_phone.config_value),
-                    message=msg,
-                    status="PENDING",
-                    sla_state="OK",
-                    created_at_utc=now,
-                )
-            )
-    except Exception as e:
-        import logging
-
-        logging.getLogger("assetiq").error(
-            f"Failed to queue WhatsApp alert for Stop {stop_id}: {e}"
-        )
+    # Maintenance email + WhatsApp alert, rendered by plant_worker
+    emit_notification(db, notifications.STOP_OPEN, ticket_id, {"reason": reason})
 
     return {"stop_id": stop_id, "ticket_id": ticket_id, "sla_due_at_utc": sla_due.isoformat() + "Z"}
 
@@ -353,17 +355,9 @@ def acknowledge_ticket(db, ticket_id: str, actor_user_id: str, request_id: str |
             f"Ticket acknowledged (Assigned to {actor_user_id})",
             actor_user_id,
         )
-        timeline_append(
+        event_append(
             db,
-            t.asset_id,
             "TICKET_ACK",
-            {"ticket_id": ticket_id, "assigned_to": actor_user_id},
-            f"ticket_ack:{ticket_id}",
-        )
-        outbox_add(
-            db,
-            "ticket",
-            ticket_id,
             {
                 "ticket_id": ticket_id,
                 "status": "ACK",
@@ -371,12 +365,20 @@ def acknowledge_ticket(db, ticket_id: str, actor_user_id: str, request_id: str |
                 "acknowledged_at_utc": t.acknowledged_at_utc.isoformat() + "Z",
             },
             f"ticket_ack:{ticket_id}",
+            asset_id=t.asset_id,
+            entity_type="ticket",
+            entity_id=ticket_id,
         )
     return t
 
 
 def resolve_stop(
-    db, stop_id: str, resolution_text: str, actor_user_id: str, request_id: str | None
+    db,
+    stop_id: str,
+    resolution_text: str,
+    actor_user_id: str,
+    request_id: str | None,
+    occurred_at: datetime | None = None,
 ):
     sq = db.get(StopQueue, stop_id)
     if not sq:
@@ -384,7 +386,7 @@ def resolve_stop(
     if not sq.is_open:
         return sq
     sq.is_open = False
-    sq.closed_at_utc = _now()
+    sq.closed_at_utc = occurred_at or _now()
     sq.resolution_text = resolution_text
     audit_write(
         db,
@@ -396,17 +398,9 @@ def resolve_stop(
         None,
         request_id,
     )
-    timeline_append(
+    event_append(
         db,
-        sq.asset_id,
         "STOP_RESOLVE",
-        {"stop_id": stop_id, "resolution": resolution_text},
-        f"stop_resolve:{stop_id}",
-    )
-    outbox_add(
-        db,
-        "timeline_event",
-        f"stop_resolve:{stop_id}",
         {
             "event_type": "STOP_RESOLVE",
             "stop_id": stop_id,
@@ -416,6 +410,10 @@ def resolve_stop(
             "reason_code": sq.reason,
         },
         f"stop_resolve:{stop_id}",
+        asset_id=sq.asset_id,
+        entity_type="timeline_event",
+        entity_id=f"stop_resolve:{stop_id}",
+        occurred_at=sq.closed_at_utc,
     )
 
     # [NEW] Record suggestion if it's not a master reason
@@ -500,87 +498,40 @@ def create_ticket(
     log_ticket_activity(db, tid, "CREATED", f"Ticket created via {source}", actor_id)
 
     corr = f"ticket_manual:{tid}"
-    timeline_append(db, final_asset_id, "TICKET_CREATE", {"ticket_id": tid, "title": title}, corr)
-    audit_write(
+    event_append(
         db,
         "TICKET_CREATE",
-        "ticket",
-        tid,
         {
+            "ticket_id": tid,
             "asset_id": final_asset_id,
             "title": title,
-            "priority": priority,
+            "status": "OPEN",
             "assigned_to": assigned_to,
-            "assigned_dept": dept,
         },
-        actor_id,
-        None,
-        None,
+        corr,
+        asset_id=final_asset_id,
+        entity_type="ticket",
+        entity_id=tid,
     )
-    outbox_add(
+    audit_write(
         db,
+        "TICKET_CREATE",
         "ticket",
         tid,
         {
-            "ticket_id": tid,
             "asset_id": final_asset_id,
             "title": title,
-            "status": "OPEN",
+            "priority": priority,
             "assigned_to": assigned_to,
+            "assigned_dept": dept,
         },
-        corr,
+        actor_id,
+        None,
+        None,
     )
 
-    # WhatsApp Alert Logic
-    try:
-        ws_enabled = db.get(SystemConfig, "whatsappEnabled")
-        ws_phone = db.get(SystemConfig, "whatsappTargetPhone")
-        ws_template = db.get(SystemConfig, "whatsappMessageTemplate")
-
-        if ws_enabled and ws_enabled.config_value is True and ws_phone and ws_phone.config_value:
-            # Default template if not set
-            raw_msg = "🚀 AssetIQ Ticket Created\nID: {ticket_code}\nAsset: {asset_id}\nTitle: {title}\nPriority: {priority}"
-            if ws_template and ws_template.config_value:
-                raw_msg = str(ws_template.config_value)
-
-            # Format the message
-            # Safe substitution to avoid crashes if template has invalid keys
-            msg = (
-                raw_msg.replace("{id}", str(tid))
-                .replace("{ticket_code}", str(tcode))
-                .replace("{ticket_id}", str(tcode))  # Alias for friendly ID
-                .replace("{asset_id}", str(final_asset_id))
-                .replace("{title}", str(title))
-                .replace("{priority}", str(priority))
-                .replace("{priority}", str(priority))
-                .replace("{created_at}", _to_friendly_local_time(now))
-                .replace("{source}", str(source or "Unknown"))
-                .replace("{assigned_to}", str(assigned_to or "Unassigned"))
-                .replace("{dept}", str(dept or "General"))
-                .replace("{sla_due}", _to_friendly_local_time(sla_due))
-                .replace("{site_code}", str(settings.plant_site_code))
-                .replace("{sla_state}", "OK")
-            )
-
-            # Calculate SLA state for conditional routing
-            # For newly created tickets, SLA is always OK (just created)
-            sla_state = "OK"  # New tickets start with OK state
-
-            db.add(
-                WhatsAppQueue(
-                    ticket_id=tid,
-                    phone_number=str(ws_phone.config_value),
-                    message=msg,
-                    status="PENDING",
-                    sla_state=sla_state,
-                    created_at_utc=now,
-                )
-            )
-    except Exception as e:
-        # Don't fail ticket creation just because WhatsApp queue failed
-        import logging
-
-        logging.getLogger("assetiq").error(f"Failed to queue WhatsApp alert: {e}")
+    # WhatsApp Alert, rendered by plant_worker
+    emit_notification(db, notifications.TICKET_OPEN, tid)
 
     return t
 
@@ -623,78 +574,18 @@ def close_ticket(
         None,
         None,
     )
-    timeline_append(
+    event_append(
         db,
-        t.asset_id,
         "TICKET_CLOSE",
-        {"ticket_id": ticket_id, "close_note": close_note},
-        f"ticket_close:{ticket_id}",
-    )
-
-    # WhatsApp Alert Logic for Closure
-    try:
-        ws_enabled = db.get(SystemConfig, "whatsappEnabled")
-        ws_phone = db.get(SystemConfig, "whatsappTargetPhone")
-        ws_template = db.get(SystemConfig, "whatsappCloseMessageTemplate")
-
-        if ws_enabled and ws_enabled.config_value is True and ws_phone and ws_phone.config_value:
-            # Default template if not set
-            raw_msg = "✅ Ticket Closed\nID: {ticket_code}\nTitle: {title}\nNote: {close_note}"
-            if ws_template and ws_template.config_value:
-                raw_msg = str(ws_template.config_value)
-
-            # Format the message
-            msg = (
-                raw_msg.replace("{id}", str(ticket_id))
-                .replace("{ticket_code}", str(t.ticket_code or t.id))
-                .replace("{ticket_id}", str(t.ticket_code or t.id))  # Alias
-                .replace("{asset_id}", str(t.asset_id))
-                .replace("{title}", str(t.title))
-                .replace("{priority}", str(t.priority))
-                .replace("{created_at}", _to_friendly_local_time(t.created_at_utc))
-                .replace("{source}", str(t.source or "Unknown"))
-                .replace("{assigned_to}", str(t.assigned_to_user_id or "Unassigned"))
-                .replace("{dept}", str(t.assigned_dept or "General"))
-                .replace("{sla_due}", _to_friendly_local_time(t.sla_due_at_utc))
-                .replace("{close_note}", str(close_note))
-                .replace("{resolution_reason}", str(resolution_reason or "N/A"))
-                .replace("{closed_at}", _to_friendly_local_time(t.resolved_at_utc))
-                .replace("{site_code}", str(settings.plant_site_code))
-                .replace("{sla_state}", "CLOSED")
-            )
-
-            # Calculate SLA state for conditional routing
-            # BROADCAST LOGIC: Ticket Close should be sent to ALL groups that were previously notified
-            sla_states = ["OK"]  # Always include OK
-            if t.sla_warning_sent:
-                sla_states.append("WARNING")
-            if t.sla_breach_sent:  # If it was breached, sending to BREACHED group too
-                sla_states.append("BREACHED")
-
-            final_sla_state_str = ",".join(sla_states)
-
-            db.add(
-                WhatsAppQueue(
-                    ticket_id=ticket_id,
-                    phone_number=str(ws_phone.config_value),
-                    message=msg,
-                    status="PENDING",
-                    sla_state=final_sla_state_str,
-                    created_at_utc=_now(),
-                )
-            )
-    except Exception as e:
-        import logging
-
-        logging.getLogger("assetiq").error(f"Failed to queue WhatsApp close alert: {e}")
-
-    outbox_add(
-        db,
-        "ticket",
-        ticket_id,
         {"ticket_id": ticket_id, "status": "CLOSED", "close_note": close_note},
         f"ticket_close:{ticket_id}",
+        asset_id=t.asset_id,
+        entity_type="ticket",
+        entity_id=ticket_id,
     )
+
+    # WhatsApp Alert Logic for Closure, rendered by plant_worker
+    emit_notification(db, notifications.TICKET_CLOSE, ticket_id)
     return t
 
 
@@ -720,19 +611,14 @@ def assign_ticket(db, ticket_id: str, assigned_user_id: str, actor_id: str | Non
         None,
         None,
     )
-    timeline_append(
+    event_append(
         db,
-        t.asset_id,
         "TICKET_ASSIGN",
         {"ticket_id": ticket_id, "assigned_to": assigned_user_id},
         f"ticket_assign:{ticket_id}",
-    )
-    outbox_add(
-        db,
-        "ticket",
-        ticket_id,
-        {"ticket_id": ticket_id, "assigned_to": assigned_user_id},
-        f"ticket_assign:{ticket_id}",
+        asset_id=t.asset_id,
+        entity_type="ticket",
+        entity_id=ticket_id,
     )
     return t
 
@@ -799,12 +685,19 @@ def asset_create(db, payload: dict, actor_user_id: str | None, request_id: str |
     db.add(a)
     db.flush()
 
-    timeline_append(
+    event_append(
         db,
-        asset_id,
         "ASSET_CREATE",
-        {"asset_code": a.asset_code, "name": a.name, "is_critical": a.is_critical},
+        {
+            "asset_id": asset_id,
+            "asset_code": a.asset_code,
+            "name": a.name,
+            "is_critical": a.is_critical,
+        },
         f"asset_create:{asset_id}",
+        asset_id=asset_id,
+        entity_type="asset",
+        entity_id=asset_id,
     )
     audit_write(
         db,
@@ -816,13 +709,6 @@ def asset_create(db, payload: dict, actor_user_id: str | None, request_id: str |
         None,
         request_id,
     )
-    outbox_add(
-        db,
-        "asset",
-        asset_id,
-        {"asset_id": asset_id, "asset_code": asset_code},
-        f"asset_create:{asset_id}",
-    )
     return a
 
 
@@ -2376,10 +2262,68 @@ def report_request_create_and_generate_csv(
     return rr
 
 
+def _queue_sla_warning(db, t: Ticket, now: datetime) -> None:
+    remaining_mins = int((t.sla_due_at_utc - now).total_seconds() / 60)
+    emit_notification(db, notifications.SLA_WARNING, t.id, {"remaining_mins": remaining_mins})
+    t.sla_warning_sent = True
+
+
+def _queue_sla_breach(db, t: Ticket, now: datetime) -> None:
+    overdue_mins = int((now - t.sla_due_at_utc).total_seconds() / 60)
+    emit_notification(db, notifications.SLA_BREACH, t.id, {"overdue_mins": overdue_mins})
+    t.sla_breach_sent = True
+    log_ticket_activity(db, t.id, "SLA_BREACH", f"SLA Breached by {overdue_mins} mins", "SYSTEM")
+
+
+def _open_sla_tickets(db, ticket_ids) -> list[Ticket]:
+    return (
+        db.execute(
+            select(Ticket).where(
+                Ticket.id.in_(list(ticket_ids)),
+                ticket_is_open(),
+                Ticket.sla_due_at_utc.isnot(None),
+            )
+        )
+        .scalars()
+        .all()
+    )
+
+
+def send_sla_warnings(db, ticket_ids, now: datetime | None = None) -> list[str]:
+    """
+    Queues SLA warnings for the given tickets (by primary key, no scan) and
+    commits. Tickets that are closed, already warned or past due are skipped.
+    Returns the ids warned.
+    """
+    now = now or _now()
+    sent = []
+    for t in _open_sla_tickets(db, ticket_ids):
+        if t.sla_warning_sent or t.sla_due_at_utc <= now:
+            continue
+        _queue_sla_warning(db, t, now)
+        sent.append(t.id)
+    db.commit()
+    return sent
+
+
+def send_sla_breaches(db, ticket_ids, now: datetime | None = None) -> list[str]:
+    """Breach counterpart of send_sla_warnings; returns the ids marked breached."""
+    now = now or _now()
+    sent = []
+    for t in _open_sla_tickets(db, ticket_ids):
+        if t.sla_breach_sent or t.sla_due_at_utc >= now:
+            continue
+        _queue_sla_breach(db, t, now)
+        sent.append(t.id)
+    db.commit()
+    return sent
+
+
 def check_sla_warnings(db) -> int:
     """
     Check for tickets approaching SLA deadline and queue warning alerts.
-    Call this periodically from the plant_worker.
+    Full scan of open tickets; plant_worker uses the deadline scheduler
+    (apps.plant_worker.sla_scheduler) instead.
     Returns the number of warnings sent.
     """
     import logging
@@ -2388,21 +2332,9 @@ def check_sla_warnings(db) -> int:
 
     now = _now()
 
-    # Get dynamic threshold from config (default 60 mins)
-    threshold_mins = 60
-    th_row = db.get(SystemConfig, "whatsappSlaWarningThresholdMinutes")
-    if th_row:
-        try:
-            val = int(th_row.config_value)
-            if val > 0:
-                threshold_mins = val
-        except (ValueError, TypeError):
-            pass
-
-    # Get Template
-    ws_template = db.get(SystemConfig, "whatsappWarningMessageTemplate")
-
-    warning_threshold = now + timedelta(minutes=threshold_mins)
+    # Dynamic threshold from config (default 60 mins)
+    cfg = SYSTEM_CONFIG.snapshot(db)
+    warning_threshold = now + timedelta(minutes=cfg.sla_warning_threshold_minutes)
 
     # Find open tickets approaching SLA that haven't had warning sent
     from sqlalchemy import and_
@@ -2411,7 +2343,7 @@ def check_sla_warnings(db) -> int:
         db.execute(
             select(Ticket).where(
                 and_(
-                    Ticket.status.in_(["OPEN", "ACKNOWLEDGED", "ACK"]),
+                    ticket_is_open(),
                     Ticket.sla_due_at_utc.isnot(None),
                     Ticket.sla_due_at_utc <= warning_threshold,
                     Ticket.sla_due_at_utc > now,  # Not yet breached
@@ -2427,62 +2359,13 @@ def check_sla_warnings(db) -> int:
         return 0
 
     # Check if WhatsApp is enabled
-    ws_enabled = db.get(SystemConfig, "whatsappEnabled")
-    ws_phone = db.get(SystemConfig, "whatsappTargetPhone")
-
-    if not (ws_enabled and ws_enabled.config_value is True and ws_phone and ws_phone.config_value):
+    if not cfg.whatsapp_active:
         return 0
 
     count = 0
     for t in tickets:
         try:
-            # Calculate remaining time
-            remaining = t.sla_due_at_utc - now
-            remaining_mins = int(remaining.total_seconds() / 60)
-
-            # Build warning message
-            raw_msg = (
-                f"⚠️ SLA Warning\n"
-                f"Ticket: {t.ticket_code or t.id}\n"
-                f"Asset: {t.asset_id}\n"
-                f"Title: {t.title}\n"
-                f"Priority: {t.priority}\n"
-                f"Time Remaining: {remaining_mins} minutes\n"
-                f"SLA Due: {t.sla_due_at_utc.strftime('%H:%M')}"
-            )
-
-            if ws_template and ws_template.config_value:
-                raw_msg = str(ws_template.config_value)
-
-            msg = (
-                raw_msg.replace("{id}", str(t.id))
-                .replace("{ticket_code}", str(t.ticket_code or t.id))
-                .replace("{ticket_id}", str(t.ticket_code or t.id))  # Alias
-                .replace("{asset_id}", str(t.asset_id))
-                .replace("{title}", str(t.title))
-                .replace("{priority}", str(t.priority))
-                .replace("{created_at}", _to_friendly_local_time(t.created_at_utc))
-                .replace("{source}", str(t.source or "Unknown"))
-                .replace("{assigned_to}", str(t.assigned_to_user_id or "Unassigned"))
-                .replace("{dept}", str(t.assigned_dept or "General"))
-                .replace("{sla_due}", _to_friendly_local_time(t.sla_due_at_utc))
-                .replace("{site_code}", str(t.site_code))
-                .replace("{sla_state}", "WARNING")
-            )
-
-            db.add(
-                WhatsAppQueue(
-                    ticket_id=t.id,
-                    phone_number=str(ws_phone.config_value),
-                    message=msg,
-                    status="PENDING",
-                    sla_state="WARNING",
-                    created_at_utc=now,
-                )
-            )
-
-            # Mark warning as sent
-            t.sla_warning_sent = True
+            _queue_sla_warning(db, t, now)
             count += 1
 
         except Exception as e:
@@ -2511,7 +2394,7 @@ def check_sla_breaches(db) -> int:
         db.execute(
             select(Ticket).where(
                 and_(
-                    Ticket.status.in_(["OPEN", "ACKNOWLEDGED", "ACK"]),
+                    ticket_is_open(),
                     Ticket.sla_due_at_utc.isnot(None),
                     Ticket.sla_due_at_utc < now,  # Breached
                     Ticket.sla_breach_sent.is_(False),
@@ -2526,10 +2409,8 @@ def check_sla_breaches(db) -> int:
         return 0
 
     # Check if WhatsApp is enabled
-    ws_enabled = db.get(SystemConfig, "whatsappEnabled")
-    ws_phone = db.get(SystemConfig, "whatsappTargetPhone")
-
-    if not (ws_enabled and ws_enabled.config_value is True and ws_phone and ws_phone.config_value):
+    cfg = SYSTEM_CONFIG.snapshot(db)
+    if not cfg.whatsapp_active:
         # We still mark them as sent to avoid repeated checks if feature is disabled later?
         # Better to just return 0 and rely on config check next time.
         return 0
@@ -2537,61 +2418,9 @@ def check_sla_breaches(db) -> int:
     count = 0
     for t in tickets:
         try:
-            # Build breach message
-            overdue = now - t.sla_due_at_utc
-            overdue_mins = int(overdue.total_seconds() / 60)
-
-            ws_template = db.get(SystemConfig, "whatsappBreachMessageTemplate")
-
-            raw_msg = (
-                f"🔥 SLA BREACHED\n"
-                f"Ticket: {t.ticket_code or t.id}\n"
-                f"Asset: {t.asset_id}\n"
-                f"Title: {t.title}\n"
-                f"Priority: {t.priority}\n"
-                f"Overdue By: {overdue_mins} minutes\n"
-                f"SLA Due: {t.sla_due_at_utc.strftime('%H:%M')}"
-            )
-
-            if ws_template and ws_template.config_value:
-                raw_msg = str(ws_template.config_value)
-
-            msg = (
-                raw_msg.replace("{id}", str(t.id))
-                .replace("{ticket_code}", str(t.ticket_code or t.id))
-                .replace("{ticket_id}", str(t.ticket_code or t.id))  # Alias
-                .replace("{asset_id}", str(t.asset_id))
-                .replace("{title}", str(t.title))
-                .replace("{priority}", str(t.priority))
-                .replace("{created_at}", _to_friendly_local_time(t.created_at_utc))
-                .replace("{source}", str(t.source or "Unknown"))
-                .replace("{assigned_to}", str(t.assigned_to_user_id or "Unassigned"))
-                .replace("{dept}", str(t.assigned_dept or "General"))
-                .replace("{sla_due}", _to_friendly_local_time(t.sla_due_at_utc))
-                .replace("{site_code}", str(t.site_code))
-                .replace("{sla_state}", "BREACHED")
-            )
-
-            db.add(
-                WhatsAppQueue(
-                    ticket_id=t.id,
-                    phone_number=str(ws_phone.config_value),
-                    message=msg,
-                    status="PENDING",
-                    sla_state="BREACHED",  # Important for routing
-                    created_at_utc=now,
-                )
-            )
-
-            # Mark breach as sent
-            t.sla_breach_sent = True
+            _queue_sla_breach(db, t, now)
             count += 1
 
-            # Log activity
-            log_ticket_activity(
-                db, t.id, "SLA_BREACH", f"SLA Breached by {overdue_mins} mins", "SYSTEM"
-            )
-
         except Exception as e:
             log.error(f"Failed to queue SLA breach for ticket {t.id}: {e}")
 
@@ -0,0 +1,163 @@
+"""
+Process-wide snapshot of SystemConfig (plant settings edited in Master > Config).
+
+Stop/ticket transactions and the SLA checks read WhatsApp settings and the SLA
+warning threshold from this snapshot instead of issuing several db.get() calls
+each. master.set_config bumps a version row and invalidates the snapshot of its
+own process; other processes (plant_worker, other API workers) compare the
+version (one primary-key lookup) at most every SYSTEM_CONFIG_TTL_SEC and reload
+the table only when it changed.
+
+Loads go through the caller's session, so the snapshot always comes from the
+database the caller is working on.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any
+
+from sqlalchemy import select
+
+from apps.plant_backend.models import SystemConfig
+from common_core.config import settings
+
+CONFIG_VERSION_KEY = "systemConfigVersion"
+# Bookkeeping rows that are not settings
+INTERNAL_KEYS = frozenset({CONFIG_VERSION_KEY, "plcConfigVersion"})
+# Status rows the WhatsApp worker writes directly (no version bump); always read live
+LIVE_KEYS = frozenset({"whatsappHeartbeat", "whatsappQRCode", "whatsappLogoutRequest"})
+
+DEFAULT_SLA_WARNING_MINUTES = 60
+
+
+def bump_version(db, key: str) -> int:
+    """
+    Increments the SystemConfig version row `key` (created at 1). Shared by the
+    config caches (this one and plc_cache) that reload when their row changes.
+    """
+    row = db.get(SystemConfig, key)
+    now = datetime.utcnow()
+    if row is None:
+        version = 1
+        db.add(SystemConfig(config_key=key, config_value=1, updated_at_utc=now))
+        db.flush()  # a second bump in this transaction must find the row (no autoflush)
+    else:
+        try:
+            version = int(row.config_value) + 1
+        except (TypeError, ValueError):
+            version = 1
+        row.config_value = version
+        row.updated_at_utc = now
+    return version
+
+
+def bump_config_version(db) -> int:
+    """
+    Marks SystemConfig as changed. Call inside the writing transaction, then
+    SYSTEM_CONFIG.invalidate() once it is committed.
+    """
+    return bump_version(db, CONFIG_VERSION_KEY)
+
+
+def _text(value) -> str | None:
+    return str(value) if value else None
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    version: int | None = None
+    values: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+    whatsapp_enabled: bool = False
+    whatsapp_target_phone: str | None = None
+    whatsapp_message_template: str | None = None
+    whatsapp_close_message_template: str | None = None
+    whatsapp_warning_message_template: str | None = None
+    whatsapp_breach_message_template: str | None = None
+    sla_warning_threshold_minutes: int = DEFAULT_SLA_WARNING_MINUTES
+
+    @classmethod
+    def from_values(cls, values: dict[str, Any], version: int | None = None) -> ConfigSnapshot:
+        threshold = DEFAULT_SLA_WARNING_MINUTES
+        try:
+            val = int(values.get("whatsappSlaWarningThresholdMinutes"))
+            if val > 0:
+                threshold = val
+        except (ValueError, TypeError):
+            pass
+        return cls(
+            version=version,
+            values=MappingProxyType(dict(values)),
+            whatsapp_enabled=values.get("whatsappEnabled") is True,
+            whatsapp_target_phone=_text(values.get("whatsappTargetPhone")),
+            whatsapp_message_template=_text(values.get("whatsappMessageTemplate")),
+            whatsapp_close_message_template=_text(values.get("whatsappCloseMessageTemplate")),
+            whatsapp_warning_message_template=_text(values.get("whatsappWarningMessageTemplate")),
+            whatsapp_breach_message_template=_text(values.get("whatsappBreachMessageTemplate")),
+            sla_warning_threshold_minutes=threshold,
+        )
+
+    @property
+    def whatsapp_active(self) -> bool:
+        """WhatsApp alerts are on and have somewhere to go."""
+        return self.whatsapp_enabled and bool(self.whatsapp_target_phone)
+
+    def get(self, key: str, default=None):
+        return self.values.get(key, default)
+
+
+class SystemConfigCache:
+    def __init__(
+        self,
+        ttl_sec: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._ttl = settings.system_config_ttl_sec if ttl_sec is None else ttl_sec
+        self._clock = clock
+        self._snap: ConfigSnapshot | None = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        self._next_check = 0.0
+        self._snap = None
+
+    @staticmethod
+    def _read_version(db) -> int | None:
+        value = db.execute(
+            select(SystemConfig.config_value).where(SystemConfig.config_key == CONFIG_VERSION_KEY)
+        ).scalar()
+        try:
+            return int(value) if value is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _load(db, version: int | None) -> ConfigSnapshot:
+        rows = db.execute(select(SystemConfig.config_key, SystemConfig.config_value)).all()
+        values = {k: v for k, v in rows if k not in INTERNAL_KEYS and k not in LIVE_KEYS}
+        return ConfigSnapshot.from_values(values, version)
+
+    def snapshot(self, db) -> ConfigSnapshot:
+        snap = self._snap
+        if snap is not None and self._clock() < self._next_check:
+            return snap
+
+        with self._lock:
+            snap = self._snap
+            if snap is not None and self._clock() < self._next_check:
+                return snap
+            version = self._read_version(db)
+            if snap is None or version != snap.version:
+                snap = self._load(db, version)
+                self._snap = snap
+            self._next_check = self._clock() + self._ttl
+            return snap
+
+
+SYSTEM_CONFIG = SystemConfigCache()
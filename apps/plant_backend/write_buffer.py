@@ -0,0 +1,88 @@
+"""
+Per-transaction buffer for append-only side-effect rows.
+
+A stop or ticket transition writes several rows that nothing reads back in the
+same transaction: audit log, timeline, outbox, ticket activity, email queue and
+notification events. services.py stages them here instead of adding one ORM
+object each. At the next flush or commit every table is written with a single
+multi-row INSERT (chunked at CHUNK_ROWS). A stop storm or an ingest batch then
+costs one statement per table, not one per row.
+
+Rows staged inside a transaction that rolls back are dropped with it. A
+SAVEPOINT (begin_nested) records how many rows were staged when it began:
+while it is open only the rows staged after that mark are written, and rolling
+it back drops just those, so the outer transaction keeps its own rows.
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+_KEY = "staged_rows"
+_MARKS = "staged_marks"
+CHUNK_ROWS = 500
+
+
+def stage(db, model, row: dict) -> None:
+    """Queues one row for `model`; all rows of a model must use the same keys."""
+    db.info.setdefault(_KEY, {}).setdefault(model.__table__, []).append(row)
+
+
+def staged(db, model) -> list[dict]:
+    """Rows of `model` staged and not yet written."""
+    return list(db.info.get(_KEY, {}).get(model.__table__, ()))
+
+
+def write_staged(session) -> None:
+    by_table = session.info.get(_KEY)
+    if not by_table:
+        return
+    # Inside a savepoint the rows below its mark belong to the outer transaction:
+    # written here they would be lost if the savepoint rolled back
+    mark = session.info.get(_MARKS, {}).get(session.get_nested_transaction(), {})
+    conn = session.connection()
+    for table, rows in by_table.items():
+        keep = mark.get(table, 0)
+        new = rows[keep:]
+        del rows[keep:]
+        for i in range(0, len(new), CHUNK_ROWS):
+            conn.execute(insert(table).values(new[i : i + CHUNK_ROWS]))
+
+
+@event.listens_for(Session, "before_flush")
+def _before_flush(session, flush_context, instances) -> None:
+    write_staged(session)
+
+
+@event.listens_for(Session, "before_commit")
+def _before_commit(session) -> None:
+    # Also runs when a savepoint is released
+    write_staged(session)
+
+
+@event.listens_for(Session, "after_transaction_create")
+def _after_transaction_create(session, transaction) -> None:
+    if transaction.nested:
+        staged = session.info.get(_KEY, {})
+        marks = session.info.setdefault(_MARKS, {})
+        marks[transaction] = {table: len(rows) for table, rows in staged.items()}
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _after_rollback(session, previous_transaction) -> None:
+    if not previous_transaction.nested:
+        session.info.pop(_KEY, None)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _after_transaction_end(session, transaction) -> None:
+    if transaction.nested:
+        # Released: its rows were written by before_commit. Rolled back: drop them.
+        mark = session.info.get(_MARKS, {}).pop(transaction, {})
+        for table, rows in session.info.get(_KEY, {}).items():
+            del rows[mark.get(table, 0) :]
+    elif transaction.parent is None:
+        # e.g. close() without commit: whatever was staged goes with the transaction
+        session.info.pop(_KEY, None)
+        session.info.pop(_MARKS, None)
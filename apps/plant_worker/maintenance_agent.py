@@ -11,13 +11,14 @@ from pathlib import Path
 
 from sqlalchemy import delete, select, text
 
+from apps.plant_backend import event_log, ingest_dedup
 from apps.plant_backend.models import (
     AuditLog,
     EmailQueue,
-    EventOutbox,
+    EventLog,
+    NotificationEvent,
     StopQueue,
     Ticket,
-    TimelineEvent,
     WhatsAppQueue,
 )
 from common_core.config import settings
@@ -127,9 +128,11 @@ def run_cleanup_job() -> dict:
         res = db.execute(delete(AuditLog).where(AuditLog.created_at_utc < log_cut))
         summary["audit_logs"] = res.rowcount
 
-        # Timeline Events
-        res = db.execute(delete(TimelineEvent).where(TimelineEvent.created_at_utc < log_cut))
-        summary["timeline"] = res.rowcount
+        # Event log (timeline + sync): never past a sync cursor
+        res = db.execute(
+            delete(EventLog).where(EventLog.created_at_utc < log_cut, event_log.delivered(db))
+        )
+        summary["event_log"] = res.rowcount
 
         # 2. Queues (Queue Retention)
         queue_cut = now - timedelta(days=settings.queue_retention_days)
@@ -140,14 +143,16 @@ def run_cleanup_job() -> dict:
         res = db.execute(delete(EmailQueue).where(EmailQueue.created_at_utc < queue_cut))
         summary["email_queue"] = res.rowcount
 
-        # Event Outbox (Only delete processed ones? No, usually safe to delete all old ones)
-        # But safest is to delete ONLY sent ones.
+        # Ingest dedup keys (own window: gateway retries only arrive for so long)
+        summary["ingest_dedup"] = ingest_dedup.prune(db, now)
+
         res = db.execute(
-            delete(EventOutbox).where(
-                EventOutbox.created_at_utc < queue_cut, EventOutbox.sent_at_utc.is_not(None)
+            delete(NotificationEvent).where(
+                NotificationEvent.created_at_utc < queue_cut,
+                NotificationEvent.processed_at_utc.is_not(None),
             )
         )
-        summary["event_outbox"] = res.rowcount
+        summary["notification_events"] = res.rowcount
 
         # 3. Operations (Ticket Retention)
         # Only delete CLOSED tickets and CLOSED stops
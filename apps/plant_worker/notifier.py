@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+import logging
+
+from apps.plant_backend.notifications import dispatch_pending
+from common_core.db import PlantSessionLocal
+
+log = logging.getLogger("assetiq.notifications")
+
+
+def dispatch_once(limit: int = 100) -> int:
+    """Renders pending ticket notifications into the WhatsApp / email queues."""
+    db = PlantSessionLocal()
+    try:
+        return dispatch_pending(db, limit=limit)
+    finally:
+        db.close()
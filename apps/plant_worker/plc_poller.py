@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import logging
+
+from apps.plant_backend import plc_service
+from apps.plant_backend.plc_channel import LiveValueChannel
+from common_core.guardrails import validate_runtime_secrets
+from common_core.logging_setup import configure_logging
+
+log = logging.getLogger("assetiq.plc_poller")
+
+
+def main() -> None:
+    """
+    Standalone PLC poller (run with PLC_POLLER_MODE=external on the API).
+    Any number of replicas may run; only the elected leader polls, and live
+    values reach the API workers through the shared channel.
+    """
+    configure_logging(component="plc_poller")
+    validate_runtime_secrets()
+    log.info("plc_poller_started", extra={"component": "plc_poller"})
+    plc_service.run_as_leader(channel=LiveValueChannel())
+
+
+if __name__ == "__main__":
+    main()
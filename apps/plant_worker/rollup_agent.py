@@ -5,7 +5,8 @@ from datetime import datetime
 
 from sqlalchemy import func, select
 
-from apps.plant_backend.models import EventOutbox, Ticket, TimelineEvent
+from apps.plant_backend.models import EventLog, Ticket, ticket_is_open
+from apps.plant_backend.services import event_append
 from common_core.config import settings
 from common_core.db import PlantSessionLocal
 
@@ -26,36 +27,27 @@ def compute_rollup_once() -> bool:
         day_utc = _utc_today_str()
 
         # 1. Tickets Open (OPEN/ACK/ACKNOWLEDGED)
-        tickets_open = (
-            db.scalar(
-                select(func.count(Ticket.id)).where(
-                    Ticket.status.in_(["OPEN", "ACKNOWLEDGED", "ACK"])
-                )
-            )
-            or 0
-        )
+        tickets_open = db.scalar(select(func.count(Ticket.id)).where(ticket_is_open())) or 0
 
         # 2. SLA Breaches (Current Snapshot)
         now = _utc_now()
         sla_breaches = (
             db.scalar(
-                select(func.count(Ticket.id)).where(
-                    Ticket.status.in_(["OPEN", "ACKNOWLEDGED", "ACK"]), Ticket.sla_due_at_utc < now
-                )
+                select(func.count(Ticket.id)).where(ticket_is_open(), Ticket.sla_due_at_utc < now)
             )
             or 0
         )
 
         # 3. Stops & Downtime (Today's accumulation)
-        # TimelineEvent in Plant DB does not have raw_duration_seconds column (it is in payload or computed).
+        # EventLog in Plant DB does not have raw_duration_seconds column (it is in payload or computed).
         # We must aggregate in Python or use payload extraction if DB supports it.
         # Postgres JSON query: payload_json->>'duration_seconds'
         # For simplicity/compatibility, let's fetch all stops today and sum in python.
         day_start = datetime.fromisoformat(day_utc)
         stops_rows = (
             db.execute(
-                select(TimelineEvent).where(
-                    TimelineEvent.event_type == "STOP", TimelineEvent.occurred_at_utc >= day_start
+                select(EventLog).where(
+                    EventLog.event_type == "STOP", EventLog.occurred_at_utc >= day_start
                 )
             )
             .scalars()
@@ -101,9 +93,9 @@ def compute_rollup_once() -> bool:
         # Let's count 'PLC_FAULT' and 'FAULT' to be safe.
         faults_count = (
             db.scalar(
-                select(func.count(TimelineEvent.id)).where(
-                    TimelineEvent.event_type.in_(["PLC_FAULT", "FAULT"]),
-                    TimelineEvent.occurred_at_utc >= day_start,
+                select(func.count(EventLog.seq)).where(
+                    EventLog.event_type.in_(["PLC_FAULT", "FAULT"]),
+                    EventLog.occurred_at_utc >= day_start,
                 )
             )
             or 0
@@ -147,16 +139,16 @@ def compute_rollup_once() -> bool:
         timestamp_suffix = int(datetime.utcnow().timestamp())
         unique_correlation_id = f"rollup:{site_code}:{day_utc}:{timestamp_suffix}"
 
-        # Add to outbox
-        new_event = EventOutbox(
-            site_code=site_code,
+        # Add to the event log (synced, not on any asset timeline)
+        event_append(
+            db,
+            "ROLLUP",
+            payload,
+            unique_correlation_id,
             entity_type="rollup",
             entity_id=day_utc,
-            payload_json=payload,
-            correlation_id=unique_correlation_id,
-            created_at_utc=_utc_now(),
+            site_code=site_code,
         )
-        db.add(new_event)
 
         db.commit()
         return True
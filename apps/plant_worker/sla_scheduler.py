@@ -0,0 +1,232 @@
+"""
+SLA deadline scheduler for plant_worker.
+
+The warning and breach deadline of every open ticket sits in a min-heap, and
+each notification goes out when its deadline comes up. There is no periodic
+scan of `tickets`: the heap is loaded once at startup and then kept current
+from the event log. A ticket open/create/ack/close or SLA change re-reads that
+one ticket by primary key.
+
+Entries are never removed from the heap. A popped entry whose due time no
+longer matches the ticket (SLA moved, ticket closed) is skipped. A change of
+the warning threshold or of WhatsApp on/off, with or without a config version
+bump, rebuilds the heap from the tracked tickets.
+"""
+
+from __future__ import annotations
+
+import heapq
+import logging
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from apps.plant_backend import services
+from apps.plant_backend.models import TICKET_OPEN_STATUSES, EventLog, Ticket, ticket_is_open
+from apps.plant_backend.system_config import SYSTEM_CONFIG
+from common_core.config import settings
+from common_core.db import PlantSessionLocal
+
+log = logging.getLogger("assetiq.sla_scheduler")
+
+TICKET_EVENTS = ("TICKET_OPEN", "TICKET_CREATE", "TICKET_ACK", "TICKET_CLOSE", "TICKET_SLA")
+WARNING = "warning"
+BREACH = "breach"
+
+
+@dataclass
+class _Tracked:
+    due: datetime
+    warned: bool
+
+
+class SlaScheduler:
+    def __init__(self, clock: Callable[[], datetime] = datetime.utcnow):
+        self._clock = clock
+        self._tickets: dict[str, _Tracked] = {}
+        self._heap: list[tuple[datetime, str, str, datetime]] = []
+        self._threshold = timedelta(0)
+        self._whatsapp = False
+        self._config: tuple[timedelta, bool] | None = None  # (threshold, whatsapp) in the heap
+        # Event log rows at or below _floor are applied; _recent holds the
+        # applied ones above it (re-read until they are SYNC_GAP_GRACE_SEC old,
+        # so an append that commits late is not missed)
+        self._floor = 0
+        self._recent: set[int] = set()
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._tickets)
+
+    def load(self, db) -> int:
+        """Tracks every open ticket that still has a notification ahead of it."""
+        self._floor = self._seq_before_grace(db)
+        self._recent.clear()
+        rows = db.execute(
+            select(Ticket.id, Ticket.sla_due_at_utc, Ticket.sla_warning_sent).where(
+                ticket_is_open(),
+                Ticket.sla_due_at_utc.isnot(None),
+                Ticket.sla_breach_sent.is_(False),
+            )
+        ).all()
+        self._tickets = {r.id: _Tracked(r.sla_due_at_utc, bool(r.sla_warning_sent)) for r in rows}
+        self._config = None
+        self._sync_config(db)
+        self.loaded = True
+        return len(rows)
+
+    def refresh(self, db) -> int:
+        """Applies ticket events appended since the last call; returns tickets re-read."""
+        self._sync_config(db)
+        floor = self._seq_before_grace(db)
+        if floor > self._floor:
+            self._floor = floor
+            self._recent = {s for s in self._recent if s > floor}
+
+        rows = db.execute(
+            select(EventLog.seq, EventLog.payload_json).where(
+                EventLog.seq > self._floor, EventLog.event_type.in_(TICKET_EVENTS)
+            )
+        ).all()
+        ticket_ids = set()
+        for seq, payload in rows:
+            if seq in self._recent:
+                continue
+            self._recent.add(seq)
+            if (payload or {}).get("ticket_id"):
+                ticket_ids.add(payload["ticket_id"])
+        if not ticket_ids:
+            return 0
+
+        found = db.execute(
+            select(
+                Ticket.id,
+                Ticket.status,
+                Ticket.sla_due_at_utc,
+                Ticket.sla_warning_sent,
+                Ticket.sla_breach_sent,
+            ).where(Ticket.id.in_(ticket_ids))
+        ).all()
+        for r in found:
+            self._track(r.id, r.status, r.sla_due_at_utc, r.sla_warning_sent, r.sla_breach_sent)
+        for tid in ticket_ids - {r.id for r in found}:
+            self._tickets.pop(tid, None)
+        return len(ticket_ids)
+
+    def next_deadline(self) -> datetime | None:
+        while self._heap and self._stale(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def fire_due(self, db) -> tuple[int, int]:
+        """Sends every notification whose deadline has passed; returns (warned, breached)."""
+        now = self._clock()
+        popped = []
+        warn_ids, breach_ids = [], []
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            _, kind, tid, due = entry
+            if self._stale(entry):
+                continue
+            if kind == WARNING:
+                if now >= due:
+                    continue
+                warn_ids.append(tid)
+            else:
+                breach_ids.append(tid)
+            popped.append(entry)
+        if not popped or not self._whatsapp:
+            # WhatsApp off: nothing is sent or marked. The tickets stay tracked;
+            # switching it on rebuilds the heap and the overdue entries fire then
+            return 0, 0
+
+        try:
+            warned = services.send_sla_warnings(db, warn_ids, now) if warn_ids else []
+            breached = services.send_sla_breaches(db, breach_ids, now) if breach_ids else []
+        except Exception:
+            db.rollback()
+            for entry in popped:
+                heapq.heappush(self._heap, entry)
+            raise
+        for tid in warned:
+            self._tickets[tid].warned = True
+        for tid in breached:
+            self._tickets.pop(tid, None)
+        return len(warned), len(breached)
+
+    def run(self, stop: threading.Event | None = None) -> None:
+        """Worker thread: sleeps until the next deadline or SLA_SCHEDULER_REFRESH_SEC."""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            db = PlantSessionLocal()
+            try:
+                if not self.loaded:
+                    count = self.load(db)
+                    log.info(
+                        "sla_scheduler_loaded",
+                        extra={"component": "plant_worker", "tickets": count},
+                    )
+                self.refresh(db)
+                warned, breached = self.fire_due(db)
+                if warned:
+                    log.info(
+                        "sla_warnings_sent", extra={"component": "plant_worker", "count": warned}
+                    )
+                if breached:
+                    log.info(
+                        "sla_breaches_sent", extra={"component": "plant_worker", "count": breached}
+                    )
+            except Exception as e:
+                log.error("sla_scheduler_failed", extra={"err": str(e)})
+            finally:
+                db.close()
+
+            wait = settings.sla_scheduler_refresh_sec
+            nxt = self.next_deadline()
+            if nxt is not None:
+                wait = min(wait, max(0.0, (nxt - self._clock()).total_seconds()))
+            stop.wait(wait)
+
+    def _track(self, tid, status, due, warned, breached) -> None:
+        if status not in TICKET_OPEN_STATUSES or due is None or breached:
+            self._tickets.pop(tid, None)
+            return
+        t = self._tickets.get(tid)
+        if t is not None and t.due == due and t.warned == bool(warned):
+            return
+        self._tickets[tid] = _Tracked(due, bool(warned))
+        self._push(tid, self._tickets[tid])
+
+    def _stale(self, entry) -> bool:
+        _, kind, tid, due = entry
+        t = self._tickets.get(tid)
+        return t is None or t.due != due or (kind == WARNING and t.warned)
+
+    def _push(self, tid: str, t: _Tracked) -> None:
+        if not t.warned:
+            heapq.heappush(self._heap, (t.due - self._threshold, WARNING, tid, t.due))
+        heapq.heappush(self._heap, (t.due, BREACH, tid, t.due))
+
+    def _sync_config(self, db) -> None:
+        cfg = SYSTEM_CONFIG.snapshot(db)
+        config = (timedelta(minutes=cfg.sla_warning_threshold_minutes), cfg.whatsapp_active)
+        if config == self._config:
+            return
+        self._config = config
+        self._threshold, self._whatsapp = config
+        self._heap = []
+        for tid, t in self._tickets.items():
+            self._push(tid, t)
+
+    def _seq_before_grace(self, db) -> int:
+        cut = self._clock() - timedelta(seconds=settings.sync_gap_grace_sec)
+        seq = db.scalar(
+            select(EventLog.seq)
+            .where(EventLog.created_at_utc < cut)
+            .order_by(EventLog.seq.desc())
+            .limit(1)
+        )
+        return max(self._floor, seq or 0)
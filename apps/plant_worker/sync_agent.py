@@ -7,9 +7,9 @@ import logging
 from datetime import datetime, timedelta
 
 import httpx
-from sqlalchemy import select
 
-from apps.plant_backend.models import DeadLetter, EmailQueue, EventOutbox
+from apps.plant_backend import event_log
+from apps.plant_backend.models import DeadLetter, EmailQueue
 from common_core.config import settings
 from common_core.db import PlantSessionLocal
 
@@ -31,24 +31,21 @@ def _next_backoff(retry_count: int) -> datetime:
 
 
 def push_once(batch: int = 200) -> dict:
+    """Pushes the next event log rows to HQ and moves the "hq" cursor past them."""
     db = PlantSessionLocal()
     try:
-        rows = (
-            db.execute(
-                select(EventOutbox)
-                .where(EventOutbox.sent_at_utc.is_(None))
-                .where(
-                    (EventOutbox.next_attempt_at_utc.is_(None))
-                    | (EventOutbox.next_attempt_at_utc <= _now())
-                )
-                .order_by(EventOutbox.created_at_utc.asc())
-                .limit(batch)
-            )
-            .scalars()
-            .all()
-        )
-
+        cur = event_log.cursor(db, event_log.HQ)
+        if cur.next_attempt_at_utc is not None and cur.next_attempt_at_utc > _now():
+            return {"sent": 0}
+        rows = event_log.pending(db, cur, batch)
         if not rows:
+            db.commit()
+            return {"sent": 0}
+
+        synced = [r for r in rows if r.entity_type]
+        if not synced:
+            event_log.advance(cur, rows[-1].seq)
+            db.commit()
             return {"sent": 0}
 
         items = [
@@ -59,7 +56,7 @@ def push_once(batch: int = 200) -> dict:
                 "payload": r.payload_json,
                 "correlation_id": r.correlation_id,
             }
-            for r in rows
+            for r in synced
         ]
         body = json.dumps({"items": items}, separators=(",", ":"), ensure_ascii=False).encode(
             "utf-8"
@@ -77,10 +74,10 @@ def push_once(batch: int = 200) -> dict:
         except Exception as e:
             err = str(e)[:300]
             now = _now()
-            for r in rows:
-                r.retry_count = int(r.retry_count or 0) + 1
-                r.last_error = err
-                if r.retry_count >= MAX_RETRIES:
+            cur.retry_count = int(cur.retry_count or 0) + 1
+            cur.last_error = err
+            if cur.retry_count >= MAX_RETRIES:
+                for r in synced:
                     db.add(
                         DeadLetter(
                             site_code=r.site_code,
@@ -101,18 +98,15 @@ def push_once(batch: int = 200) -> dict:
                             sent_at_utc=None,
                         )
                     )
-                    r.sent_at_utc = now
-                else:
-                    r.next_attempt_at_utc = _next_backoff(r.retry_count)
+                event_log.advance(cur, rows[-1].seq, now)
+            else:
+                cur.next_attempt_at_utc = _next_backoff(cur.retry_count)
+                cur.updated_at_utc = now
             db.commit()
             raise
 
-        now = _now()
-        for r in rows:
-            r.sent_at_utc = now
-            r.last_error = None
-            r.next_attempt_at_utc = None
+        event_log.advance(cur, rows[-1].seq)
         db.commit()
-        return {"sent": len(rows)}
+        return {"sent": len(synced)}
     finally:
         db.close()
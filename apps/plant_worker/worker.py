@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import logging
+import threading
 import time
 from datetime import datetime, timedelta, date
 
@@ -11,9 +12,11 @@ from apps.plant_worker.maintenance_agent import (
     run_backup_job as run_maintenance_backup,
     run_cleanup_job as run_maintenance_cleanup,
 )
+from apps.plant_worker.notifier import dispatch_once as dispatch_notifications
 from apps.plant_worker.report_archiver import run_once as archive_once
 from apps.plant_worker.report_scheduler import run_once as check_reports_once
 from apps.plant_worker.rollup_agent import compute_rollup_once
+from apps.plant_worker.sla_scheduler import SlaScheduler
 from apps.plant_worker.sync_agent import push_once
 from common_core.guardrails import validate_runtime_secrets
 from common_core.logging_setup import configure_logging
@@ -32,6 +35,9 @@ def main() -> None:
     except Exception as e:
         log.error("startup_backup_check_failed", extra={"err": str(e)})
 
+    # SLA warnings/breaches fire from their own thread, at the deadline
+    threading.Thread(target=SlaScheduler().run, name="sla-scheduler", daemon=True).start()
+
     last_archive = 0.0
 
     email_fail_streak = 0
@@ -39,7 +45,6 @@ def main() -> None:
 
     last_rollup = 0.0
     last_report_check = 0.0
-    last_sla_check = 0.0
 
     # Track days to avoid running multiple times per hour
     # We initialize to yesterday so it runs today if the hour matches immediately
@@ -57,6 +62,16 @@ def main() -> None:
     last_cleanup_date = date.today()
 
     while True:
+        try:
+            queued = dispatch_notifications(limit=100)
+            if queued:
+                log.info(
+                    "notifications_dispatched",
+                    extra={"component": "plant_worker", "count": queued},
+                )
+        except Exception as e:
+            log.error("notification_dispatch_failed", extra={"err": str(e)})
+
         try:
             sent = send_pending(limit=50)
             email_fail_streak = 0
@@ -128,34 +143,6 @@ def main() -> None:
             except Exception as e:
                 log.error("scheduled_cleanup_failed", extra={"err": str(e)})
 
-        # Check for SLA warnings every 20 seconds
-        now = time.time()
-        if now - last_sla_check > 20:
-            try:
-                from apps.plant_backend.services import check_sla_breaches, check_sla_warnings
-                from common_core.db import PlantSessionLocal
-
-                db = PlantSessionLocal()
-                try:
-                    warned = check_sla_warnings(db)
-                    if warned:
-                        log.info(
-                            "sla_warnings_sent",
-                            extra={"component": "plant_worker", "count": warned},
-                        )
-
-                    breached = check_sla_breaches(db)
-                    if breached:
-                        log.info(
-                            "sla_breaches_sent",
-                            extra={"component": "plant_worker", "count": breached},
-                        )
-                finally:
-                    db.close()
-                last_sla_check = now
-            except Exception as e:
-                log.error("sla_warning_check_failed", extra={"err": str(e)})
-
         time.sleep(2)
 
 
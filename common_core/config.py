@@ -38,6 +38,10 @@ class Settings(BaseSettings):
         default="http://hq_backend:8001/sync/receive", alias="HQ_RECEIVER_URL"
     )
 
+    # Sync reads past a hole in EventLog.seq only once the next row is this old
+    # (the hole is then a rolled-back append, not a transaction still committing)
+    sync_gap_grace_sec: float = Field(default=30.0, alias="SYNC_GAP_GRACE_SEC")
+
     # Email / SMTP
     smtp_host: str = Field(default="smtp", alias="SMTP_HOST")
     smtp_port: int = Field(default=25, alias="SMTP_PORT")
@@ -62,6 +66,65 @@ class Settings(BaseSettings):
     ticket_retention_days: int = Field(default=365, alias="TICKET_RETENTION_DAYS")
     queue_retention_days: int = Field(default=7, alias="QUEUE_RETENTION_DAYS")
 
+    # Max events per POST /ingest/events request
+    ingest_batch_max_events: int = Field(default=500, alias="INGEST_BATCH_MAX_EVENTS")
+    # POST /ingest/stream: group commit every N events or T ms, whichever comes first
+    ingest_stream_batch_events: int = Field(default=200, alias="INGEST_STREAM_BATCH_EVENTS")
+    ingest_stream_batch_ms: int = Field(default=250, alias="INGEST_STREAM_BATCH_MS")
+    ingest_stream_max_line_bytes: int = Field(default=65536, alias="INGEST_STREAM_MAX_LINE_BYTES")
+    # Ingest dedup keys are kept this long (gateway retries must arrive within it)
+    ingest_dedup_retention_days: int = Field(default=7, alias="INGEST_DEDUP_RETENTION_DAYS")
+    # Recently seen (source_id, event_id) keys answered from memory per process
+    ingest_dedup_cache_size: int = Field(default=100_000, alias="INGEST_DEDUP_CACHE_SIZE")
+
+    # How long a process trusts its SystemConfig snapshot before re-checking the
+    # version row (changes made by another process show up within this window)
+    system_config_ttl_sec: float = Field(default=5.0, alias="SYSTEM_CONFIG_TTL_SEC")
+
+    # plant_worker SLA scheduler: how often it picks up ticket changes from the
+    # event log (deadlines themselves fire on time, independent of this)
+    sla_scheduler_refresh_sec: float = Field(default=2.0, alias="SLA_SCHEDULER_REFRESH_SEC")
+
+    # PLC polling
+    plc_poll_workers: int = Field(default=8, alias="PLC_POLL_WORKERS")
+    plc_timeout_sec: float = Field(default=2.0, alias="PLC_TIMEOUT_SEC")
+    # Max unused registers read through to merge neighbouring tags into one request
+    plc_block_max_gap: int = Field(default=8, alias="PLC_BLOCK_MAX_GAP")
+    # Scan classes: "fast" (stop triggers by default) and "slow" (counters, diagnostics);
+    # "normal" tags keep the PLC's scan_interval_sec
+    plc_scan_fast_ms: int = Field(default=250, alias="PLC_SCAN_FAST_MS")
+    plc_scan_slow_sec: float = Field(default=30.0, alias="PLC_SCAN_SLOW_SEC")
+    # Min seconds between live-context rewrites of one open stop (deadband permitting)
+    plc_live_context_min_interval_sec: float = Field(
+        default=30.0, alias="PLC_LIVE_CONTEXT_MIN_INTERVAL_SEC"
+    )
+    # Stop trigger hysteresis (per-tag off_delay_sec overrides the default)
+    plc_trigger_off_delay_sec: float = Field(default=2.0, alias="PLC_TRIGGER_OFF_DELAY_SEC")
+    plc_flap_window_sec: float = Field(default=30.0, alias="PLC_FLAP_WINDOW_SEC")
+    # Store-and-forward journal for stop transitions while the DB is unavailable
+    # (default <REPORT_VAULT_ROOT>/plc_journal/transitions.jsonl)
+    plc_journal_path: str = Field(default="", alias="PLC_JOURNAL_PATH")
+    plc_journal_retry_sec: float = Field(default=5.0, alias="PLC_JOURNAL_RETRY_SEC")
+    # Where PLC polling runs: "embedded" (API process, leader-elected thread),
+    # "external" (apps.plant_worker.plc_poller; API workers only read the channel) or "off"
+    plc_poller_mode: str = Field(default="embedded", alias="PLC_POLLER_MODE")
+    # Share live values with other API workers via files (implied by external mode)
+    plc_live_channel: bool = Field(default=False, alias="PLC_LIVE_CHANNEL")
+    plc_channel_root: str = Field(default="", alias="PLC_CHANNEL_ROOT")
+    plc_channel_poll_sec: float = Field(default=0.5, alias="PLC_CHANNEL_POLL_SEC")
+    # File lock used for leader election when the plant DB is not PostgreSQL
+    plc_leader_lock_path: str = Field(default="", alias="PLC_LEADER_LOCK_PATH")
+    # Tag historian (in-memory rings + segment files; default <REPORT_VAULT_ROOT>/plc_history)
+    plc_history_root: str = Field(default="", alias="PLC_HISTORY_ROOT")
+    plc_history_spill: bool = Field(default=True, alias="PLC_HISTORY_SPILL")
+    plc_history_raw_samples: int = Field(default=4096, alias="PLC_HISTORY_RAW_SAMPLES")
+    plc_history_segment_bytes: int = Field(
+        default=4 * 1024 * 1024, alias="PLC_HISTORY_SEGMENT_BYTES"
+    )
+    plc_history_max_segments: int = Field(default=64, alias="PLC_HISTORY_MAX_SEGMENTS")
+    # Record raw scan results for tools/plc_replay.py (binary file; empty = off)
+    plc_record_path: str = Field(default="", alias="PLC_RECORD_PATH")
+
     # Phase-3 Intelligence (HQ add-on)
     enable_intelligence: bool = Field(default=False, alias="ENABLE_INTELLIGENCE")
     intelligence_window_days: int = Field(default=14, alias="INTELLIGENCE_WINDOW_DAYS")
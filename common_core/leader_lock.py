@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import logging
+import os
+import zlib
+from pathlib import Path
+
+from sqlalchemy import text
+
+log = logging.getLogger("assetiq.leader")
+
+
+def advisory_key(name: str) -> int:
+    """Stable signed 32-bit key for pg_try_advisory_lock."""
+    key = zlib.crc32(name.encode("utf-8"))
+    return key - (1 << 32) if key >= (1 << 31) else key
+
+
+class LeaderLock:
+    """
+    Single-leader election across processes.
+
+    On PostgreSQL this is a session-level advisory lock held on a dedicated
+    connection: it is released automatically when the process (or its
+    connection) dies. Other databases (SQLite dev setups) fall back to an
+    exclusive, non-blocking lock on `lock_path`, which only coordinates
+    processes on the same host.
+    """
+
+    def __init__(self, name: str, engine=None, lock_path: str | Path | None = None):
+        self.name = name
+        self._engine = engine
+        self._lock_path = Path(lock_path) if lock_path else None
+        self._conn = None
+        self._fh = None
+
+    @property
+    def held(self) -> bool:
+        return self._conn is not None or self._fh is not None
+
+    def _is_postgres(self) -> bool:
+        return self._engine is not None and self._engine.dialect.name == "postgresql"
+
+    def try_acquire(self) -> bool:
+        if self.held:
+            return self.still_held()
+        if self._is_postgres():
+            return self._try_pg()
+        return self._try_file()
+
+    def _try_pg(self) -> bool:
+        conn = self._engine.connect()
+        try:
+            got = conn.execute(
+                text("SELECT pg_try_advisory_lock(:k)"), {"k": advisory_key(self.name)}
+            ).scalar()
+            conn.commit()
+        except Exception:
+            conn.close()
+            raise
+        if not got:
+            conn.close()
+            return False
+        self._conn = conn
+        log.info("leader_acquired", extra={"lock": self.name, "backend": "pg_advisory"})
+        return True
+
+    def _try_file(self) -> bool:
+        if self._lock_path is None:
+            raise ValueError("lock_path is required for non-PostgreSQL databases")
+        self._lock_path.parent.mkdir(parents=True, exist_ok=True)
+        fh = open(self._lock_path, "a+")  # noqa: SIM115 - held open while leader
+        try:
+            if os.name == "nt":
+                import msvcrt
+
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            fh.close()
+            return False
+        fh.seek(0)
+        fh.truncate()
+        fh.write(str(os.getpid()))
+        fh.flush()
+        self._fh = fh
+        log.info("leader_acquired", extra={"lock": self.name, "backend": "file"})
+        return True
+
+    def still_held(self) -> bool:
+        """False once the lock can no longer be guaranteed (e.g. DB connection lost)."""
+        if self._fh is not None:
+            return True
+        if self._conn is None:
+            return False
+        try:
+            self._conn.execute(text("SELECT 1"))
+            self._conn.commit()
+            return True
+        except Exception as e:
+            log.error("leader_lost", extra={"lock": self.name, "err": str(e)})
+            self._drop_conn()
+            return False
+
+    def _drop_conn(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                conn.invalidate()
+                conn.close()
+            except Exception:
+                pass
+
+    def release(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.execute(
+                    text("SELECT pg_advisory_unlock(:k)"), {"k": advisory_key(self.name)}
+                )
+                self._conn.commit()
+                self._conn.close()
+            except Exception:
+                self._drop_conn()
+            self._conn = None
+        if self._fh is not None:
+            fh, self._fh = self._fh, None
+            try:
+                if os.name == "nt":
+                    import msvcrt
+
+                    fh.seek(0)
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+                else:
+                    import fcntl
+
+                    fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+            finally:
+                fh.close()
+        log.info("leader_released", extra={"lock": self.name})
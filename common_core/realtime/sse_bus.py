@@ -1,39 +1,57 @@
 from __future__ import annotations
 import asyncio
 import json
+import threading
 import time
 from dataclasses import dataclass
-from typing import AsyncIterator, Optional
+from typing import AsyncIterator
 
 @dataclass
 class SseEvent:
     id: str
     data_json: str
+    topic: str | None = None
 
 class SseBus:
     def __init__(self, maxlen: int = 5000):
         self._events: list[SseEvent] = []
         self._maxlen = maxlen
         self._cond = asyncio.Condition()
+        # Loop of the subscribers, so publishers on other threads (PLC poller) can wake them
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._last_ms = 0
+        # Publishers run on several threads (PLC scan workers): ids and appends under one lock
+        self._lock = threading.Lock()
 
-    def publish(self, data: dict) -> None:
-        ev_id = str(int(time.time() * 1000))
-        ev = SseEvent(id=ev_id, data_json=json.dumps(data, ensure_ascii=False))
-        self._events.append(ev)
-        if len(self._events) > self._maxlen:
-            self._events = self._events[-self._maxlen:]
+    def last_id(self) -> str | None:
+        events = self._events
+        return events[-1].id if events else None
+
+    def publish(self, data: dict, topic: str | None = None) -> None:
+        data_json = json.dumps(data, ensure_ascii=False)
+        with self._lock:
+            # Strictly increasing ids: events published in the same millisecond must not collide
+            ms = max(int(time.time() * 1000), self._last_ms + 1)
+            self._last_ms = ms
+            self._events.append(SseEvent(id=str(ms), data_json=data_json, topic=topic))
+            if len(self._events) > self._maxlen:
+                self._events = self._events[-self._maxlen:]
         async def _notify():
             async with self._cond:
                 self._cond.notify_all()
         try:
-            loop = asyncio.get_event_loop()
+            loop = asyncio.get_running_loop()
             loop.create_task(_notify())
         except RuntimeError:
-            # no loop: ignore (unit context)
-            pass
+            # not on a loop thread: hand over to the subscribers' loop, if any
+            loop = self._loop
+            if loop is not None and not loop.is_closed():
+                asyncio.run_coroutine_threadsafe(_notify(), loop)
 
-    async def subscribe(self, last_event_id: Optional[str]) -> AsyncIterator[SseEvent]:
-        start_idx = len(self._events) # default: live only
+    async def subscribe(self, last_event_id: str | None, from_start: bool = False) -> AsyncIterator[SseEvent]:
+        # from_start: replay everything retained (caller saw the bus empty)
+        self._loop = asyncio.get_running_loop()
+        start_idx = 0 if from_start and not last_event_id else len(self._events) # default: live only
         if last_event_id:
             for i, ev in enumerate(self._events):
                 if ev.id == last_event_id:
@@ -50,14 +68,28 @@ class SseBus:
         # replay existing
         for ev in self._events[start_idx:]:
             yield ev
+            last_event_id = ev.id
+        if not last_event_id:
+            # live only: do not re-send the backlog on the first wake-up
+            last_event_id = self.last_id()
 
         # live
         while True:
             async with self._cond:
-                await self._cond.wait()
-            # after wake: yield newest batch
-            for ev in self._events[-50:]:
-                if last_event_id and ev.id <= last_event_id:
-                    continue
+                # Check before waiting: a notify that ran while we were yielding is not replayed
+                batch = self._newer_than(last_event_id)
+                if not batch:
+                    await self._cond.wait()
+                    batch = self._newer_than(last_event_id)
+            for ev in batch:
                 yield ev
                 last_event_id = ev.id
+
+    def _newer_than(self, last_event_id: str | None) -> list[SseEvent]:
+        batch = []
+        for ev in reversed(self._events):
+            if last_event_id and ev.id <= last_event_id:
+                break
+            batch.append(ev)
+        batch.reverse()
+        return batch
@@ -4,12 +4,24 @@ from typing import AsyncIterator
 from common_core.realtime.sse_bus import SseEvent
 
 async def with_heartbeat(it: AsyncIterator[SseEvent], interval_s: float = 15.0) -> AsyncIterator[str]:
-    while True:
-        try:
-            ev = await asyncio.wait_for(it.__anext__(), timeout=interval_s)
+    # Keep one pending __anext__ across heartbeats: cancelling it on timeout
+    # (asyncio.wait_for) would close the source generator.
+    pending = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(it.__anext__())
+            done, _ = await asyncio.wait({pending}, timeout=interval_s)
+            if not done:
+                yield ": hb\n\n"
+                continue
+            task, pending = pending, None
+            try:
+                ev = task.result()
+            except StopAsyncIteration:
+                return
             yield f"id: {ev.id}\n"
             yield f"data: {ev.data_json}\n\n"
-        except asyncio.TimeoutError:
-            yield ": hb\n\n"
-        except StopAsyncIteration:
-            return
+    finally:
+        if pending is not None:
+            pending.cancel()
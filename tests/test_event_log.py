@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from apps.plant_backend import event_log, services
+from apps.plant_backend.models import EventLog, SyncCursor, TimelineEvent
+from apps.plant_worker import sync_agent
+from common_core.db import Base
+
+
+@pytest.fixture
+def Session(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite+pysqlite:///{tmp_path / 'events.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    monkeypatch.setattr(sync_agent, "PlantSessionLocal", Session)
+    return Session
+
+
+def _hq(monkeypatch, status=200):
+    received = []
+
+    def handler(request):
+        received.append(json.loads(request.content)["items"])
+        return httpx.Response(status)
+
+    real_client = httpx.Client
+    monkeypatch.setattr(
+        sync_agent.httpx,
+        "Client",
+        lambda **kw: real_client(transport=httpx.MockTransport(handler), **kw),
+    )
+    return received
+
+
+def test_one_row_per_fact_and_timeline_is_a_view(Session):
+    db = Session()
+    res = services.open_stop(db, "M1", "jam", None, None, None)
+    services.event_append(db, "ROLLUP", {"stops": 1}, "rollup:x", entity_type="rollup")
+    db.commit()
+
+    rows = db.execute(select(EventLog).order_by(EventLog.seq)).scalars().all()
+    assert [(r.seq, r.event_type, r.entity_type) for r in rows] == [
+        (1, "STOP_OPEN", "timeline_event"),
+        (2, "TICKET_OPEN", "ticket"),
+        (3, "ROLLUP", "rollup"),
+    ]
+    assert rows[1].entity_id == res["ticket_id"]
+    timeline = db.execute(select(TimelineEvent.event_type)).scalars().all()
+    assert sorted(timeline) == ["STOP_OPEN", "TICKET_OPEN"]
+    db.close()
+
+
+def test_push_advances_cursor_without_touching_rows(Session, monkeypatch):
+    received = _hq(monkeypatch)
+    db = Session()
+    for i in range(3):
+        services.open_stop(db, f"M{i}", "jam", None, None, None)
+    db.commit()
+
+    updates = []
+    event.listen(
+        db.get_bind(),
+        "before_cursor_execute",
+        lambda c, cur, stmt, *a: updates.append(stmt) if stmt.startswith("UPDATE") else None,
+    )
+    assert sync_agent.push_once(batch=4) == {"sent": 4}
+    assert sync_agent.push_once(batch=4) == {"sent": 2}
+    assert sync_agent.push_once(batch=4) == {"sent": 0}
+    assert all("sync_cursors" in u for u in updates)
+    assert [len(items) for items in received] == [4, 2]
+
+    cur = db.get(SyncCursor, event_log.HQ)
+    assert cur.last_seq == 6 and event_log.backlog(db) == 0
+    db.close()
+
+
+def test_failed_push_backs_off_on_the_cursor(Session, monkeypatch):
+    _hq(monkeypatch, status=503)
+    db = Session()
+    services.open_stop(db, "M1", "jam", None, None, None)
+    db.commit()
+
+    with pytest.raises(httpx.HTTPStatusError):
+        sync_agent.push_once()
+    cur = db.get(SyncCursor, event_log.HQ)
+    assert (cur.last_seq, cur.retry_count) == (0, 1)
+    assert cur.next_attempt_at_utc > datetime.utcnow()
+    assert sync_agent.push_once() == {"sent": 0}  # still backing off
+    assert event_log.backlog(db) == 2
+    db.close()
+
+
+def test_pending_waits_at_a_fresh_hole_in_seq(Session):
+    db = Session()
+    now = datetime.utcnow()
+
+    def row(seq, created):
+        return {
+            "seq": seq,
+            "site_code": "P01",
+            "event_type": "X",
+            "entity_type": "ticket",
+            "payload_json": {},
+            "correlation_id": f"c{seq}",
+            "occurred_at_utc": created,
+            "created_at_utc": created,
+        }
+
+    db.execute(insert(EventLog), [row(1, now), row(3, now)])
+    cur = event_log.cursor(db)
+    assert [r.seq for r in event_log.pending(db, cur, 10, now)] == [1]
+    later = now + timedelta(minutes=5)
+    assert [r.seq for r in event_log.pending(db, cur, 10, later)] == [1, 3]
+    db.close()
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+
+from apps.plant_backend import ingest_dedup
+from apps.plant_backend.models import IngestDedup, StopQueue
+from apps.plant_backend.routers.ingest import IngestEvent, ingest_batch
+from common_core.db import Base
+
+
+def _event(event_id, event_type="PLC_FAULT", source_id="gw1", **kw):
+    return IngestEvent(
+        event_type=event_type,
+        asset_id=kw.get("asset_id", "M1"),
+        reason=kw.get("reason", "fault"),
+        occurred_at_utc=kw.get("occurred_at_utc", "2026-01-08T00:00:00Z"),
+        source_id=source_id,
+        event_id=event_id,
+    )
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite+pysqlite:///{tmp_path / 'ingest.db'}")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(ingest_dedup, "SEEN", ingest_dedup.SeenKeys(max_entries=3))
+    return engine
+
+
+def test_batch_dedups_with_one_query_and_reports_each_event(engine):
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    db = Session()
+    results, _ = ingest_batch(db, [_event("e1")])
+    db.commit()
+    assert results[0]["status"] == "stop_opened"
+
+    dedup_statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        if "ingest_dedup" in statement:
+            dedup_statements.append(statement)
+
+    batch = [
+        _event("e1"),  # seen in an earlier batch
+        _event("e2", occurred_at_utc="2026-01-08T05:30:00+05:30"),
+        _event("e2"),  # repeated inside the batch
+        _event("e3", event_type="HEARTBEAT"),
+        _event("e1", source_id="gw2"),  # same id, other gateway
+    ]
+    results, published = ingest_batch(db, batch)
+    db.commit()
+
+    assert len(dedup_statements) == 1
+    assert [r["status"] for r in results] == [
+        "duplicate",
+        "stop_opened",
+        "duplicate",
+        "accepted",
+        "stop_opened",
+    ]
+    assert [m["stop_id"] for m in published] == [results[1]["stop_id"], results[4]["stop_id"]]
+    assert db.execute(select(func.count()).select_from(IngestDedup)).scalar() == 4
+
+    stop = db.get(StopQueue, results[1]["stop_id"])
+    assert stop.opened_at_utc.isoformat() == "2026-01-08T00:00:00"
+    db.close()
+
+
+def test_claim_is_insert_on_conflict_with_lru_front(engine):
+    Session = sessionmaker(bind=engine, autoflush=False)
+    db = Session()
+    keys = [("gw", "a"), ("gw", "b")]
+    assert ingest_dedup.claim(db, keys) == set(keys)
+    db.rollback()
+    # Rolled back: nothing was remembered, the keys are still new
+    assert ingest_dedup.claim(db, keys) == set(keys)
+    db.commit()
+    assert ingest_dedup.claim(db, keys + [("gw", "c")]) == {("gw", "c")}
+    db.commit()
+
+    ingest_dedup.SEEN.remember(keys + [("gw", "c"), ("gw", "d")])
+    assert len(ingest_dedup.SEEN) == 3 and not ingest_dedup.SEEN.seen(("gw", "a"))
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *a: statements.append(a[2]))
+    assert ingest_dedup.claim(db, [("gw", "c"), ("gw", "d")]) == set()
+    assert statements == []
+    db.close()
+
+
+def test_prune_drops_keys_past_retention(engine):
+    Session = sessionmaker(bind=engine, autoflush=False)
+    db = Session()
+    old = datetime.utcnow() - timedelta(days=30)
+    ingest_dedup.claim(db, [("gw", "old")], now=old)
+    ingest_dedup.claim(db, [("gw", "new")])
+    db.commit()
+    assert ingest_dedup.prune(db) == 1
+    db.commit()
+    assert db.execute(select(IngestDedup.event_id)).scalars().all() == ["new"]
+    db.close()
+
+
+def test_stream_group_commits_and_acks_per_batch(engine, monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from apps.plant_backend.routers import ingest
+    from common_core.config import settings
+
+    monkeypatch.setattr(ingest, "PlantSessionLocal", sessionmaker(bind=engine, autoflush=False))
+    monkeypatch.setattr(settings, "ingest_stream_batch_events", 2)
+    app = FastAPI()
+    app.include_router(ingest.router)
+
+    def body():
+        for n in range(1, 4):
+            yield _event(f"s{n}", event_type="HEARTBEAT").model_dump_json().encode() + b"\n"
+        yield b'{"not": "an event"}\n'
+        # A line split across chunks
+        line = _event("s1").model_dump_json().encode()
+        yield line[:10]
+        yield line[10:]
+
+    with TestClient(app) as client:
+        resp = client.post("/ingest/stream", content=body())
+    assert resp.status_code == 200
+    acks = [json.loads(line) for line in resp.text.splitlines()]
+
+    assert acks[0]["batch"] == 1 and [r["line"] for r in acks[0]["results"]] == [1, 2]
+    assert {"line": 4, "ok": False, "error": "INVALID_EVENT"} in acks
+    last_batch = [a for a in acks if "batch" in a][-1]
+    assert [(r["line"], r["status"]) for r in last_batch["results"]] == [
+        (3, "accepted"),
+        (5, "duplicate"),
+    ]
+    assert acks[-1] == {"done": True, "events": 4, "batches": 2}
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import re
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.orm import sessionmaker
+
+from apps.plant_backend import services
+from apps.plant_backend.models import StopQueue, Ticket
+from apps.plant_backend.routers import master, ui_assets, ui_stop_queue, ui_tickets
+from common_core.db import Base
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite+pysqlite:///{tmp_path / 'pages.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    for module in (ui_tickets, ui_stop_queue, ui_assets, master):
+        monkeypatch.setattr(module, "PlantSessionLocal", Session)
+    db = Session()
+    for _ in range(7):
+        services.open_stop(db, "M1", "jam", None, None, None)
+    db.commit()
+    yield db
+    db.close()
+
+
+def _walk(fetch, direction: str, cursor=None):
+    pages = []
+    while True:
+        resp = fetch(cursor)
+        pages.append([i["id"] for i in resp["items"]])
+        cursor = resp["page"][f"{direction}_cursor"]
+        if cursor is None:
+            return pages, resp
+
+
+def test_tickets_page_forward_and_back_across_ties(db):
+    # Three tickets share a timestamp: the id breaks the tie
+    ids = sorted(db.execute(select(Ticket.id)).scalars().all())
+    db.execute(
+        update(Ticket).where(Ticket.id.in_(ids[:3])).values(created_at_utc=datetime(2026, 1, 1))
+    )
+    db.commit()
+
+    def fetch(cursor):
+        return ui_tickets.list_tickets(status="ALL", limit=3, cursor=cursor)
+
+    forward, last = _walk(fetch, "next")
+    assert [len(p) for p in forward] == [3, 3, 1]
+    flat = [i for p in forward for i in p]
+    assert sorted(flat) == ids and flat[-3:] == sorted(ids[:3], reverse=True)
+    assert last["page"]["prev_cursor"] and last["page"]["approx_total"] is None
+
+    backward, first = _walk(fetch, "prev", last["page"]["prev_cursor"])
+    assert backward == forward[-2::-1]
+    assert first["page"]["next_cursor"]
+
+
+def test_stop_audit_and_history_pages(db):
+    stops = ui_stop_queue.list_stops(status="OPEN", limit=5)
+    assert stops["page"]["returned"] == 5
+    rest = ui_stop_queue.list_stops(status="OPEN", limit=5, cursor=stops["page"]["next_cursor"])
+    assert len(rest["items"]) == 2 and rest["page"]["next_cursor"] is None
+
+    audit = master.list_audit(limit=4)
+    more = master.list_audit(limit=4, cursor=audit["page"]["next_cursor"])
+    assert {i["id"] for i in audit["items"]}.isdisjoint(i["id"] for i in more["items"])
+
+    history, _ = _walk(lambda c: ui_assets.get_asset_history_page("M1", limit=4, cursor=c), "next")
+    assert sum(len(p) for p in history) == 14  # a stop and a ticket event per stop
+
+
+def test_asset_history_keeps_its_list_shape(db):
+    items = ui_assets.get_asset_history("M1", limit=3)
+    assert isinstance(items, list) and len(items) == 3
+    assert set(items[0]) == {"id", "type", "occurred_at", "payload"}
+    assert all(re.fullmatch(r"TL_\d{18}", i["id"]) for i in items)
+    assert items == ui_assets.get_asset_history_page("M1", limit=3)["items"]
+
+
+def test_stop_list_includes_other_sites(db):
+    # Synced or legacy rows with another site_code are still listed
+    legacy = db.execute(select(StopQueue.id).limit(1)).scalar()
+    db.execute(update(StopQueue).where(StopQueue.id == legacy).values(site_code="OLD"))
+    db.commit()
+    services.resolve_stop(db, legacy, "fixed", "u1", None)
+    db.commit()
+    for status in ("ALL", "CLOSED"):
+        ids = [i["id"] for i in ui_stop_queue.list_stops(status=status)["items"]]
+        assert legacy in ids, status
+
+
+def test_bad_cursor_is_rejected(db):
+    with pytest.raises(HTTPException) as e:
+        ui_tickets.list_tickets(cursor="not-a-cursor")
+    assert e.value.status_code == 400
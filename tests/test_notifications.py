@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from apps.plant_backend import notifications, services
+from apps.plant_backend.models import (
+    EmailQueue,
+    NotificationEvent,
+    SystemConfig,
+    WhatsAppQueue,
+)
+from apps.plant_backend.system_config import SYSTEM_CONFIG
+from common_core.db import Base
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite+pysqlite:///{tmp_path / 'notify.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    now = datetime.utcnow()
+    for k, v in {
+        "whatsappEnabled": True,
+        "whatsappTargetPhone": "+100",
+        "whatsappCloseMessageTemplate": "{ticket_code} closed: {close_note} {unknown}",
+    }.items():
+        session.add(SystemConfig(config_key=k, config_value=v, updated_at_utc=now))
+    session.commit()
+    SYSTEM_CONFIG.invalidate()
+    yield session
+    session.close()
+    SYSTEM_CONFIG.invalidate()
+
+
+def test_compiled_templates_are_cached_and_keep_unknown_fields():
+    tpl = notifications.compile_template("{a}-{b}-{missing}!")
+    assert notifications.compile_template("{a}-{b}-{missing}!") is tpl
+    assert tpl.render({"a": "1", "b": "{a}"}) == "1-{a}-{missing}!"
+
+
+def test_request_path_only_records_events(db):
+    res = services.open_stop(db, "A1", "Jam", None, None, None)
+    db.commit()
+
+    assert db.execute(select(WhatsAppQueue)).first() is None
+    assert db.execute(select(EmailQueue)).first() is None
+    events = db.execute(select(NotificationEvent)).scalars().all()
+    assert [(e.kind, e.ticket_id) for e in events] == [("STOP_OPEN", res["ticket_id"])]
+
+    assert notifications.dispatch_pending(db) == 1
+    assert notifications.dispatch_pending(db) == 0
+    (wa,) = db.execute(select(WhatsAppQueue)).scalars().all()
+    assert wa.phone_number == "+100" and wa.sla_state == "OK"
+    assert "Title: Stop: A1 - Jam" in wa.message and "Priority: HIGH" in wa.message
+    (mail,) = db.execute(select(EmailQueue)).scalars().all()
+    assert mail.subject.endswith(f"STOP A1 - Ticket {res['ticket_id']}")
+    assert "Reason=Jam" in mail.body
+
+
+def test_close_uses_configured_template(db):
+    res = services.open_stop(db, "A1", "Jam", None, None, None)
+    db.flush()
+    services.close_ticket(db, res["ticket_id"], "Cleared", "JAM", "u1")
+    db.commit()
+    notifications.dispatch_pending(db)
+
+    messages = db.execute(select(WhatsAppQueue).order_by(WhatsAppQueue.id)).scalars().all()
+    assert messages[-1].message.endswith("closed: Cleared {unknown}")
+    assert messages[-1].sla_state == "OK"
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import struct
+from types import SimpleNamespace
+
+from apps.plant_backend.plc_blocks import decode_tag, plan_blocks
+
+
+def _tag(name, address, data_type="INT16", multiplier=1.0):
+    return SimpleNamespace(
+        tag_name=name, address=address, data_type=data_type, multiplier=multiplier
+    )
+
+
+def test_contiguous_tags_share_one_block():
+    tags = [_tag("a", 0), _tag("b", 1), _tag("f", 2, "FLOAT32"), _tag("c", 4)]
+    blocks = plan_blocks(tags)
+    assert len(blocks) == 1
+    assert (blocks[0].start, blocks[0].count) == (0, 5)
+
+
+def test_gap_tolerance_and_max_registers_split_blocks():
+    tags = [_tag("a", 0), _tag("b", 5), _tag("c", 100)]
+    blocks = plan_blocks(tags, max_gap=4)
+    assert [(b.start, b.count) for b in blocks] == [(0, 6), (100, 1)]
+
+    many = [_tag(f"t{i}", i) for i in range(300)]
+    blocks = plan_blocks(many)
+    assert all(b.count <= 125 for b in blocks)
+    assert sum(len(b.tags) for b in blocks) == 300
+    assert len(blocks) == 3
+
+
+def test_decode_word_pairs_from_block():
+    hi, lo = struct.unpack(">HH", struct.pack(">f", 12.5))
+    neg_hi, neg_lo = struct.unpack(">HH", struct.pack(">i", -70000))
+    registers = [0xFFFF, hi, lo, neg_hi, neg_lo, 7]
+
+    assert decode_tag(_tag("s", 10), registers, 10) == -1
+    assert decode_tag(_tag("f", 11, "FLOAT32"), registers, 10) == 12.5
+    assert decode_tag(_tag("i", 13, "INT32"), registers, 10) == -70000
+    assert decode_tag(_tag("b", 15, "BOOL", multiplier=2.0), registers, 10) == 14.0
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from apps.plant_backend.models import PLCConfig, PLCTag, SystemConfig
+from apps.plant_backend.plc_cache import PlcConfigCache, ReasonTemplate, bump_config_version
+from common_core.db import Base
+
+
+def _session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(
+        engine, tables=[PLCConfig.__table__, PLCTag.__table__, SystemConfig.__table__]
+    )
+    return sessionmaker(bind=engine, autoflush=False)
+
+
+def test_reason_template_prefers_longest_tag_name():
+    tpl = ReasonTemplate("T=$temp, T2=$temp2$ P=$pressure bar, X=$unknown", ["temp", "temp2"])
+    assert tpl.render({"temp": 71.0, "temp2": 12.5}) == "T=71, T2=12.5 P=$pressure bar, X=$unknown"
+    # Missing value leaves the placeholder as typed
+    assert tpl.render({"temp2": 3}) == "T=$temp, T2=3 P=$pressure bar, X=$unknown"
+
+
+def test_cache_reloads_only_when_version_changes():
+    from datetime import datetime
+
+    Session = _session_factory()
+    now = [0.0]
+    cache = PlcConfigCache(session_factory=Session, check_interval_sec=5, clock=lambda: now[0])
+
+    db = Session()
+    db.add(
+        PLCConfig(
+            id="p1",
+            site_code="P01",
+            name="Line 1",
+            protocol="MODBUS_TCP",
+            ip_address="127.0.0.1",
+            port=502,
+            slave_id=1,
+            scan_interval_sec=5,
+            is_active=True,
+            created_at_utc=datetime.utcnow(),
+        )
+    )
+    db.add(PLCTag(id="t1", plc_id="p1", tag_name="run", address=0, data_type="BOOL"))
+    bump_config_version(db)
+    db.commit()
+
+    assert [t.tag_name for t in cache.tags_for("p1")] == ["run"]
+    first_version = cache.version
+
+    # Another process adds a tag and bumps the version
+    db.add(PLCTag(id="t2", plc_id="p1", tag_name="speed", address=1, data_type="INT16"))
+    bump_config_version(db)
+    db.commit()
+
+    # Within the check interval the snapshot is served from memory
+    now[0] = 1.0
+    assert len(cache.tags_for("p1")) == 1
+
+    now[0] = 6.0
+    assert sorted(t.tag_name for t in cache.tags_for("p1")) == ["run", "speed"]
+    assert cache.version == first_version + 1
+    db.close()
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from apps.plant_backend.plc_connections import CLOSED, OPEN, PlcConnectionPool
+
+
+class FakeClient:
+    def __init__(self, up):
+        self._up = up
+        self.connected = False
+        self.closed = False
+
+    def connect(self):
+        self.connected = self._up()
+        return self.connected
+
+    def close(self):
+        self.closed = True
+        self.connected = False
+
+
+def _cfg(ip="10.0.0.1"):
+    return SimpleNamespace(
+        id="plc1",
+        name="plc1",
+        protocol="MODBUS_TCP",
+        ip_address=ip,
+        port=502,
+        serial_port=None,
+        baud_rate=None,
+    )
+
+
+def test_connection_is_reused_and_rebuilt_on_endpoint_change():
+    made = []
+
+    def factory(cfg):
+        c = FakeClient(lambda: True)
+        made.append(c)
+        return c
+
+    pool = PlcConnectionPool(factory)
+    c1 = pool.acquire(_cfg())
+    assert pool.acquire(_cfg()) is c1
+    assert len(made) == 1
+
+    c2 = pool.acquire(_cfg(ip="10.0.0.2"))
+    assert c2 is not c1
+    assert c1.closed
+
+
+def test_breaker_opens_skips_and_recovers_after_probe():
+    now = [0.0]
+    up = [False]
+    attempts = []
+
+    def factory(cfg):
+        attempts.append(now[0])
+        return FakeClient(lambda: up[0])
+
+    pool = PlcConnectionPool(
+        factory, failure_threshold=2, backoff_base_sec=10, clock=lambda: now[0]
+    )
+    assert pool.acquire(_cfg()) is None
+    assert pool.acquire(_cfg()) is None
+    assert pool.stats()[0]["state"] == OPEN
+
+    # Breaker open: no connect attempt while backing off
+    now[0] = 5.0
+    assert pool.acquire(_cfg()) is None
+    assert len(attempts) == 2
+
+    # Backoff expired, probe succeeds
+    now[0] = 11.0
+    up[0] = True
+    assert pool.acquire(_cfg()) is not None
+    pool.report_success("plc1")
+    assert pool.stats()[0]["state"] == CLOSED
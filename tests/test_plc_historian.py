@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from apps.plant_backend.plc_historian import Historian, Ring
+
+
+def test_ring_keeps_latest_samples_in_order():
+    ring = Ring(4, 2)
+    for i in range(6):
+        ring.append(float(i), i * 10.0)
+    assert ring.oldest_ts() == 2.0
+    assert ring.window(3, 4.5) == [(3.0, 30.0), (4.0, 40.0)]
+
+
+def test_raw_reads_fall_back_to_spilled_segments(tmp_path):
+    hist = Historian(root=tmp_path, raw_capacity=100, segment_bytes=1024, max_segments=100)
+    t0 = 1_700_000_000.0
+    for i in range(1000):
+        hist.record("plc/1", {"speed": i, "run": True, "label": "x"}, ts=t0 + i)
+    hist.flush_all()
+
+    # Only the last 100 samples are in memory; older ones come from mmap'd segments
+    res = hist.query("plc/1", ["speed"], t0 + 850, t0 + 950)["speed"]
+    assert res["v"] == [float(i) for i in range(850, 951)]
+    res = hist.query("plc/1", ["speed"], t0 + 10, t0 + 12)["speed"]
+    assert res["t"] == [t0 + 10, t0 + 11, t0 + 12]
+    assert len(list((tmp_path / "plc_1" / "speed").glob("*.seg"))) > 1
+    assert hist.tags("plc/1") == ["run", "speed"]
+
+    # A fresh process still reads the previous run's segments
+    fresh = Historian(root=tmp_path)
+    assert fresh.query("plc/1", ["speed"], t0, t0 + 2)["speed"]["v"] == [0.0, 1.0, 2.0]
+    assert fresh.tags("plc/1") == []
+
+
+def test_query_does_not_register_unknown_tags(tmp_path):
+    hist = Historian(root=tmp_path)
+    assert hist.query("plc/1", ["nope", "gone"], 0, 1e10) == {}
+    assert hist.query("plc/1", ["nope"], 0, 1e10, "1m") == {}
+    assert hist.tags("plc/1") == []
+    assert not any(tmp_path.iterdir())
+
+
+def test_downsampled_tiers():
+    hist = Historian(spill=False)
+    t0 = 1_699_999_980.0  # minute-aligned
+    for i in range(180):
+        hist.record("p", {"temp": i % 60}, ts=t0 + i)
+    res = hist.query("p", ["temp"], t0, t0 + 179, "1m")["temp"]
+    assert res["t"] == [t0, t0 + 60, t0 + 120]
+    assert res["min"][0] == 0 and res["max"][0] == 59 and res["avg"][0] == 29.5
+    sec = hist.query("p", ["temp"], t0 + 5, t0 + 7, "1s")["temp"]
+    assert sec["avg"] == [5.0, 6.0, 7.0]
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from apps.plant_backend.plc_journal import TransitionJournal
+
+
+def test_pending_entries_survive_a_restart_and_ack_advances(tmp_path):
+    path = tmp_path / "transitions.jsonl"
+    journal = TransitionJournal(path)
+    journal.append([{"key": "a"}, {"key": "b"}])
+
+    applied = []
+    calls = iter([None, ValueError("STOP_NOT_FOUND")])
+
+    def apply(db, entry):
+        applied.append(entry["key"])
+        err = next(calls)
+        if err:
+            raise err
+
+    class FakeSession:
+        def commit(self):
+            pass
+
+        def rollback(self):
+            pass
+
+        def close(self):
+            pass
+
+    reopened = TransitionJournal(path)
+    assert [e["key"] for e in reopened.entries()] == ["a", "b"]
+    # A non-retryable entry is skipped instead of blocking the journal
+    assert reopened.replay(FakeSession, apply) == 2
+    assert applied == ["a", "b"]
+    assert reopened.pending == 0
+    assert path.read_bytes() == b""
+    assert TransitionJournal(path).pending == 0
+
+
+def test_torn_tail_is_dropped(tmp_path):
+    path = tmp_path / "transitions.jsonl"
+    path.write_bytes(b'{"key": "a"}\n{"key": "b"')
+    journal = TransitionJournal(path)
+    assert [e["key"] for e in journal.entries()] == ["a"]
+    journal.append([{"key": "c"}])
+    assert [e["key"] for e in TransitionJournal(path).entries()] == ["a", "c"]
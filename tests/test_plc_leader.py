@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import pytest
+from fastapi import HTTPException
+
+from apps.plant_backend import plc_service
+from apps.plant_backend.plc_channel import ChannelReader, LiveValueChannel
+from apps.plant_backend.plc_historian import Historian
+from apps.plant_backend.routers import plc
+from common_core.leader_lock import LeaderLock, advisory_key
+
+
+class FakeBus:
+    def __init__(self):
+        self.events = []
+
+    def publish(self, data, topic=None):
+        self.events.append((topic, data))
+
+
+def test_file_lock_elects_a_single_leader(tmp_path):
+    path = tmp_path / "plc_poller.lock"
+    first = LeaderLock("plc", lock_path=path)
+    second = LeaderLock("plc", lock_path=path)
+
+    assert first.try_acquire()
+    assert not second.try_acquire()
+    assert first.still_held()
+
+    first.release()
+    assert second.try_acquire()
+    second.release()
+    assert -(2**31) <= advisory_key("assetiq_plc_poller") < 2**31
+
+
+def test_channel_reader_applies_deltas(tmp_path):
+    channel = LiveValueChannel(root=tmp_path)
+    latest, bus = {}, FakeBus()
+    reader = ChannelReader(channel, latest, bus)
+
+    channel.publish("plc1", {"speed": 10, "run": 1})
+    assert reader.poll_once() == 1
+    assert latest["plc1"] == {"speed": 10, "run": 1}
+    assert reader.poll_once() == 0  # unchanged file is not re-read
+
+    channel.publish("plc1", {"speed": 12, "run": 1})
+    reader.poll_once()
+    assert bus.events[-1][0] == "plc1"
+    assert bus.events[-1][1]["values"] == {"speed": 12}
+
+    channel.publish_stats([{"plc_id": "plc1", "scans": 3}])
+    assert channel.read_stats() == [{"plc_id": "plc1", "scans": 3}]
+
+
+def test_external_mode_serves_history_and_connections_from_poller_files(tmp_path, monkeypatch):
+    # The poller process records and publishes; this API worker only follows the channel
+    poller = Historian(root=tmp_path / "history")
+    t0 = 1_699_999_980.0  # minute-aligned
+    for i in range(120):
+        poller.record("plc1", {"speed": i % 60}, ts=t0 + i)
+    poller.flush_all()
+    channel = LiveValueChannel(root=tmp_path / "live")
+    channel.publish_stats([], [{"plc_id": "plc1", "state": "closed", "failures": 0}])
+
+    monkeypatch.setattr(plc, "HISTORIAN", Historian(root=tmp_path / "history"))
+    monkeypatch.setattr(plc_service, "READER", ChannelReader(channel, {}, FakeBus()))
+    monkeypatch.setattr(plc_service.POOL, "stats", lambda: [])
+
+    raw = plc.get_history("plc1", start=t0, end=t0 + 2)["series"]
+    assert raw == {"speed": {"t": [t0, t0 + 1, t0 + 2], "v": [0.0, 1.0, 2.0]}}
+    tier = plc.get_history("plc1", start=t0 + 30, end=t0 + 119, resolution="1m")["series"]
+    assert tier["speed"]["t"] == [t0, t0 + 60]
+    assert tier["speed"]["min"] == [0.0, 0.0] and tier["speed"]["avg"] == [29.5, 29.5]
+    assert plc.get_connections() == [{"plc_id": "plc1", "state": "closed", "failures": 0}]
+
+    monkeypatch.setattr(plc.HISTORIAN, "spill", False)
+    with pytest.raises(HTTPException) as e:
+        plc.get_history("plc1")
+    assert e.value.status_code == 503
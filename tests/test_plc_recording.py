@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from apps.plant_backend.plc_recording import RecordingWriter, read_recording
+
+
+def test_scans_round_trip_with_deltas_and_unread_tags(tmp_path):
+    path = tmp_path / "rec.plcrec"
+    writer = RecordingWriter(path)
+    writer.write_config([{"id": "p1"}], [{"id": "t1", "plc_id": "p1", "tag_name": "a"}])
+    writer.write_scan("p1", {"a": 1, "b": 2.5}, ts=100.0)
+    writer.write_scan("p1", {"a": 1, "b": 3.0}, ts=101.0)
+    writer.write_scan("p1", {"b": 3.0}, ts=102.0, scanned={"a", "b"})  # a failed to read
+    writer.write_scan("p1", {"b": 3.0}, ts=103.0, scanned={"b"})  # a not due, not unread
+    writer.close()
+
+    frames = list(read_recording(path))
+    assert frames[0] == ("config", {"configs": [{"id": "p1"}], "tags": frames[0][1]["tags"]})
+    assert frames[1:] == [
+        ("scan", 100.0, "p1", {"a": 1.0, "b": 2.5}),
+        ("scan", 101.0, "p1", {"a": 1.0, "b": 3.0}),
+        ("scan", 102.0, "p1", {"b": 3.0}),
+        ("scan", 103.0, "p1", {"b": 3.0}),
+    ]
+
+
+def test_torn_frame_is_ignored_and_files_are_not_overwritten(tmp_path):
+    path = tmp_path / "rec.plcrec"
+    writer = RecordingWriter(path)
+    writer.write_scan("p1", {"a": 1}, ts=1.0)
+    writer.write_scan("p1", {"a": 2}, ts=2.0)
+    writer.close()
+    path.write_bytes(path.read_bytes()[:-3])
+    assert [f[1] for f in read_recording(path)] == [1.0]
+
+    second = RecordingWriter(path)
+    second.close()
+    assert second.path != path
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import threading
+from types import SimpleNamespace
+
+from apps.plant_backend.plc_scheduler import PlcScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 1000.0
+
+    def __call__(self):
+        return self.t
+
+
+def _cfg(plc_id, interval, protocol="MODBUS_TCP", serial_port=None):
+    return SimpleNamespace(
+        id=plc_id,
+        name=plc_id,
+        protocol=protocol,
+        serial_port=serial_port,
+        scan_interval_sec=interval,
+    )
+
+
+def _drain(sched: PlcScheduler):
+    for s in sched.schedules.values():
+        if s.in_flight is not None:
+            s.in_flight.result(timeout=5)
+
+
+def test_each_plc_runs_on_its_own_interval():
+    clock = FakeClock()
+    calls = []
+    sched = PlcScheduler(
+        load_configs=lambda: [_cfg("fast", 1), _cfg("slow", 5)],
+        scan=lambda plc_id, classes: calls.append(plc_id),
+        clock=clock,
+    )
+    try:
+        for _ in range(10):
+            sched.tick()
+            _drain(sched)
+            clock.t += 1.0
+        assert calls.count("fast") == 10
+        assert calls.count("slow") == 2
+    finally:
+        sched.stop(wait=True)
+
+
+def test_stalled_plc_does_not_block_others_and_reports_missed_scans():
+    clock = FakeClock()
+    release = threading.Event()
+    calls = []
+
+    def scan(plc_id, classes):
+        calls.append(plc_id)
+        if plc_id == "dead":
+            release.wait(timeout=5)
+
+    sched = PlcScheduler(
+        load_configs=lambda: [_cfg("dead", 1), _cfg("ok", 1)],
+        scan=scan,
+        clock=clock,
+    )
+    try:
+        for _ in range(4):
+            sched.tick()
+            sched.schedules["ok"].in_flight.result(timeout=5)
+            clock.t += 1.0
+
+        assert calls.count("ok") == 4
+        assert calls.count("dead") == 1
+        assert sched.schedules["dead"].missed == 3
+        release.set()
+        _drain(sched)
+    finally:
+        release.set()
+        sched.stop(wait=True)
+
+
+def test_removed_plc_is_unscheduled():
+    clock = FakeClock()
+    configs = [_cfg("a", 1), _cfg("b", 1)]
+    sched = PlcScheduler(
+        load_configs=lambda: list(configs), scan=lambda _id, _classes: None, clock=clock
+    )
+    try:
+        sched.refresh()
+        configs.pop()
+        sched.refresh()
+        assert set(sched.schedules) == {"a"}
+    finally:
+        sched.stop(wait=True)
+
+
+def test_scan_classes_run_at_their_own_rates_and_merge_when_due_together():
+    clock = FakeClock()
+    scans = []
+    sched = PlcScheduler(
+        load_configs=lambda: [_cfg("p", 1)],
+        scan=lambda plc_id, classes: scans.append((clock.t, classes)),
+        class_intervals=lambda cfg: {"fast": 0.25, "normal": 1, "slow": 2},
+        clock=clock,
+    )
+    try:
+        for _ in range(8):
+            sched.tick()
+            _drain(sched)
+            clock.t += 0.25
+
+        # One scan per fast slot; normal/slow ride along instead of extra scans
+        assert len(scans) == 8
+        assert [sorted(c) for _, c in scans[:5]] == [
+            ["fast", "normal", "slow"],
+            ["fast"],
+            ["fast"],
+            ["fast"],
+            ["fast", "normal"],
+        ]
+        assert sum("slow" in c for _, c in scans) == 1
+        stats = sched.stats()[0]["classes"]
+        assert stats["fast"]["scans"] == 8
+        assert stats["normal"]["scans"] == 2
+    finally:
+        sched.stop(wait=True)
+
+
+def test_class_due_shortly_after_joins_the_current_scan():
+    clock = FakeClock()
+    scans = []
+    sched = PlcScheduler(
+        load_configs=lambda: [_cfg("p", 1)],
+        scan=lambda plc_id, classes: scans.append(classes),
+        class_intervals=lambda cfg: {"fast": 0.3, "normal": 1},
+        clock=clock,
+    )
+    try:
+        for _ in range(4):
+            sched.tick()
+            _drain(sched)
+            clock.t += 0.3
+        # normal is next due at +1.0; the fast scan at +0.9 picks it up early
+        assert [sorted(c) for c in scans] == [
+            ["fast", "normal"],
+            ["fast"],
+            ["fast"],
+            ["fast", "normal"],
+        ]
+        assert sched.schedules["p"].class_due["normal"] == 1002.0
+    finally:
+        sched.stop(wait=True)
+
+
+def test_classes_skipped_while_busy_join_the_next_scan():
+    clock = FakeClock()
+    gate = threading.Semaphore(0)
+    scans = []
+
+    def scan(plc_id, classes):
+        scans.append(classes)
+        gate.acquire(timeout=5)
+
+    sched = PlcScheduler(
+        load_configs=lambda: [_cfg("p", 1)],
+        scan=scan,
+        class_intervals=lambda cfg: {"fast": 0.25, "normal": 0.75, "slow": 1.25},
+        clock=clock,
+    )
+    try:
+        # Every scan outlasts a fast slot, so every other fast deadline finds it busy
+        for i in range(32):
+            sched.tick()
+            if i % 2:
+                gate.release()
+                _drain(sched)
+            clock.t += 0.25
+
+        assert len(scans) == 16
+        # 8s of normal (0.75s) and slow (1.25s) slots, none lost to the busy ticks
+        assert sum("normal" in c for c in scans) == 11
+        assert sum("slow" in c for c in scans) == 7
+        assert sched.schedules["p"].missed == 16
+    finally:
+        gate.release()
+        sched.stop(wait=True)
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from apps.plant_backend import models, plc_service
+from apps.plant_backend.plc_cache import PlcConfigCache
+from apps.plant_backend.plc_connections import PlcConnectionPool
+from apps.plant_backend.plc_historian import Historian
+from apps.plant_backend.plc_triggers import OpenStopIndex, TriggerDebouncer
+from common_core.db import Base
+from tools.modbus_sim import ModbusSim, constant, ramp
+
+
+@pytest.fixture()
+def modbus_sim():
+    sim = ModbusSim({0: constant(0), 1: ramp(period=5, low=0, high=100), 2: constant(1234)})
+    sim.start()
+    yield sim
+    sim.stop()
+
+
+def test_process_plc_against_simulator(modbus_sim, monkeypatch):
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    db = Session()
+    db.add(
+        models.PLCConfig(
+            id="sim1",
+            site_code="P01",
+            name="Sim",
+            protocol="MODBUS_TCP",
+            ip_address="127.0.0.1",
+            port=modbus_sim.port,
+            slave_id=1,
+            scan_interval_sec=1,
+            is_active=True,
+            created_at_utc=datetime.utcnow(),
+        )
+    )
+    db.add(
+        models.PLCTag(
+            id="trig",
+            plc_id="sim1",
+            tag_name="fault",
+            address=0,
+            data_type="BOOL",
+            is_stop_trigger=True,
+            trigger_value=1,
+            stop_reason_template="Fault at count $count",
+            asset_id="M1",
+        )
+    )
+    db.add(models.PLCTag(id="ramp", plc_id="sim1", tag_name="speed", address=1, data_type="INT16"))
+    db.add(models.PLCTag(id="cnt", plc_id="sim1", tag_name="count", address=2, data_type="UINT16"))
+    db.commit()
+    db.close()
+
+    pool = PlcConnectionPool(plc_service.get_client)
+    monkeypatch.setattr(plc_service, "CACHE", PlcConfigCache(session_factory=Session))
+    monkeypatch.setattr(plc_service, "OPEN_STOPS", OpenStopIndex(session_factory=Session))
+    monkeypatch.setattr(plc_service, "TRIGGERS", TriggerDebouncer(0, flap_window_sec=0))
+    monkeypatch.setattr(plc_service, "HISTORIAN", Historian(spill=False))
+    monkeypatch.setattr(plc_service, "POOL", pool)
+
+    def scan(classes=None):
+        session = Session()
+        try:
+            plc_service.process_plc(session, plc_service.CACHE.get_config("sim1"), classes)
+        finally:
+            session.close()
+
+    try:
+        modbus_sim.requests = 0
+        scan()
+        assert plc_service.LATEST_VALUES["sim1"]["count"] == 1234
+        assert modbus_sim.requests == 1  # three tags, one block read
+        assert plc_service.OPEN_STOPS.get("trig") is None
+
+        modbus_sim.set(0, 1)
+        scan()
+        stop_id = plc_service.OPEN_STOPS.get("trig")
+        assert stop_id is not None
+        db = Session()
+        assert db.get(models.StopQueue, stop_id).reason == "Fault at count 1234"
+        db.close()
+
+        modbus_sim.set(0, 0)
+        scan()
+        assert plc_service.OPEN_STOPS.get("trig") is None
+
+        # Fast class only: the trigger is read, other tags keep their last value
+        modbus_sim.set(2, 99)
+        modbus_sim.requests = 0
+        scan(frozenset({"fast"}))
+        assert modbus_sim.requests == 1
+        assert plc_service.LATEST_VALUES["sim1"]["count"] == 1234
+        assert plc_service.LATEST_VALUES["sim1"]["fault"] == 0
+        scan(frozenset({"normal"}))
+        assert plc_service.LATEST_VALUES["sim1"]["count"] == 99
+    finally:
+        pool.close_all()
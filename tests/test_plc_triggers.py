@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from apps.plant_backend import models, plc_service
+from apps.plant_backend.plc_cache import PlcConfigCache
+from apps.plant_backend.plc_historian import Historian
+from apps.plant_backend.plc_journal import TransitionJournal
+from apps.plant_backend.plc_triggers import (
+    LiveContextThrottle,
+    OpenStopIndex,
+    TriggerDebouncer,
+    exceeds_deadband,
+)
+from common_core.db import Base
+
+
+class FakeResponse:
+    def __init__(self, registers):
+        self.registers = registers
+
+    def isError(self):
+        return False
+
+
+class FakeClient:
+    connected = True
+
+    def __init__(self):
+        self.memory = {}
+
+    def read_holding_registers(self, address, count=1, device_id=1):
+        return FakeResponse([self.memory.get(address + i, 0) for i in range(count)])
+
+
+@pytest.fixture()
+def plant(monkeypatch, tmp_path):
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    db = Session()
+    db.add(
+        models.PLCConfig(
+            id="plc1",
+            site_code="P01",
+            name="Line 1",
+            protocol="MODBUS_TCP",
+            ip_address="127.0.0.1",
+            port=502,
+            slave_id=1,
+            scan_interval_sec=1,
+            is_active=True,
+            created_at_utc=datetime.utcnow(),
+        )
+    )
+    db.add(
+        models.PLCTag(
+            id="tag_jam",
+            plc_id="plc1",
+            tag_name="jam",
+            address=0,
+            data_type="BOOL",
+            is_stop_trigger=True,
+            trigger_value=1,
+            stop_reason_template="Jam, speed $speed",
+            asset_id="M1",
+        )
+    )
+    db.add(
+        models.PLCTag(id="tag_speed", plc_id="plc1", tag_name="speed", address=1, deadband_abs=5)
+    )
+    db.commit()
+    db.close()
+
+    client = FakeClient()
+    monkeypatch.setattr(plc_service, "CACHE", PlcConfigCache(session_factory=Session))
+    monkeypatch.setattr(plc_service, "OPEN_STOPS", OpenStopIndex(session_factory=Session))
+    monkeypatch.setattr(plc_service, "HISTORIAN", Historian(spill=False))
+    monkeypatch.setattr(
+        plc_service, "JOURNAL", TransitionJournal(tmp_path / "journal" / "transitions.jsonl")
+    )
+    now = [0.0]
+    monkeypatch.setattr(plc_service, "LIVE_CONTEXT", LiveContextThrottle(10, clock=lambda: now[0]))
+    monkeypatch.setattr(
+        plc_service, "TRIGGERS", TriggerDebouncer(2, flap_window_sec=30, clock=lambda: now[0])
+    )
+    monkeypatch.setattr(plc_service.POOL, "acquire", lambda cfg: client)
+    monkeypatch.setattr(plc_service.POOL, "report_success", lambda plc_id: None)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *a: statements.append(a[2]))
+
+    def scan():
+        statements.clear()
+        session = Session()
+        try:
+            plc_service.process_plc(session, plc_service.CACHE.get_config("plc1"))
+        finally:
+            session.close()
+        return list(statements)
+
+    scan.now = now
+    return Session, client, scan
+
+
+def test_trigger_opens_and_closes_stop_via_indexed_column(plant):
+    Session, client, scan = plant
+    plc_service.CACHE.tags_for("plc1")  # warm the config cache
+
+    assert scan() == []  # idle trigger, no DB work
+
+    client.memory = {0: 1, 1: 42}
+    scan()
+    stop_id = plc_service.OPEN_STOPS.get("tag_jam")
+    assert stop_id is not None
+
+    db = Session()
+    sq = db.get(models.StopQueue, stop_id)
+    assert sq.trigger_tag_id == "tag_jam"
+    assert sq.reason == "Jam, speed 42"
+    db.close()
+
+    # A freshly rebuilt index (e.g. after a restart) finds the same stop
+    fresh = OpenStopIndex(session_factory=Session)
+    fresh.rebuild()
+    assert fresh.get("tag_jam") == stop_id
+
+    client.memory = {0: 0}
+    scan()
+    assert plc_service.OPEN_STOPS.get("tag_jam") == stop_id  # off delay
+    scan.now[0] += 3
+    scan()
+    assert plc_service.OPEN_STOPS.get("tag_jam") is None
+    db = Session()
+    assert db.execute(select(models.StopQueue.is_open)).scalar_one() is False
+    db.close()
+
+
+def test_live_context_written_only_beyond_deadband(plant):
+    Session, client, scan = plant
+    client.memory = {0: 1, 1: 40}
+    scan()
+    stop_id = plc_service.OPEN_STOPS.get("tag_jam")
+
+    # Unchanged trigger and values: no DB work at all
+    assert scan() == []
+
+    # Moved, but within the interval cap
+    client.memory = {0: 1, 1: 60}
+    assert scan() == []
+
+    # Past the interval but inside the 5-unit deadband of the last written value
+    scan.now[0] = 11.0
+    client.memory = {0: 1, 1: 44}
+    assert scan() == []
+
+    client.memory = {0: 1, 1: 46}
+    assert any(s.lstrip().upper().startswith("UPDATE") for s in scan())
+    db = Session()
+    assert db.get(models.StopQueue, stop_id).reason == "Jam, speed 46"
+    db.close()
+
+
+def test_exceeds_deadband_pct_and_abs():
+    class Tag:
+        deadband_abs = None
+        deadband_pct = 10
+
+    assert not exceeds_deadband(Tag, 100, 109)
+    assert exceeds_deadband(Tag, 100, 111)
+    Tag.deadband_abs = 20
+    assert not exceeds_deadband(Tag, 100, 115)
+    Tag.deadband_abs = Tag.deadband_pct = None
+    assert exceeds_deadband(Tag, 1, 1.5)
+    assert exceeds_deadband(Tag, None, 3)
+
+
+def test_flapping_trigger_merges_into_one_stop(plant):
+    Session, client, scan = plant
+    for i in range(10):
+        client.memory = {0: i % 2 == 0, 1: 42}
+        scan()
+        scan.now[0] += 1
+    stop_id = plc_service.OPEN_STOPS.get("tag_jam")
+    assert stop_id is not None
+
+    db = Session()
+    assert db.execute(select(models.StopQueue.id)).scalars().all() == [stop_id]
+    assert db.get(models.StopQueue, stop_id).live_context_json["flap_count"] == 4
+    db.close()
+
+    # After a flap the stop only resolves once the trigger stayed off for the flap window
+    client.memory = {0: 0}
+    scan.now[0] += 28  # off since the last loop scan, 29 s ago
+    scan()
+    assert plc_service.OPEN_STOPS.get("tag_jam") == stop_id
+    scan.now[0] += 2
+    scan()
+    assert plc_service.OPEN_STOPS.get("tag_jam") is None
+
+
+def test_transitions_are_journaled_while_db_is_down_and_replayed_in_order(plant, monkeypatch):
+    Session, client, scan = plant
+    real_apply = plc_service.apply_transition
+
+    def db_down(db, entry):
+        raise OperationalError("INSERT", {}, Exception("connection refused"))
+
+    monkeypatch.setattr(plc_service, "apply_transition", db_down)
+    client.memory = {0: 1, 1: 42}
+    scan()
+    stop_id = plc_service.OPEN_STOPS.get("tag_jam")
+    assert stop_id is not None  # accepted by the journal
+    opened_ts = plc_service.JOURNAL.entries()[0]["ts"]
+
+    client.memory = {0: 0}
+    scan()
+    scan.now[0] += 3
+    scan()
+    assert plc_service.OPEN_STOPS.get("tag_jam") is None
+    assert [e["kind"] for e in plc_service.JOURNAL.entries()] == ["open", "close"]
+
+    db = Session()
+    assert db.execute(select(models.StopQueue)).first() is None
+    db.close()
+
+    # DB is back, but the backlog still comes first: new transitions queue behind it
+    monkeypatch.setattr(plc_service, "apply_transition", real_apply)
+    client.memory = {0: 1}
+    scan()
+    assert plc_service.JOURNAL.pending == 3
+
+    assert plc_service.JOURNAL.replay(Session, real_apply) == 3
+    assert plc_service.JOURNAL.pending == 0
+    db = Session()
+    stops = db.execute(select(models.StopQueue).order_by(models.StopQueue.opened_at_utc)).scalars()
+    first, second = stops.all()
+    assert first.id == stop_id
+    assert first.is_open is False
+    assert first.opened_at_utc == datetime.utcfromtimestamp(opened_ts)
+    assert first.closed_at_utc > first.opened_at_utc
+    assert second.is_open is True
+    assert second.id == plc_service.OPEN_STOPS.get("tag_jam")
+    db.close()
+
+
+def test_replaying_an_entry_twice_does_not_duplicate_the_stop(plant, tmp_path):
+    Session, client, scan = plant
+    client.memory = {0: 1}
+    journal = TransitionJournal(tmp_path / "again.jsonl")
+    tag = plc_service.CACHE.tags_for("plc1")[0]
+    config = plc_service.CACHE.get_config("plc1")
+    entry = plc_service._transition("open", config, tag, 1000.0, 1, {"jam": 1})
+    journal.append([entry])
+    journal.replay(Session, plc_service.apply_transition)
+    # Crash between commit and ack: the same entry comes back
+    journal.append([entry])
+    journal.replay(Session, plc_service.apply_transition)
+
+    db = Session()
+    assert db.execute(select(func.count()).select_from(models.StopQueue)).scalar() == 1
+    assert db.execute(select(func.count()).select_from(models.Ticket)).scalar() == 1
+    db.close()
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import re
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from apps.plant_backend import services
+from apps.plant_backend.routers import master, ui_assets, ui_stop_queue, ui_tickets
+from apps.plant_worker import rollup_agent
+from apps.plant_worker.sla_scheduler import SlaScheduler
+from common_core.db import Base
+
+
+@pytest.fixture
+def plans(tmp_path, monkeypatch):
+    """Runs the real code paths and returns {table: [query plan, ...]} for their SELECTs."""
+    engine = create_engine(f"sqlite+pysqlite:///{tmp_path / 'plans.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    for module in (ui_tickets, ui_stop_queue, ui_assets, master, rollup_agent):
+        monkeypatch.setattr(module, "PlantSessionLocal", Session)
+
+    # Shaped like a plant a few months in: most tickets and stops closed
+    db = Session()
+    for i in range(40):
+        res = services.open_stop(db, f"M{i % 3}", "jam", None, None, None)
+        db.flush()
+        if i >= 4:
+            services.resolve_stop(db, res["stop_id"], "fixed", "u1", None)
+            services.close_ticket(db, res["ticket_id"], "fixed", "u1")
+    db.commit()
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+
+    captured = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    def explain(run) -> dict[str, list[str]]:
+        captured.clear()
+        event.listen(engine, "before_cursor_execute", _capture)
+        try:
+            run(db)
+        finally:
+            event.remove(engine, "before_cursor_execute", _capture)
+        out: dict[str, list[str]] = {}
+        with engine.connect() as conn:
+            for statement, parameters in captured:
+                table = re.search(r"FROM (\w+)", statement).group(1)
+                rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+                out.setdefault(table, []).append(" | ".join(r[3] for r in rows))
+        return out
+
+    yield explain
+    db.close()
+
+
+def test_sla_checks_use_open_sla_index(plans):
+    def run(db):
+        services.check_sla_warnings(db)
+        services.check_sla_breaches(db)
+        SlaScheduler().load(db)
+
+    tickets = plans(run)["tickets"]
+    assert len(tickets) == 3
+    assert all("ix_tickets_open_sla_due" in p for p in tickets), tickets
+
+
+def test_ticket_list_uses_created_indexes(plans):
+    open_plan = plans(lambda db: ui_tickets.list_tickets(status="OPEN"))["tickets"]
+    closed_plan = plans(lambda db: ui_tickets.list_tickets(status="CLOSED"))["tickets"]
+    assert "ix_tickets_not_closed_created" in open_plan[0]
+    assert "ix_tickets_status_created" in closed_plan[0]
+    assert "TEMP B-TREE" not in open_plan[0] + closed_plan[0]
+
+
+def test_stop_list_uses_opened_indexes(plans):
+    open_plan = plans(lambda db: ui_stop_queue.list_stops(status="OPEN"))["stop_queue"]
+    all_plan = plans(lambda db: ui_stop_queue.list_stops(status="ALL"))["stop_queue"]
+    closed_plan = plans(lambda db: ui_stop_queue.list_stops(status="CLOSED"))["stop_queue"]
+    assert "ix_stop_queue_open_opened" in open_plan[0]
+    assert "ix_stop_queue_opened" in all_plan[0] and "ix_stop_queue_opened" in closed_plan[0]
+    assert "TEMP B-TREE" not in open_plan[0] + all_plan[0] + closed_plan[0]
+
+
+def test_rollup_and_timeline_use_composite_indexes(plans):
+    rollup = plans(lambda db: rollup_agent.compute_rollup_once())
+    open_count, breach_count = rollup["tickets"]
+    assert "USING COVERING INDEX" in open_count
+    assert "ix_tickets_open_sla_due" in breach_count
+    assert all("ix_event_log_type_occurred" in p for p in rollup["event_log"]), rollup["event_log"]
+
+    history = plans(lambda db: ui_assets.get_asset_history("M1"))["event_log"]
+    assert "ix_event_log_asset_occurred" in history[0]
+    assert "TEMP B-TREE" not in history[0]
+
+
+def test_cursor_pages_are_index_range_scans(plans):
+    def second_page(fetch):
+        cursor = fetch(None)["page"]["next_cursor"]
+        return plans(lambda db: fetch(cursor))
+
+    tickets = second_page(lambda c: ui_tickets.list_tickets(status="CLOSED", limit=5, cursor=c))
+    stops = second_page(lambda c: ui_stop_queue.list_stops(status="ALL", limit=5, cursor=c))
+    audit = second_page(lambda c: master.list_audit(limit=5, cursor=c))
+    history = second_page(lambda c: ui_assets.get_asset_history_page("M1", limit=5, cursor=c))
+
+    for plan, index in (
+        (
+            tickets["tickets"][0],
+            "ix_tickets_status_created (status=? AND (created_at_utc,id)<(?,?))",
+        ),
+        (
+            stops["stop_queue"][0],
+            "ix_stop_queue_opened ((opened_at_utc,id)<(?,?))",
+        ),
+        (audit["audit_log"][0], "ix_audit_log_created_id (created_at_utc<?)"),
+        (
+            history["event_log"][0],
+            "ix_event_log_asset_occurred (asset_id=? AND occurred_at_utc<?)",
+        ),
+    ):
+        assert index in plan and "TEMP B-TREE" not in plan, plan
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+
+from apps.plant_backend import services
+from apps.plant_backend.models import NotificationEvent, SystemConfig, Ticket
+from apps.plant_backend.system_config import SYSTEM_CONFIG
+from apps.plant_worker.sla_scheduler import SlaScheduler
+from common_core.db import Base
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = datetime.utcnow()
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite+pysqlite:///{tmp_path / 'sla.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    now = datetime.utcnow()
+    for k, v in {"whatsappEnabled": True, "whatsappTargetPhone": "+100"}.items():
+        session.add(SystemConfig(config_key=k, config_value=v, updated_at_utc=now))
+    session.commit()
+    SYSTEM_CONFIG.invalidate()
+    yield session
+    session.close()
+    SYSTEM_CONFIG.invalidate()
+
+
+def _kinds(db):
+    return [(e.kind, e.ticket_id) for e in db.execute(select(NotificationEvent)).scalars()]
+
+
+def test_deadlines_fire_on_time_without_scanning_tickets(db):
+    clock = FakeClock()
+    old = services.open_stop(db, "M0", "jam", None, None, None)["ticket_id"]
+    db.commit()
+
+    sched = SlaScheduler(clock=clock)
+    assert sched.load(db) == 1
+    due = db.get(Ticket, old).sla_due_at_utc
+    assert sched.next_deadline() == due - timedelta(minutes=60)
+
+    # Picked up from the event log: one new ticket, one closed
+    new = services.open_stop(db, "M1", "jam", None, None, None)["ticket_id"]
+    services.close_ticket(db, old, "fixed", "u1")
+    db.commit()
+
+    statements = []
+    event.listen(
+        db.get_bind(), "before_cursor_execute", lambda c, cur, stmt, *a: statements.append(stmt)
+    )
+    assert sched.refresh(db) == 2
+    assert len(sched) == 1
+    assert not any("FROM tickets" in s and "WHERE tickets.status" in s for s in statements)
+
+    new_due = db.get(Ticket, new).sla_due_at_utc
+    clock.now = new_due - timedelta(minutes=60, seconds=1)
+    assert sched.fire_due(db) == (0, 0)
+    clock.now += timedelta(seconds=1)
+    assert sched.fire_due(db) == (1, 0)
+    assert sched.next_deadline() == new_due
+    clock.now = new_due + timedelta(seconds=1)
+    assert sched.fire_due(db) == (0, 1)
+    assert len(sched) == 0 and sched.next_deadline() is None
+
+    assert [k for k in _kinds(db) if k[0].startswith("SLA")] == [
+        ("SLA_WARNING", new),
+        ("SLA_BREACH", new),
+    ]
+    t = db.get(Ticket, new)
+    assert t.sla_warning_sent and t.sla_breach_sent
+
+
+def test_threshold_change_reschedules_warnings(db):
+    clock = FakeClock()
+    tid = services.open_stop(db, "M1", "jam", None, None, None)["ticket_id"]
+    db.commit()
+    sched = SlaScheduler(clock=clock)
+    sched.load(db)
+    due = db.get(Ticket, tid).sla_due_at_utc
+
+    db.add(
+        SystemConfig(
+            config_key="whatsappSlaWarningThresholdMinutes",
+            config_value=150,
+            updated_at_utc=clock.now,
+        )
+    )
+    from apps.plant_backend.system_config import bump_config_version
+
+    bump_config_version(db)
+    db.commit()
+    SYSTEM_CONFIG.invalidate()
+
+    sched.refresh(db)
+    assert sched.next_deadline() == due - timedelta(minutes=150)
+    assert sched.fire_due(db) == (1, 0)
+
+
+def test_reenabling_whatsapp_without_version_bump_fires_overdue(db):
+    def set_enabled(value):
+        db.get(SystemConfig, "whatsappEnabled").config_value = value
+        db.commit()
+        SYSTEM_CONFIG.invalidate()  # reloads, version unchanged
+
+    clock = FakeClock()
+    tid = services.open_stop(db, "M1", "jam", None, None, None)["ticket_id"]
+    db.commit()
+    set_enabled(False)
+    sched = SlaScheduler(clock=clock)
+    sched.load(db)
+
+    clock.now = db.get(Ticket, tid).sla_due_at_utc + timedelta(seconds=1)
+    assert sched.fire_due(db) == (0, 0)
+    assert sched.next_deadline() is None and len(sched) == 1
+
+    set_enabled(True)
+    sched.refresh(db)
+    assert sched.fire_due(db) == (0, 1)
+    assert ("SLA_BREACH", tid) in _kinds(db)
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+
+from common_core.realtime.sse_bus import SseBus
+from common_core.realtime.sse_heartbeat import with_heartbeat
+
+
+def test_publish_from_thread_wakes_subscriber_and_filters_by_topic():
+    bus = SseBus(maxlen=100)
+    bus.publish({"n": 0}, topic="a")  # backlog before subscribing is not re-sent
+
+    async def main():
+        sub = bus.subscribe(last_event_id=bus.last_id())
+        first = asyncio.ensure_future(sub.__anext__())
+        await asyncio.sleep(0.05)
+
+        def poller():
+            for n in range(1, 4):
+                bus.publish({"n": n}, topic="b" if n == 2 else "a")
+
+        threading.Thread(target=poller).start()
+        got = [await asyncio.wait_for(first, 2)]
+        while len(got) < 3:
+            got.append(await asyncio.wait_for(sub.__anext__(), 2))
+        return got
+
+    events = asyncio.run(main())
+    assert [json.loads(e.data_json)["n"] for e in events] == [1, 2, 3]
+    assert [e.topic for e in events] == ["a", "b", "a"]
+    # Same-millisecond publishes still get distinct, increasing ids
+    assert len({e.id for e in events}) == 3
+    assert [e.id for e in events] == sorted(e.id for e in events)
+
+
+def test_heartbeat_does_not_close_the_source():
+    bus = SseBus(maxlen=100)
+
+    async def main():
+        stream = with_heartbeat(bus.subscribe(last_event_id=None), interval_s=0.05)
+        assert await stream.__anext__() == ": hb\n\n"
+        bus.publish({"type": "late"})
+        chunks = [await stream.__anext__() for _ in range(2)]
+        await stream.aclose()
+        return chunks
+
+    chunks = asyncio.run(main())
+    assert chunks[0].startswith("id: ")
+    assert json.loads(chunks[1][len("data: ") :]) == {"type": "late"}
+
+
+def test_concurrent_publishers_get_unique_increasing_ids():
+    bus = SseBus(maxlen=10_000)
+
+    def publisher():
+        for n in range(500):
+            bus.publish({"n": n})
+
+    threads = [threading.Thread(target=publisher) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    ids = [int(ev.id) for ev in bus._events]
+    assert len(ids) == 4000 and ids == sorted(set(ids))
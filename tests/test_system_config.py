@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+
+from apps.plant_backend import notifications, plc_cache, services, system_config
+from apps.plant_backend.models import SystemConfig, Ticket, WhatsAppQueue
+from apps.plant_backend.system_config import SystemConfigCache, bump_config_version
+from common_core.db import Base
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite+pysqlite:///{tmp_path / 'cfg.db'}")
+    Base.metadata.create_all(engine)
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        if "system_config" in statement:
+            statements.append(statement)
+
+    clock = FakeClock()
+    cache = SystemConfigCache(ttl_sec=5.0, clock=clock)
+    monkeypatch.setattr(system_config, "SYSTEM_CONFIG", cache)
+    monkeypatch.setattr(services, "SYSTEM_CONFIG", cache)
+    monkeypatch.setattr(notifications, "SYSTEM_CONFIG", cache)
+    return sessionmaker(bind=engine, autoflush=False), cache, clock, statements
+
+
+def _set(db, **values):
+    now = datetime.utcnow()
+    for k, v in values.items():
+        row = db.get(SystemConfig, k)
+        if row:
+            row.config_value = v
+        else:
+            db.add(SystemConfig(config_key=k, config_value=v, updated_at_utc=now))
+    bump_config_version(db)
+    db.commit()
+
+
+def test_snapshot_reloads_only_on_version_change(env):
+    Session, cache, clock, statements = env
+    db = Session()
+    _set(db, whatsappEnabled=True, whatsappTargetPhone="+100", whatsappSlaWarningThresholdMinutes=0)
+
+    snap = cache.snapshot(db)
+    assert snap.whatsapp_active and snap.whatsapp_target_phone == "+100"
+    assert snap.sla_warning_threshold_minutes == 60  # invalid value falls back to default
+    assert "systemConfigVersion" not in snap.values
+
+    # Within the TTL nothing is queried
+    statements.clear()
+    clock.t = 4.0
+    assert cache.snapshot(db) is snap
+    assert statements == []
+
+    # After the TTL only the version row is read while nothing changed
+    clock.t = 6.0
+    assert cache.snapshot(db) is snap
+    assert len(statements) == 1
+
+    # Another process changed the config: picked up once the TTL expires
+    other = Session()
+    _set(other, whatsappTargetPhone="+200")
+    other.close()
+    assert cache.snapshot(db).whatsapp_target_phone == "+100"
+    clock.t = 12.0
+    assert cache.snapshot(db).whatsapp_target_phone == "+200"
+
+    # A write in this process invalidates immediately
+    _set(db, whatsappEnabled=False)
+    cache.invalidate()
+    assert not cache.snapshot(db).whatsapp_active
+    db.close()
+
+
+def test_sla_breach_check_reads_config_once(env):
+    Session, cache, _clock, statements = env
+    db = Session()
+    _set(
+        db,
+        whatsappEnabled=True,
+        whatsappTargetPhone="+100",
+        whatsappBreachMessageTemplate="{ticket_code} {sla_state}",
+    )
+    now = datetime.utcnow()
+    for i in range(5):
+        db.add(
+            Ticket(
+                id=f"T{i}",
+                ticket_code=f"C{i}",
+                site_code="S1",
+                asset_id="A1",
+                title="t",
+                status="OPEN",
+                priority="HIGH",
+                source="AUTO",
+                created_at_utc=now - timedelta(hours=2),
+                sla_due_at_utc=now - timedelta(minutes=5),
+            )
+        )
+    db.commit()
+
+    statements.clear()
+    assert services.check_sla_breaches(db) == 5
+    assert len(statements) == 2  # version + one table load, not one lookup per ticket
+    notifications.dispatch_pending(db)
+    messages = sorted(m.message for m in db.execute(select(WhatsAppQueue)).scalars())
+    assert messages == [f"C{i} BREACHED" for i in range(5)]
+    db.close()
+
+
+def test_plc_and_system_config_versions_are_separate_rows(env):
+    Session, *_ = env
+    db = Session()
+    assert bump_config_version(db) == 1
+    assert plc_cache.bump_config_version(db) == 1
+    assert plc_cache.bump_config_version(db) == 2
+    db.commit()
+    assert db.get(SystemConfig, system_config.CONFIG_VERSION_KEY).config_value == 1
+    assert db.get(SystemConfig, plc_cache.CONFIG_VERSION_KEY).config_value == 2
+    db.close()
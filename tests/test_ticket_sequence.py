@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import threading
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from apps.plant_backend import services
+from common_core.db import Base
+
+
+def _sessions(tmp_path):
+    engine = create_engine(f"sqlite+pysqlite:///{tmp_path / 'seq.db'}")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine, autoflush=False)
+
+
+def test_serials_are_per_site_and_day(tmp_path):
+    Session = _sessions(tmp_path)
+    db = Session()
+    assert services._next_ticket_serial(db, "S1", "20000101") == 1
+    assert services._next_ticket_serial(db, "S1", "20000101") == 2
+    assert services._next_ticket_serial(db, "S2", "20000101") == 1
+    assert services._next_ticket_serial(db, "S1", "20000102") == 1
+    db.commit()
+    db.close()
+
+    code = services._generate_ticket_code(Session())
+    date_str, _time_str, serial = code.split("-")
+    assert len(date_str) == 8 and serial == "0001"
+
+
+def test_concurrent_creates_never_share_a_code(tmp_path):
+    Session = _sessions(tmp_path)
+    serials = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(10):
+            db = Session()
+            try:
+                serial = services._next_ticket_serial(db, "S1", "20000101")
+                db.commit()
+            finally:
+                db.close()
+            with lock:
+                serials.append(serial)
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(serials) == list(range(1, 61))
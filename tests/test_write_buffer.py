@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import re
+from collections import Counter
+
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+
+from apps.plant_backend import services, write_buffer
+from apps.plant_backend.models import AuditLog, EventLog, TicketActivity, TimelineEvent
+from common_core.db import Base
+
+
+def _count(db, model):
+    return db.execute(select(func.count()).select_from(model)).scalar()
+
+
+def test_side_effect_rows_are_written_with_one_insert_per_table(tmp_path):
+    engine = create_engine(f"sqlite+pysqlite:///{tmp_path / 'wb.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    inserts = Counter()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _seen(conn, cursor, statement, parameters, context, executemany):
+        m = re.match(r"\s*INSERT INTO (\w+)", statement)
+        if m:
+            inserts[m.group(1)] += 1
+
+    db = Session()
+    stops = [services.open_stop(db, f"M{i}", "jam", None, None, None) for i in range(10)]
+    assert write_buffer.staged(db, EventLog)
+    db.commit()
+
+    # 10 stops: 20 event log (all on the timeline) + 10 audit + 10 activity rows
+    assert _count(db, EventLog) == 20 and _count(db, TimelineEvent) == 20
+    for table in ("event_log", "audit_log", "ticket_activities"):
+        assert inserts[table] == 1, table
+    assert not write_buffer.staged(db, EventLog)
+
+    # Rolled back: the staged rows go with the transaction
+    services.acknowledge_ticket(db, stops[0]["ticket_id"], "u1", None)
+    db.rollback()
+    assert not write_buffer.staged(db, AuditLog)
+    db.commit()
+    assert _count(db, TicketActivity) == 10
+    db.close()
+
+
+def test_savepoint_rollback_keeps_rows_staged_before_it(tmp_path):
+    engine = create_engine(f"sqlite+pysqlite:///{tmp_path / 'sp.db'}")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+
+    def append(asset_id):
+        services.event_append(db, "NOTE", {}, f"note-{asset_id}", asset_id=asset_id)
+
+    append("M1")
+    sp = db.begin_nested()
+    append("M2")
+    sp.rollback()
+    assert len(write_buffer.staged(db, EventLog)) == 1
+
+    # Flushed inside a savepoint: only its own rows are written there
+    sp = db.begin_nested()
+    append("M3")
+    write_buffer.write_staged(db)
+    assert len(write_buffer.staged(db, EventLog)) == 1
+    sp.rollback()
+
+    with db.begin_nested():
+        append("M4")  # released: kept
+    db.commit()
+    assets = db.execute(select(TimelineEvent.asset_id)).scalars().all()
+    assert sorted(assets) == ["M1", "M4"]
+    db.close()
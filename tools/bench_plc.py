@@ -0,0 +1,263 @@
+"""
+PLC poller benchmark against in-process Modbus simulators (no hardware needed).
+
+    python tools/bench_plc.py --plcs 10 --tags 200 --duration 30
+    python tools/bench_plc.py --db-url postgresql+psycopg2://... --json
+
+Seeds PLCConfig/PLCTag rows into a throwaway database (a temp SQLite file unless
+--db-url is given), starts one simulator per PLC and runs plc_service.run_loop for
+--duration seconds. Tag 0 of every PLC is a stop trigger driven by a square wave.
+
+Reports scan latency percentiles, Modbus requests per scan, DB statements per
+scan and stop open/close latency (simulated trigger edge -> scan that committed
+the stop). Close latency includes the trigger off delay.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine, event
+
+from apps.plant_backend import plc_service
+from apps.plant_backend.models import PLCConfig, PLCTag
+from apps.plant_backend.plc_historian import Historian
+from common_core.db import Base, PlantSessionLocal
+from tools.modbus_sim import ModbusSim, constant, ramp, sine, square
+
+
+def percentiles(samples: list[float], ps=(50, 90, 99)) -> dict:
+    if not samples:
+        return {f"p{p}": None for p in ps} | {"max": None, "n": 0}
+    ordered = sorted(samples)
+    out = {}
+    for p in ps:
+        rank = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered) + 0.5) - 1))
+        out[f"p{p}"] = ordered[rank]
+    out["max"] = ordered[-1]
+    out["n"] = len(ordered)
+    return out
+
+
+def _waveform(i: int):
+    kind = i % 3
+    if kind == 0:
+        return ramp(period=10 + i % 7, low=0, high=1000)
+    if kind == 1:
+        return sine(period=5 + i % 11, low=0, high=500)
+    return constant(i)
+
+
+def start_simulators(plcs: int, tags: int, trigger_period: float) -> list[ModbusSim]:
+    sims = []
+    for _ in range(plcs):
+        waves = {0: square(trigger_period, phase=random.uniform(0, trigger_period))}
+        waves.update({addr: _waveform(addr) for addr in range(1, tags)})
+        sims.append(ModbusSim(waves, size=max(1024, tags + 16)).start())
+    return sims
+
+
+def seed(
+    Session, sims: list[ModbusSim], tags: int, interval: int
+) -> dict[str, tuple[str, ModbusSim]]:
+    """Creates one PLC per simulator; returns {plc_id: (trigger_tag_id, sim)}."""
+    db = Session()
+    plcs = {}
+    for n, sim in enumerate(sims):
+        plc_id = f"BENCH{n:03d}"
+        db.add(
+            PLCConfig(
+                id=plc_id,
+                site_code="BENCH",
+                name=f"Bench PLC {n}",
+                protocol="MODBUS_TCP",
+                ip_address="127.0.0.1",
+                port=sim.port,
+                slave_id=1,
+                scan_interval_sec=interval,
+                is_active=True,
+                created_at_utc=datetime.utcnow(),
+            )
+        )
+        trigger_id = uuid.uuid4().hex
+        db.add(
+            PLCTag(
+                id=trigger_id,
+                plc_id=plc_id,
+                tag_name="trigger",
+                address=0,
+                data_type="BOOL",
+                is_stop_trigger=True,
+                trigger_value=1,
+                stop_reason_template="Bench stop, t1=$t1",
+                asset_id=f"BENCH-ASSET-{n}",
+            )
+        )
+        for addr in range(1, tags):
+            db.add(
+                PLCTag(
+                    id=uuid.uuid4().hex,
+                    plc_id=plc_id,
+                    tag_name=f"t{addr}",
+                    address=addr,
+                    data_type="INT16",
+                )
+            )
+        plcs[plc_id] = (trigger_id, sim)
+    db.commit()
+    db.close()
+    return plcs
+
+
+def run_benchmark(
+    plcs: int = 5,
+    tags: int = 200,
+    duration: float = 20.0,
+    interval: int = 1,
+    trigger_period: float = 8.0,
+    workers: int | None = None,
+    db_url: str | None = None,
+) -> dict:
+    workdir = Path(tempfile.mkdtemp(prefix="plc_bench_"))
+    if db_url is None:
+        db_url = f"sqlite+pysqlite:///{workdir / 'bench.db'}"
+    plc_service.HISTORIAN = Historian(root=workdir / "plc_history")
+    engine = create_engine(db_url, pool_pre_ping=True)
+    Base.metadata.create_all(engine)
+    PlantSessionLocal.configure(bind=engine)
+    if workers:
+        plc_service.settings.plc_poll_workers = workers
+
+    local = threading.local()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(*_args):
+        local.statements = getattr(local, "statements", 0) + 1
+
+    sims = start_simulators(plcs, tags, trigger_period)
+    lock = threading.Lock()
+    scan_sec: list[float] = []
+    statements: list[int] = []
+    open_lat: list[float] = []
+    close_lat: list[float] = []
+    try:
+        bench_plcs = seed(PlantSessionLocal, sims, tags, interval)
+        plc_service.CACHE.invalidate()
+        real_scan = plc_service.scan_plc
+
+        def instrumented_scan(plc_id: str, classes=None) -> None:
+            trigger_id, sim = bench_plcs[plc_id]
+            before = plc_service.OPEN_STOPS.get(trigger_id)
+            local.statements = 0
+            t0 = time.perf_counter()
+            real_scan(plc_id, classes)
+            elapsed = time.perf_counter() - t0
+            after = plc_service.OPEN_STOPS.get(trigger_id)
+            edge_age = time.time() - sim.last_change.get(0, time.time())
+            with lock:
+                scan_sec.append(elapsed)
+                statements.append(local.statements)
+                if before is None and after is not None:
+                    open_lat.append(edge_age)
+                elif before is not None and after is None:
+                    close_lat.append(edge_age)
+
+        # run_loop resolves scan_plc from the module at scheduler start
+        plc_service.scan_plc = instrumented_scan
+        for sim in sims:
+            sim.requests = 0
+        loop = threading.Thread(target=plc_service.run_loop, daemon=True)
+        loop.start()
+        time.sleep(duration)
+        if plc_service.SCHEDULER is not None:
+            plc_service.SCHEDULER.stop(wait=True)
+        loop.join(timeout=30)
+        plc_service.scan_plc = real_scan
+    finally:
+        for sim in sims:
+            sim.stop()
+
+    scans = len(scan_sec)
+    return {
+        "plcs": plcs,
+        "tags_per_plc": tags,
+        "duration_sec": duration,
+        "scan_interval_sec": interval,
+        "scans": scans,
+        "scan_latency_ms": {
+            k: (round(v * 1000, 2) if isinstance(v, float) else v)
+            for k, v in percentiles(scan_sec).items()
+        },
+        "modbus_requests_per_scan": round(sum(s.requests for s in sims) / scans, 2)
+        if scans
+        else None,
+        "db_statements_per_scan": percentiles([float(s) for s in statements])
+        | {"avg": round(sum(statements) / scans, 2) if scans else None},
+        "stop_open_latency_ms": {
+            k: (round(v * 1000, 1) if isinstance(v, float) else v)
+            for k, v in percentiles(open_lat).items()
+        },
+        "stop_close_latency_ms": {
+            k: (round(v * 1000, 1) if isinstance(v, float) else v)
+            for k, v in percentiles(close_lat).items()
+        },
+        "scheduler": plc_service.SCHEDULER.stats() if plc_service.SCHEDULER else [],
+    }
+
+
+def _print_report(r: dict) -> None:
+    print("-" * 60)
+    print(
+        f"PLC bench: {r['plcs']} PLCs x {r['tags_per_plc']} tags, "
+        f"{r['scan_interval_sec']}s interval, {r['duration_sec']}s"
+    )
+    print(f"scans:                  {r['scans']}")
+    print(f"scan latency (ms):      {r['scan_latency_ms']}")
+    print(f"modbus requests/scan:   {r['modbus_requests_per_scan']}")
+    print(f"db statements/scan:     {r['db_statements_per_scan']}")
+    print(f"stop open latency (ms): {r['stop_open_latency_ms']}")
+    print(f"stop close latency(ms): {r['stop_close_latency_ms']}")
+    print("-" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the PLC poller against simulators")
+    parser.add_argument("--plcs", type=int, default=5)
+    parser.add_argument("--tags", type=int, default=200, help="tags per PLC (incl. trigger)")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds to run")
+    parser.add_argument("--interval", type=int, default=1, help="PLC scan interval (sec)")
+    parser.add_argument("--trigger-period", type=float, default=8.0, help="trigger square wave")
+    parser.add_argument("--workers", type=int, default=None, help="PLC_POLL_WORKERS override")
+    parser.add_argument("--db-url", default=None, help="default: temp SQLite file")
+    parser.add_argument("--json", action="store_true", help="print the raw JSON report")
+    args = parser.parse_args()
+
+    report = run_benchmark(
+        plcs=args.plcs,
+        tags=args.tags,
+        duration=args.duration,
+        interval=args.interval,
+        trigger_period=args.trigger_period,
+        workers=args.workers,
+        db_url=args.db_url,
+    )
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+    else:
+        _print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,7 @@ import sys
 sys.path.append(os.getcwd())
 
 from common_core.db import PlantSessionLocal
-from apps.plant_backend.models import Asset, MasterType, MasterItem, StopQueue, Ticket, TicketActivity, TimelineEvent, AuditLog, ReportRequest, EventOutbox, EmailQueue
+from apps.plant_backend.models import Asset, MasterType, MasterItem, StopQueue, Ticket, TicketActivity, EventLog, SyncCursor, AuditLog, ReportRequest, EmailQueue
 
 def clean():
     db = PlantSessionLocal()
@@ -17,10 +17,10 @@ def clean():
         db.query(TicketActivity).delete()
         db.query(Ticket).delete()
         db.query(StopQueue).delete()
-        db.query(TimelineEvent).delete()
+        db.query(EventLog).delete()
+        db.query(SyncCursor).delete()
         db.query(AuditLog).delete()
         db.query(ReportRequest).delete()
-        db.query(EventOutbox).delete()
         db.query(EmailQueue).delete()
         
         # Optional: Clear assets and masters for a totally fresh start
@@ -0,0 +1,161 @@
+"""
+In-process Modbus TCP simulator with scripted holding-register waveforms.
+
+Used by the PLC poller tests and tools/bench_plc.py so plc_service can be
+exercised without hardware:
+
+    sim = ModbusSim({0: square(period=4), 1: ramp(period=10, low=0, high=100)})
+    sim.start()
+    ...  # point a PLCConfig at 127.0.0.1:sim.port
+    sim.stop()
+
+Each simulator runs its own asyncio loop on a daemon thread. Waveforms are
+functions of seconds since start() and are re-evaluated every `tick` seconds.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import socket
+import threading
+import time
+from collections.abc import Callable
+
+from pymodbus.server import ModbusTcpServer
+from pymodbus.simulator import DataType, SimData, SimDevice
+
+Waveform = Callable[[float], int]
+
+
+def constant(value: int) -> Waveform:
+    return lambda t: value
+
+
+def square(period: float, duty: float = 0.5, high: int = 1, low: int = 0, phase: float = 0.0):
+    return lambda t: high if ((t + phase) % period) < period * duty else low
+
+
+def ramp(period: float, low: int = 0, high: int = 100) -> Waveform:
+    return lambda t: int(low + (high - low) * ((t % period) / period))
+
+
+def sine(period: float, low: int = 0, high: int = 100) -> Waveform:
+    mid, amp = (high + low) / 2, (high - low) / 2
+    return lambda t: int(round(mid + amp * math.sin(2 * math.pi * t / period)))
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class ModbusSim:
+    def __init__(
+        self,
+        waveforms: dict[int, Waveform] | None = None,
+        size: int = 1024,
+        port: int | None = None,
+        tick: float = 0.05,
+    ):
+        self.waveforms = dict(waveforms or {})
+        self.port = port or free_port()
+        self.tick = tick
+        self.requests = 0  # request PDUs received
+        # address -> wall-clock time of the last value change
+        self.last_change: dict[int, float] = {}
+        self._values: dict[int, int] = {}
+        # id=0 answers every device/slave id
+        self._device = SimDevice(
+            id=0,
+            simdata=[SimData(0, count=size, values=0, datatype=DataType.REGISTERS)],
+            action=self._sync_registers,
+        )
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._server: ModbusTcpServer | None = None
+        self._thread: threading.Thread | None = None
+        self._ready = threading.Event()
+        self._error: BaseException | None = None
+        self._t0 = 0.0
+
+    def _trace_pdu(self, sending: bool, pdu):
+        if not sending:
+            self.requests += 1
+        return pdu
+
+    async def _sync_registers(self, func_code, start_address, address, count, registers, values):
+        # Called by the server on every request; copies the current waveform values in
+        for addr, value in list(self._values.items()):
+            registers[addr - start_address] = value
+        return None
+
+    def set(self, address: int, value: int) -> None:
+        """Pins a register to a value (replaces its waveform) with immediate effect."""
+        self.waveforms[address] = constant(value)
+        self._apply()
+
+    def _apply(self) -> None:
+        t = time.monotonic() - self._t0
+        now = time.time()
+        for address, wave in list(self.waveforms.items()):
+            value = int(wave(t)) & 0xFFFF
+            if self._values.get(address) != value:
+                self._values[address] = value
+                self.last_change[address] = now
+
+    async def _waveforms(self) -> None:
+        while True:
+            self._apply()
+            await asyncio.sleep(self.tick)
+
+    def _serve(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+
+        async def main():
+            # The transport binds to the running loop, so build the server inside it
+            self._server = ModbusTcpServer(
+                self._device, address=("127.0.0.1", self.port), trace_pdu=self._trace_pdu
+            )
+            await self._server.serve_forever(background=True)
+            updater = asyncio.create_task(self._waveforms())
+            self._ready.set()
+            try:
+                await self._server.serving
+            finally:
+                updater.cancel()
+
+        try:
+            loop.run_until_complete(main())
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._ready.set()
+            loop.close()
+
+    def start(self, timeout: float = 5.0) -> ModbusSim:
+        self._t0 = time.monotonic()
+        self._apply()
+        self._thread = threading.Thread(
+            target=self._serve, name=f"modbus-sim-{self.port}", daemon=True
+        )
+        self._thread.start()
+        if not self._ready.wait(timeout):
+            raise RuntimeError(f"Modbus simulator on port {self.port} did not start")
+        if self._error is not None:
+            raise RuntimeError(f"Modbus simulator on port {self.port} failed: {self._error}")
+        return self
+
+    def stop(self) -> None:
+        if self._loop is not None and self._server is not None and not self._loop.is_closed():
+            asyncio.run_coroutine_threadsafe(self._server.shutdown(), self._loop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> ModbusSim:
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
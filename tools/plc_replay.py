@@ -0,0 +1,557 @@
+"""
+Record / replay PLC poll results for stop-storm load tests.
+
+Recording: set PLC_RECORD_PATH on the poller (plant_backend or plc_poller) and
+every scan result is appended to that binary file (apps.plant_backend.plc_recording).
+No recording at hand? Generate a synthetic shift:
+
+    python tools/plc_replay.py synth shift.plcrec --plcs 10 --hours 8 --stops 400
+
+Replay feeds the recorded reads through plc_service.process_plc (trigger
+debouncing, stop services, SSE deltas) against a throwaway database, at 1x-100x:
+
+    python tools/plc_replay.py replay shift.plcrec --speed 100
+    python tools/plc_replay.py replay shift.plcrec --speed 20 --db-url postgresql+psycopg2://...
+    python tools/plc_replay.py info shift.plcrec
+
+Latencies are measured from the moment a trigger register change is due in
+replay time to the commit of the StopQueue row, the PLC_VALUES SSE publish
+carrying the change and the commit of the STOP_OPEN / STOP_RESOLVE outbox row.
+Trigger delays (on/off delay) run on replay time, so their share of the
+latency shrinks with --speed. Stop timestamps are wall-clock replay time.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import queue
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine, event, func, select
+
+from apps.plant_backend import plc_service, write_buffer
+from apps.plant_backend.models import EventLog, PLCConfig, PLCTag, StopQueue
+from apps.plant_backend.plc_cache import PlcConfigCache
+from apps.plant_backend.plc_historian import Historian
+from apps.plant_backend.plc_journal import TransitionJournal
+from apps.plant_backend.plc_recording import RecordingWriter, read_recording
+from apps.plant_backend.plc_triggers import LiveContextThrottle, OpenStopIndex, TriggerDebouncer
+from common_core.config import settings
+from common_core.db import Base, PlantSessionLocal
+from tools.bench_plc import percentiles
+
+# ---------------------------------------------------------------------------
+# Synthetic recording
+# ---------------------------------------------------------------------------
+
+
+def _stop_windows(n: int, span: float, rng: random.Random) -> list[tuple[float, float]]:
+    starts = sorted(rng.uniform(0, span) for _ in range(n))
+    windows = []
+    for i, start in enumerate(starts):
+        limit = (starts[i + 1] if i + 1 < len(starts) else span) - start - 5
+        windows.append((start, start + max(3.0, min(rng.uniform(30, 600), limit))))
+    return windows
+
+
+def synth(
+    path: str,
+    plcs: int = 10,
+    tags: int = 50,
+    hours: float = 8.0,
+    stops: int = 400,
+    interval: float = 1.0,
+    seed: int = 1,
+) -> dict:
+    """Writes a shift with `stops` trigger stops spread over `plcs` lines."""
+    rng = random.Random(seed)
+    span = hours * 3600
+    t0 = time.time() - span
+    configs, tag_rows = [], []
+    for n in range(plcs):
+        plc_id = f"REPLAY{n:03d}"
+        configs.append(
+            {
+                "id": plc_id,
+                "site_code": settings.plant_site_code,
+                "name": f"Replay line {n}",
+                "protocol": "MODBUS_TCP",
+                "ip_address": "127.0.0.1",
+                "port": 502,
+                "serial_port": None,
+                "baud_rate": None,
+                "slave_id": 1,
+                "scan_interval_sec": max(1, round(interval)),
+                "is_active": True,
+            }
+        )
+        tag_rows.append(
+            {
+                "id": f"{plc_id}-fault",
+                "plc_id": plc_id,
+                "tag_name": "fault",
+                "address": 0,
+                "data_type": "BOOL",
+                "multiplier": 1.0,
+                "is_stop_trigger": True,
+                "trigger_value": 1.0,
+                "stop_reason_template": "Line fault, speed $speed",
+                "asset_id": f"REPLAY-ASSET-{n}",
+            }
+        )
+        for a in range(1, tags):
+            tag_rows.append(
+                {
+                    "id": f"{plc_id}-t{a}",
+                    "plc_id": plc_id,
+                    "tag_name": "speed" if a == 1 else f"t{a}",
+                    "address": a,
+                    "data_type": "INT16",
+                    "multiplier": 1.0,
+                    "is_stop_trigger": False,
+                    "trigger_value": None,
+                    "stop_reason_template": None,
+                    "asset_id": None,
+                }
+            )
+
+    per_plc = [0] * plcs
+    for _ in range(stops):
+        per_plc[rng.randrange(plcs)] += 1
+    windows = [_stop_windows(k, span, rng) for k in per_plc]
+
+    writer = RecordingWriter(path)
+    try:
+        writer.write_config(configs, tag_rows)
+        names = ["speed" if a == 1 else f"t{a}" for a in range(1, tags)]
+        state = [{name: float(rng.randint(0, 1000)) for name in names} for _ in configs]
+        cursor = [0] * plcs
+        for step in range(int(span / interval)):
+            t = step * interval
+            for n, cfg in enumerate(configs):
+                w = windows[n]
+                while cursor[n] < len(w) and w[cursor[n]][1] <= t:
+                    cursor[n] += 1
+                in_stop = cursor[n] < len(w) and w[cursor[n]][0] <= t
+                values = state[n]
+                # A few analog values move per scan; speed reads 0 while stopped
+                for name in rng.sample(names, k=min(len(names), max(1, tags // 10))):
+                    values[name] = float(max(0, values[name] + rng.randint(-5, 5)))
+                out = dict(values)
+                if in_stop and "speed" in out:
+                    out["speed"] = 0.0
+                out["fault"] = 1.0 if in_stop else 0.0
+                writer.write_scan(cfg["id"], out, t0 + t)
+    finally:
+        writer.close()
+    return {"path": str(writer.path), "scans": writer.scans, "stops": stops, "plcs": plcs}
+
+
+# ---------------------------------------------------------------------------
+# Replay
+# ---------------------------------------------------------------------------
+
+
+class _ReplayClient:
+    connected = True
+
+    def __init__(self):
+        self.values: dict = {}
+
+
+class _ReplayPool:
+    def __init__(self, clients: dict):
+        self.clients = clients
+
+    def acquire(self, config):
+        return self.clients.get(config.id)
+
+    def report_success(self, plc_id):
+        pass
+
+    def report_failure(self, plc_id, error=None):
+        pass
+
+    def close_all(self):
+        pass
+
+
+def _read_recorded(client, tags, slave_id) -> dict:
+    return dict(client.values)
+
+
+class _Frame:
+    """What the scan in progress on this worker thread is replaying."""
+
+    def __init__(self, due: float, edges: set, rise: dict, fall: dict):
+        self.due = due
+        self.edges = edges  # trigger tag names that changed in this frame
+        self.rise = rise  # tag_id -> due time of the last rising edge
+        self.fall = fall
+
+
+class _TimedBus:
+    def __init__(self, bus, local, samples):
+        self._bus = bus
+        self._local = local
+        self._samples = samples
+
+    def publish(self, data, topic=None):
+        frame = getattr(self._local, "frame", None)
+        if frame is not None and frame.edges & set(data.get("values") or ()):
+            self._samples.append(time.monotonic() - frame.due)
+        return self._bus.publish(data, topic=topic)
+
+    def __getattr__(self, name):
+        return getattr(self._bus, name)
+
+
+def _seed(Session, snapshot: dict) -> None:
+    db = Session()
+    now = datetime.utcnow()
+    for cfg in snapshot["configs"]:
+        db.merge(PLCConfig(**cfg, created_at_utc=now))
+    for tag in snapshot["tags"]:
+        db.merge(PLCTag(**{k: v for k, v in tag.items() if hasattr(PLCTag, k)}))
+    db.commit()
+    db.close()
+
+
+def replay(
+    path: str,
+    speed: float = 10.0,
+    db_url: str | None = None,
+    minutes: float | None = None,
+) -> dict:
+    if not 1 <= speed <= 100:
+        raise ValueError("speed must be between 1 and 100")
+    workdir = Path(tempfile.mkdtemp(prefix="plc_replay_"))
+    if db_url is None:
+        db_url = f"sqlite+pysqlite:///{workdir / 'replay.db'}"
+    engine = create_engine(db_url, pool_pre_ping=True)
+    Base.metadata.create_all(engine)
+    PlantSessionLocal.configure(bind=engine)
+
+    local = threading.local()
+    lat = {"stop_open": [], "stop_close": [], "sse_publish": [], "outbox": []}
+    lag: list[float] = []
+    scan_sec: list[float] = []
+    lock = threading.Lock()
+    clock = {"rec0": None, "wall0": None}
+
+    def replay_clock() -> float:
+        if clock["rec0"] is None:
+            return time.monotonic()
+        return clock["rec0"] + (time.monotonic() - clock["wall0"]) * speed
+
+    def _collect_staged(session, *_args):
+        # Event log rows go through write_buffer; look at them before they are written
+        rows = session.info.setdefault("replay_rows", [])
+        for row in write_buffer.staged(session, EventLog):
+            payload = row["payload_json"] or {}
+            if row["entity_type"] == "timeline_event" and payload.get("event_type") in (
+                "STOP_OPEN",
+                "STOP_RESOLVE",
+            ):
+                rows.append(("outbox", payload.get("stop_id"), payload["event_type"]))
+
+    event.listen(PlantSessionLocal, "before_flush", _collect_staged, insert=True)
+    event.listen(PlantSessionLocal, "before_commit", _collect_staged, insert=True)
+
+    @event.listens_for(PlantSessionLocal, "after_flush")
+    def _collect(session, _ctx):
+        rows = session.info.setdefault("replay_rows", [])
+        for obj in session.new:
+            if isinstance(obj, StopQueue):
+                rows.append(("stop_open", obj.id, obj.trigger_tag_id))
+        for obj in session.dirty:
+            if isinstance(obj, StopQueue) and obj.is_open is False:
+                rows.append(("stop_close", obj.id, obj.trigger_tag_id))
+
+    @event.listens_for(PlantSessionLocal, "after_commit")
+    def _committed(session):
+        rows = session.info.pop("replay_rows", None)
+        frame = getattr(local, "frame", None)
+        if not rows or frame is None:
+            return
+        t = time.monotonic()
+        tag_of = {stop_id: tag_id for kind, stop_id, tag_id in rows if kind != "outbox"}
+        with lock:
+            for kind, stop_id, extra in rows:
+                if kind == "stop_open" and extra in frame.rise:
+                    lat["stop_open"].append(t - frame.rise[extra])
+                elif kind == "stop_close" and extra in frame.fall:
+                    lat["stop_close"].append(t - frame.fall[extra])
+                elif kind == "outbox":
+                    edges = frame.rise if extra == "STOP_OPEN" else frame.fall
+                    if tag_of.get(stop_id) in edges:
+                        lat["outbox"].append(t - edges[tag_of[stop_id]])
+
+    saved = {
+        name: getattr(plc_service, name)
+        for name in (
+            "CACHE",
+            "OPEN_STOPS",
+            "HISTORIAN",
+            "JOURNAL",
+            "TRIGGERS",
+            "LIVE_CONTEXT",
+            "POOL",
+            "plc_bus",
+            "read_tag_values",
+            "RECORDER",
+            "CHANNEL",
+        )
+    }
+    clients: dict[str, _ReplayClient] = {}
+    queues: dict[str, queue.Queue] = {}
+    workers: list[threading.Thread] = []
+
+    def worker(plc_id: str, triggers: list[tuple[str, str, float]]) -> None:
+        client = clients[plc_id]
+        active: dict[str, bool] = {}
+        rise: dict[str, float] = {}
+        fall: dict[str, float] = {}
+        while True:
+            item = queues[plc_id].get()
+            if item is None:
+                return
+            due, values = item
+            started = time.monotonic()
+            edges = set()
+            for tag_id, name, trigger_value in triggers:
+                value = values.get(name)
+                if value is None:
+                    continue
+                is_active = value == trigger_value
+                if active.get(tag_id, False) != is_active:
+                    (rise if is_active else fall)[tag_id] = due
+                    edges.add(name)
+                active[tag_id] = is_active
+            client.values = values
+            local.frame = _Frame(due, edges, rise, fall)
+            config = plc_service.CACHE.get_config(plc_id)
+            db = PlantSessionLocal()
+            try:
+                plc_service.process_plc(db, config)
+            finally:
+                db.close()
+                local.frame = None
+            with lock:
+                lag.append(started - due)
+                scan_sec.append(time.monotonic() - started)
+
+    frames = 0
+    first_ts = last_ts = None
+    wall_start = time.monotonic()
+    try:
+        plc_service.CACHE = PlcConfigCache()
+        plc_service.OPEN_STOPS = OpenStopIndex()
+        plc_service.HISTORIAN = Historian(spill=False)
+        plc_service.JOURNAL = TransitionJournal(workdir / "journal" / "transitions.jsonl")
+        plc_service.TRIGGERS = TriggerDebouncer(
+            settings.plc_trigger_off_delay_sec,
+            flap_window_sec=settings.plc_flap_window_sec,
+            clock=replay_clock,
+        )
+        plc_service.LIVE_CONTEXT = LiveContextThrottle(
+            settings.plc_live_context_min_interval_sec, clock=replay_clock
+        )
+        plc_service.POOL = _ReplayPool(clients)
+        plc_service.plc_bus = _TimedBus(saved["plc_bus"], local, lat["sse_publish"])
+        plc_service.read_tag_values = _read_recorded
+        plc_service.RECORDER = None
+        plc_service.CHANNEL = None
+
+        for item in read_recording(path):
+            if item[0] == "config":
+                if queues:
+                    continue  # keep the first configuration for the whole run
+                snapshot = item[1]
+                _seed(PlantSessionLocal, snapshot)
+                plc_service.CACHE.invalidate()
+                for cfg in snapshot["configs"]:
+                    triggers = [
+                        (t["id"], t["tag_name"], t["trigger_value"])
+                        for t in snapshot["tags"]
+                        if t["plc_id"] == cfg["id"]
+                        and t["is_stop_trigger"]
+                        and t["trigger_value"] is not None
+                    ]
+                    clients[cfg["id"]] = _ReplayClient()
+                    queues[cfg["id"]] = queue.Queue()
+                    th = threading.Thread(
+                        target=worker, args=(cfg["id"], triggers), name=f"replay-{cfg['id']}"
+                    )
+                    th.daemon = True
+                    th.start()
+                    workers.append(th)
+                continue
+
+            _, ts, plc_id, values = item
+            if plc_id not in queues:
+                continue
+            if first_ts is None:
+                first_ts = ts
+                clock["rec0"], clock["wall0"] = ts, time.monotonic()
+            if minutes is not None and ts - first_ts > minutes * 60:
+                break
+            due = clock["wall0"] + (ts - first_ts) / speed
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            queues[plc_id].put((due, values))
+            frames += 1
+            last_ts = ts
+    finally:
+        for q in queues.values():
+            q.put(None)
+        for th in workers:
+            th.join(timeout=60)
+        event.remove(PlantSessionLocal, "before_flush", _collect_staged)
+        event.remove(PlantSessionLocal, "before_commit", _collect_staged)
+        event.remove(PlantSessionLocal, "after_flush", _collect)
+        event.remove(PlantSessionLocal, "after_commit", _committed)
+        for name, value in saved.items():
+            setattr(plc_service, name, value)
+
+    db = PlantSessionLocal()
+    try:
+        stops_opened = db.execute(select(func.count()).select_from(StopQueue)).scalar()
+        stops_closed = db.execute(
+            select(func.count()).select_from(StopQueue).where(StopQueue.is_open.is_(False))
+        ).scalar()
+        outbox_rows = db.execute(
+            select(func.count()).select_from(EventLog).where(EventLog.entity_type.is_not(None))
+        ).scalar()
+    finally:
+        db.close()
+
+    def ms(samples):
+        return {
+            k: (round(v * 1000, 1) if isinstance(v, float) else v)
+            for k, v in percentiles(samples).items()
+        }
+
+    recorded = (last_ts - first_ts) if first_ts is not None else 0.0
+    wall = time.monotonic() - wall_start
+    return {
+        "recording": str(path),
+        "speed": speed,
+        "recorded_sec": round(recorded, 1),
+        "wall_sec": round(wall, 1),
+        "effective_speed": round(recorded / wall, 1) if wall else None,
+        "scans": frames,
+        "stops_opened": stops_opened,
+        "stops_closed": stops_closed,
+        "outbox_rows": outbox_rows,
+        "scan_ms": ms(scan_sec),
+        "dispatch_lag_ms": ms(lag),
+        "stop_row_open_ms": ms(lat["stop_open"]),
+        "stop_row_close_ms": ms(lat["stop_close"]),
+        "sse_publish_ms": ms(lat["sse_publish"]),
+        "outbox_row_ms": ms(lat["outbox"]),
+    }
+
+
+def info(path: str) -> dict:
+    plcs, scans, configs = set(), 0, 0
+    first = last = None
+    for item in read_recording(path):
+        if item[0] == "config":
+            configs += 1
+            continue
+        _, ts, plc_id, _values = item
+        plcs.add(plc_id)
+        scans += 1
+        first = ts if first is None else first
+        last = ts
+    return {
+        "recording": str(path),
+        "bytes": os.path.getsize(path),
+        "plcs": len(plcs),
+        "scans": scans,
+        "config_frames": configs,
+        "duration_sec": round(last - first, 1) if first is not None else 0.0,
+    }
+
+
+def _print_report(r: dict) -> None:
+    print("-" * 60)
+    print(
+        f"PLC replay {r['recording']} at {r['speed']}x: "
+        f"{r['recorded_sec']}s recorded in {r['wall_sec']}s ({r['effective_speed']}x)"
+    )
+    print(f"scans:                   {r['scans']}")
+    print(f"stops opened / closed:   {r['stops_opened']} / {r['stops_closed']}")
+    print(f"outbox rows:             {r['outbox_rows']}")
+    print(f"scan time (ms):          {r['scan_ms']}")
+    print(f"dispatch lag (ms):       {r['dispatch_lag_ms']}")
+    print(f"-> StopQueue open (ms):  {r['stop_row_open_ms']}")
+    print(f"-> StopQueue close (ms): {r['stop_row_close_ms']}")
+    print(f"-> SSE publish (ms):     {r['sse_publish_ms']}")
+    print(f"-> outbox row (ms):      {r['outbox_row_ms']}")
+    print("-" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record / replay PLC scans for load tests")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("synth", help="write a synthetic stop-storm recording")
+    p.add_argument("path")
+    p.add_argument("--plcs", type=int, default=10)
+    p.add_argument("--tags", type=int, default=50, help="tags per PLC (incl. trigger)")
+    p.add_argument("--hours", type=float, default=8.0)
+    p.add_argument("--stops", type=int, default=400)
+    p.add_argument("--interval", type=float, default=1.0, help="scan interval (sec)")
+    p.add_argument("--seed", type=int, default=1)
+
+    p = sub.add_parser("replay", help="replay a recording into the trigger pipeline")
+    p.add_argument("path")
+    p.add_argument("--speed", type=float, default=10.0, help="1-100x")
+    p.add_argument("--db-url", default=None, help="default: temp SQLite file")
+    p.add_argument("--minutes", type=float, default=None, help="replay only the first N min")
+    p.add_argument("--json", action="store_true", help="print the raw JSON report")
+
+    p = sub.add_parser("info", help="summarise a recording")
+    p.add_argument("path")
+
+    args = parser.parse_args()
+    if args.cmd == "synth":
+        print(
+            json.dumps(
+                synth(
+                    args.path,
+                    plcs=args.plcs,
+                    tags=args.tags,
+                    hours=args.hours,
+                    stops=args.stops,
+                    interval=args.interval,
+                    seed=args.seed,
+                ),
+                indent=2,
+            )
+        )
+    elif args.cmd == "info":
+        print(json.dumps(info(args.path), indent=2))
+    else:
+        report = replay(args.path, speed=args.speed, db_url=args.db_url, minutes=args.minutes)
+        if args.json:
+            print(json.dumps(report, indent=2, default=str))
+        else:
+            _print_report(report)
+
+
+if __name__ == "__main__":
+    main()
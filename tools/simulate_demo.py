@@ -268,13 +268,13 @@ def simulate():
                         tck.close_note = "Problem resolved by maintenance."
 
                     # Update Timeline Events created by services
-                    # Note: timeline_events table has occurred_at_utc
-                    from apps.plant_backend.models import TimelineEvent
+                    # Note: event_log rows have occurred_at_utc
+                    from apps.plant_backend.models import EventLog
 
                     te_list = (
-                        db.query(TimelineEvent)
+                        db.query(EventLog)
                         .filter(
-                            TimelineEvent.correlation_id.in_(
+                            EventLog.correlation_id.in_(
                                 [f"stop_open:{stop_id}", f"ticket_open:{ticket_id}"]
                             )
                         )
@@ -338,12 +338,12 @@ def simulate():
                         tck.close_note = "Test Resolved"
 
                     # Update Timeline
-                    from apps.plant_backend.models import TimelineEvent
+                    from apps.plant_backend.models import EventLog
 
                     te_list = (
-                        db.query(TimelineEvent)
+                        db.query(EventLog)
                         .filter(
-                            TimelineEvent.correlation_id.in_(
+                            EventLog.correlation_id.in_(
                                 [f"stop_open:{s_id}", f"ticket_open:{t_id}"]
                             )
                         )
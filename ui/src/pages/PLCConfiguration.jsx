@@ -1,6 +1,7 @@
 
 import { useEffect, useState } from "react";
 import { apiDelete, apiGet, apiPost, apiPut } from "../api";
+import { connectPlcValuesSSE } from "../sse";
 
 export default function PLCConfiguration() {
   const [configs, setConfigs] = useState([]);
@@ -334,13 +335,14 @@ function PLCTagEditor({ plc, onBack }) {
     useEffect(() => { loadTags(); }, [plc.id]);
 
     useEffect(() => {
-        const interval = setInterval(async () => {
-            try {
-                const vals = await apiGet(`/plc/values/${plc.id}`);
-                setLiveValues(vals || {});
-            } catch(e) { console.error("Poll error", e); }
-        }, 2000);
-        return () => clearInterval(interval);
+        // Snapshot on connect, then only the tags that changed
+        return connectPlcValuesSSE([plc.id], (msg) => {
+            if (msg.type === "PLC_SNAPSHOT") {
+                setLiveValues((msg.values && msg.values[plc.id]) || {});
+            } else if (msg.type === "PLC_VALUES" && msg.plc_id === plc.id) {
+                setLiveValues(prev => ({ ...prev, ...msg.values }));
+            }
+        });
     }, [plc.id]);
     
     function getEmptyTag(plcId) {
@@ -353,7 +355,13 @@ function PLCTagEditor({ plc, onBack }) {
             is_stop_trigger: false,
             trigger_value: 1.0,
             stop_reason_template: "",
-            asset_id: ""
+            asset_id: "",
+            deadband_abs: "",
+            deadband_pct: "",
+            on_delay_sec: "",
+            off_delay_sec: "",
+            min_stop_sec: "",
+            scan_class: ""
         };
     }
 
@@ -369,12 +377,19 @@ function PLCTagEditor({ plc, onBack }) {
     async function handleSaveTag() {
         if(!formTag.tag_name) return alert("Tag Name required");
         
-        // Parse numbers safely
+        // Parse numbers safely (blank optional fields are sent as null)
+        const optNum = v => (v === "" || v == null ? null : parseFloat(v));
         const payload = {
             ...formTag,
             address: parseInt(formTag.address),
             multiplier: parseFloat(formTag.multiplier),
-            trigger_value: parseFloat(formTag.trigger_value)
+            trigger_value: parseFloat(formTag.trigger_value),
+            deadband_abs: optNum(formTag.deadband_abs),
+            deadband_pct: optNum(formTag.deadband_pct),
+            on_delay_sec: optNum(formTag.on_delay_sec),
+            off_delay_sec: optNum(formTag.off_delay_sec),
+            min_stop_sec: optNum(formTag.min_stop_sec),
+            scan_class: formTag.scan_class || null
         };
         
         if (isNaN(payload.address)) return alert("Address must be a valid number");
@@ -433,9 +448,20 @@ function PLCTagEditor({ plc, onBack }) {
                     <select className="border p-2 rounded" value={formTag.data_type} onChange={e => setFormTag({...formTag, data_type: e.target.value})}>
                         <option value="BOOL">BOOL</option>
                         <option value="INT16">INT16</option>
+                        <option value="UINT16">UINT16</option>
+                        <option value="INT32">INT32</option>
+                        <option value="UINT32">UINT32</option>
                         <option value="FLOAT32">FLOAT32</option>
                     </select>
                      <input type="number" placeholder="Multiplier" className="border p-2 rounded" value={formTag.multiplier} onChange={e => setFormTag({...formTag, multiplier: e.target.value})} />
+                     <input type="number" placeholder="Deadband (abs)" className="border p-2 rounded" value={formTag.deadband_abs ?? ""} onChange={e => setFormTag({...formTag, deadband_abs: e.target.value})} />
+                     <input type="number" placeholder="Deadband (%)" className="border p-2 rounded" value={formTag.deadband_pct ?? ""} onChange={e => setFormTag({...formTag, deadband_pct: e.target.value})} />
+                     <select className="border p-2 rounded" value={formTag.scan_class ?? ""} onChange={e => setFormTag({...formTag, scan_class: e.target.value})}>
+                        <option value="">Scan: Auto (fast for triggers)</option>
+                        <option value="fast">Scan: Fast</option>
+                        <option value="normal">Scan: Normal</option>
+                        <option value="slow">Scan: Slow (counters, diagnostics)</option>
+                     </select>
                 </div>
                 <div className="mt-4 border-t pt-4">
                      <label className="flex items-center space-x-2">
@@ -448,6 +474,9 @@ function PLCTagEditor({ plc, onBack }) {
                             <input type="number" placeholder="Trigger Value" className="border p-2 rounded" value={formTag.trigger_value} onChange={e => setFormTag({...formTag, trigger_value: e.target.value})} />
                             <input placeholder="Asset ID" className="border p-2 rounded" value={formTag.asset_id || ""} onChange={e => setFormTag({...formTag, asset_id: e.target.value})} />
                             <input placeholder="Reason Template (Use $TagName)" className="border p-2 rounded" value={formTag.stop_reason_template || ""} onChange={e => setFormTag({...formTag, stop_reason_template: e.target.value})} />
+                            <input type="number" placeholder="On Delay (sec)" className="border p-2 rounded" value={formTag.on_delay_sec ?? ""} onChange={e => setFormTag({...formTag, on_delay_sec: e.target.value})} />
+                            <input type="number" placeholder="Off Delay (sec, default 2)" className="border p-2 rounded" value={formTag.off_delay_sec ?? ""} onChange={e => setFormTag({...formTag, off_delay_sec: e.target.value})} />
+                            <input type="number" placeholder="Min Stop Duration (sec)" className="border p-2 rounded" value={formTag.min_stop_sec ?? ""} onChange={e => setFormTag({...formTag, min_stop_sec: e.target.value})} />
                         </div>
                      )}
                 </div>
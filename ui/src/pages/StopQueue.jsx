@@ -11,7 +11,7 @@ export default function StopQueue() {
     setErr("");
     setLoading(true);
     try {
-      const r = await apiGet("/ui/stop-queue/list?status=OPEN&limit=50&offset=0");
+      const r = await apiGet("/ui/stop-queue/list?status=OPEN&limit=50");
       setItems(r.items || []);
     } catch (e) {
       setErr(String(e?.message || e));
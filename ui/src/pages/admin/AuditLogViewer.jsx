@@ -36,18 +36,22 @@ const FormatDetails = ({ details }) => {
 
 export default function AuditLogViewer() {
     const [logs, setLogs] = useState([]);
-    const [total, setTotal] = useState(0);
+    const [total, setTotal] = useState(null);
     const [loading, setLoading] = useState(true);
     const [err, setErr] = useState("");
-    const [offset, setOffset] = useState(0);
+    const [cursor, setCursor] = useState(null);
+    const [page, setPage] = useState({});
+    const [pageNo, setPageNo] = useState(0);
     const [rowsPerPage, setRowsPerPage] = useState(50);
 
     async function load() {
         setLoading(true);
         try {
-            const data = await apiGet(`/master/audit/list?limit=${rowsPerPage}&offset=${offset}`);
+            const after = cursor ? `&cursor=${encodeURIComponent(cursor)}` : "";
+            const data = await apiGet(`/master/audit/list?limit=${rowsPerPage}${after}`);
             setLogs(data.items || []);
-            setTotal(data.total || 0);
+            setPage(data.page || {});
+            setTotal(data.total ?? null); // planner estimate, null when unavailable
         } catch (e) {
             setErr(String(e));
         } finally {
@@ -55,11 +59,17 @@ export default function AuditLogViewer() {
         }
     }
 
-    useEffect(() => { load(); }, [offset, rowsPerPage]);
+    useEffect(() => { load(); }, [cursor, rowsPerPage]);
+
+    const goTo = (nextCursor, step) => {
+        setCursor(nextCursor);
+        setPageNo(pageNo + step);
+    };
 
     const handleRowsChange = (e) => {
         setRowsPerPage(parseInt(e.target.value));
-        setOffset(0); // Reset to first page
+        setCursor(null); // Reset to first page
+        setPageNo(0);
     };
 
     return (
@@ -96,21 +106,23 @@ export default function AuditLogViewer() {
                 </div>
 
                 <div className="font-medium text-xs tracking-tight">
-                    {total > 0 ? `${offset + 1}–${Math.min(offset + rowsPerPage, total)} of ${total}` : '0-0 of 0'}
+                    {logs.length > 0
+                        ? `${pageNo * rowsPerPage + 1}–${pageNo * rowsPerPage + logs.length}${total != null ? ` of ~${total}` : ''}`
+                        : '0-0'}
                 </div>
 
                 <div className="flex items-center gap-1">
                     <button
-                        onClick={() => setOffset(Math.max(0, offset - rowsPerPage))}
-                        disabled={offset === 0 || loading}
+                        onClick={() => goTo(page.prev_cursor, -1)}
+                        disabled={!page.prev_cursor || loading}
                         className="p-1.5 rounded-full hover:bg-gray-200 disabled:opacity-30 transition-colors"
                         title="Previous page"
                     >
                         <svg className="w-5 h-5" fill="currentColor" viewBox="0 0 20 20"><path fillRule="evenodd" d="M12.707 5.293a1 1 0 010 1.414L9.414 10l3.293 3.293a1 1 0 01-1.414 1.414l-4-4a1 1 0 010-1.414l4-4a1 1 0 011.414 0z" clipRule="evenodd" /></svg>
                     </button>
                     <button
-                        onClick={() => setOffset(offset + rowsPerPage)}
-                        disabled={offset + rowsPerPage >= total || loading}
+                        onClick={() => goTo(page.next_cursor, 1)}
+                        disabled={!page.next_cursor || loading}
                         className="p-1.5 rounded-full hover:bg-gray-200 disabled:opacity-30 transition-colors"
                         title="Next page"
                     >
@@ -6,3 +6,14 @@ export function connectStopSSE(onMsg) {
   };
   return () => es.close();
 }
+
+// Live PLC values: a PLC_SNAPSHOT on (re)connect, then PLC_VALUES deltas per scan
+export function connectPlcValuesSSE(plcIds, onMsg) {
+  const base = import.meta.env.VITE_API_BASE || "http://localhost:8000";
+  const qs = plcIds && plcIds.length ? `?plc_ids=${encodeURIComponent(plcIds.join(","))}` : "";
+  const es = new EventSource(`${base}/realtime/plc-values${qs}`);
+  es.onmessage = (ev) => {
+    try { onMsg(JSON.parse(ev.data)); } catch { /* ignore malformed */ }
+  };
+  return () => es.close();
+}